@@ -0,0 +1,496 @@
+"""
+In-memory aggregates behind Q5, Q6, Q11 and the Q4 activity time series.
+
+Per-title expense totals and per-name assignment counts are kept up to date
+from committed writes, each with a sorted order, so the endpoints page
+through (or take the first N of) a sorted list instead of running a GROUP BY
+over `productionexpense` / `personnelassignment` on every call. Schedule
+entries are rolled up into counts per start day and task name, so a trend
+over a long range adds up precomputed days instead of rescanning
+`productionschedule`.
+
+    python -m app.aggregates check    # compare a fresh load with the SQL GROUP BYs
+
+A running server exposes the same check for its live, incrementally
+maintained copy at GET /aggregates/check, and rebuilds it with
+POST /aggregates/rebuild.
+"""
+
+import argparse
+import math
+import os
+import sys
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .events import RowChange, subscribe
+from .models import Personnel, PersonnelAssignment, Production, ProductionExpense, ProductionSchedule
+from .pagination import PageParams, decode_cursor, encode_cursor
+from .stores import InMemoryStore
+
+# Seconds before the stores are reloaded even without local writes (see app.stores).
+MAX_AGE = float(os.getenv("AGGREGATES_MAX_AGE", "60"))
+
+ACTOR_TYPES = ("Actor", "Actress")
+
+_ZERO = Decimal(0)
+
+
+def _name_key(name: Optional[str]) -> Tuple[bool, str]:
+    # NULL sorts first, as in MySQL and SQLite.
+    return name is not None, name or ""
+
+
+def _decimal(value: Any) -> Optional[Decimal]:
+    if value is None or isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+class _Group:
+    """Members and running total of one GROUP BY key."""
+
+    __slots__ = ("members", "total")
+
+    def __init__(self) -> None:
+        self.members = 0
+        self.total: Any = 0
+
+
+class AggregateStore(InMemoryStore):
+    """
+    Q11: SUM(productionexpense.amount) per production title, zero included,
+    ordered by (total desc, title). Q5/Q6: COUNT of assignments per actor name,
+    ordered by (count, name).
+    """
+
+    TABLES = frozenset(model.__tablename__ for model in (Production, ProductionExpense, Personnel, PersonnelAssignment))
+
+    def __init__(self, max_age: float = MAX_AGE):
+        super().__init__(max_age)
+        self._reset()
+
+    def _reset(self) -> None:
+        # Source rows, by primary key, so updates and deletes can undo their old values.
+        self._titles: Dict[int, Optional[str]] = {}
+        self._expenses: Dict[int, Tuple[Optional[int], Optional[Decimal]]] = {}
+        self._production_totals: Dict[int, Decimal] = {}
+        self._personnel: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+        self._assignments: Set[Tuple[int, int]] = set()
+        self._assignment_counts: Dict[int, int] = {}
+        # Groups and their sorted orders.
+        self._title_groups: Dict[Optional[str], _Group] = {}
+        self._title_order: List[Tuple[Decimal, Tuple[bool, str]]] = []
+        self._name_groups: Dict[Optional[str], _Group] = {}
+        self._name_order: List[Tuple[int, Tuple[bool, str]]] = []
+
+    # -------------------------------------------------------------
+    # Group bookkeeping
+    # -------------------------------------------------------------
+
+    def _title_entry(self, title: Optional[str]) -> Tuple[Decimal, Tuple[bool, str]]:
+        return -self._title_groups[title].total, _name_key(title)
+
+    def _name_entry(self, name: Optional[str]) -> Tuple[int, Tuple[bool, str]]:
+        return self._name_groups[name].total, _name_key(name)
+
+    def _adjust_title(self, title: Optional[str], members: int, amount: Decimal) -> None:
+        group = self._title_groups.get(title)
+        if group is None:
+            group = self._title_groups[title] = _Group()
+        else:
+            self._title_order.pop(bisect_left(self._title_order, self._title_entry(title)))
+        group.members += members
+        group.total += amount
+        if group.members > 0:
+            insort(self._title_order, self._title_entry(title))
+        else:
+            del self._title_groups[title]
+
+    def _adjust_name(self, name: Optional[str], members: int, count: int) -> None:
+        group = self._name_groups.get(name)
+        if group is None:
+            group = self._name_groups[name] = _Group()
+        else:
+            self._name_order.pop(bisect_left(self._name_order, self._name_entry(name)))
+        group.members += members
+        group.total += count
+        if group.members > 0:
+            insort(self._name_order, self._name_entry(name))
+        else:
+            del self._name_groups[name]
+
+    # -------------------------------------------------------------
+    # Row-level changes
+    # -------------------------------------------------------------
+
+    def _set_expense(self, expense_id: int, production_id: Optional[int], amount: Optional[Decimal]) -> None:
+        old = self._expenses.pop(expense_id, None)
+        if old is not None:
+            self._add_to_production(old[0], -(old[1] or _ZERO))
+        if production_id is not None or amount is not None:
+            self._expenses[expense_id] = (production_id, amount)
+            self._add_to_production(production_id, amount or _ZERO)
+
+    def _add_to_production(self, production_id: Optional[int], amount: Decimal) -> None:
+        if production_id is None or not amount:
+            return
+        self._production_totals[production_id] = self._production_totals.get(production_id, _ZERO) + amount
+        if production_id in self._titles:
+            self._adjust_title(self._titles[production_id], 0, amount)
+
+    def _set_production(self, production_id: int, title: Optional[str], exists: bool = True) -> None:
+        total = self._production_totals.get(production_id, _ZERO)
+        if production_id in self._titles:
+            self._adjust_title(self._titles.pop(production_id), -1, -total)
+        if exists:
+            self._titles[production_id] = title
+            self._adjust_title(title, 1, total)
+
+    def _set_assignment(self, personnel_id: int, production_id: int, exists: bool) -> None:
+        key = (personnel_id, production_id)
+        if (key in self._assignments) == exists:
+            return
+        delta = 1 if exists else -1
+        if exists:
+            self._assignments.add(key)
+        else:
+            self._assignments.discard(key)
+        self._assignment_counts[personnel_id] = self._assignment_counts.get(personnel_id, 0) + delta
+        person = self._personnel.get(personnel_id)
+        if person is not None and person[1] in ACTOR_TYPES:
+            self._adjust_name(person[0], 0, delta)
+
+    def _set_personnel(self, personnel_id: int, name: Optional[str], ptype: Optional[str], exists: bool = True) -> None:
+        count = self._assignment_counts.get(personnel_id, 0)
+        old = self._personnel.pop(personnel_id, None)
+        if old is not None and old[1] in ACTOR_TYPES:
+            self._adjust_name(old[0], -1, -count)
+        if exists:
+            self._personnel[personnel_id] = (name, ptype)
+            if ptype in ACTOR_TYPES:
+                self._adjust_name(name, 1, count)
+
+    # -------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------
+
+    def _read(self, db: Session) -> Tuple[List[Any], List[Any], List[Any], List[Any]]:
+        productions = db.execute(select(Production.production_id, Production.title)).all()
+        expenses = db.execute(
+            select(ProductionExpense.expense_id, ProductionExpense.production_id, ProductionExpense.amount)
+        ).all()
+        personnel = db.execute(
+            select(Personnel.personnel_id, Personnel.name, Personnel.personnel_type)
+        ).all()
+        assignments = db.execute(
+            select(PersonnelAssignment.personnel_id, PersonnelAssignment.production_id)
+        ).all()
+        return productions, expenses, personnel, assignments
+
+    def _install(self, rows: Tuple[List[Any], List[Any], List[Any], List[Any]]) -> None:
+        productions, expenses, personnel, assignments = rows
+        self._reset()
+        # Sources first, then the groups in one pass each, so loading does not
+        # pay the sorted-insert cost per row.
+        for r in expenses:
+            amount = _decimal(r.amount)
+            self._expenses[r.expense_id] = (r.production_id, amount)
+            if r.production_id is not None and amount:
+                self._production_totals[r.production_id] = (
+                    self._production_totals.get(r.production_id, _ZERO) + amount)
+        for r in productions:
+            self._titles[r.production_id] = r.title
+            group = self._title_groups.setdefault(r.title, _Group())
+            group.members += 1
+            group.total += self._production_totals.get(r.production_id, _ZERO)
+        for r in assignments:
+            self._assignments.add((r.personnel_id, r.production_id))
+            self._assignment_counts[r.personnel_id] = self._assignment_counts.get(r.personnel_id, 0) + 1
+        for r in personnel:
+            self._personnel[r.personnel_id] = (r.name, r.personnel_type)
+            if r.personnel_type in ACTOR_TYPES:
+                group = self._name_groups.setdefault(r.name, _Group())
+                group.members += 1
+                group.total += self._assignment_counts.get(r.personnel_id, 0)
+        self._title_order = sorted(self._title_entry(t) for t in self._title_groups)
+        self._name_order = sorted(self._name_entry(n) for n in self._name_groups)
+
+    # -------------------------------------------------------------
+    # Incremental maintenance
+    # -------------------------------------------------------------
+
+    def _apply_one(self, change: RowChange) -> bool:
+        row = change.row
+        delete = change.op == "delete"
+        if change.table == ProductionExpense.__tablename__:
+            if row is None or row.get("expense_id") is None:
+                return False
+            if delete:
+                self._set_expense(row["expense_id"], None, None)
+            elif {"production_id", "amount"} <= row.keys():
+                self._set_expense(row["expense_id"], row["production_id"], _decimal(row["amount"]))
+            else:
+                return False
+        elif change.table == Production.__tablename__:
+            if row is None or row.get("production_id") is None or not (delete or "title" in row):
+                return False
+            self._set_production(row["production_id"], row.get("title"), exists=not delete)
+        elif change.table == PersonnelAssignment.__tablename__:
+            if row is None or row.get("personnel_id") is None or row.get("production_id") is None:
+                return False
+            # An update may move the row to another primary key; its old key is unknown here.
+            if change.op == "update":
+                return False
+            self._set_assignment(row["personnel_id"], row["production_id"], exists=not delete)
+        elif change.table == Personnel.__tablename__:
+            if row is None or row.get("personnel_id") is None:
+                return False
+            if not delete and not {"name", "personnel_type"} <= row.keys():
+                return False
+            self._set_personnel(row["personnel_id"], row.get("name"), row.get("personnel_type"), exists=not delete)
+        return True
+
+    # -------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------
+
+    def expense_summary(self, db: Session, page: PageParams) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Q11 rows for `page`, in (total_expense desc, production_title) order, and the next cursor."""
+        self._ensure_fresh(db)
+        with self._lock:
+            start = 0
+            if page.cursor:
+                total, title = decode_cursor(page.cursor, 2)
+                start = bisect_right(self._title_order, (-_decimal(total), _name_key(title)))
+            stop = len(self._title_order) if page.limit is None else start + page.limit
+            entries = self._title_order[start:stop]
+        data_list = [
+            {"production_title": title if present else None, "total_expense": float(-neg_total)}
+            for neg_total, (present, title) in entries
+        ]
+        next_cursor = None
+        if page.limit is not None and len(entries) == page.limit:
+            neg_total, (present, title) = entries[-1]
+            next_cursor = encode_cursor([-neg_total, title if present else None])
+        return data_list, next_cursor
+
+    def _actor_counts(self, db: Session, n: int, most: bool) -> List[Dict[str, Any]]:
+        self._ensure_fresh(db)
+        key = "total_projects" if most else "total_jobs"
+        with self._lock:
+            order = self._name_order
+            if not most:
+                entries = order[:n]
+            else:
+                # Highest counts first, names ascending within a count.
+                entries, stop = [], len(order)
+                while stop > 0 and len(entries) < n and order[stop - 1][0] > 0:
+                    start = bisect_left(order, (order[stop - 1][0],))
+                    entries.extend(order[start:stop][:n - len(entries)])
+                    stop = start
+        return [{"name": name if present else None, key: count} for count, (present, name) in entries]
+
+    def top_actors(self, db: Session, n: int) -> List[Dict[str, Any]]:
+        """Q5: the `n` actor names with the most assignments (at least one)."""
+        return self._actor_counts(db, n, most=True)
+
+    def least_actors(self, db: Session, n: int) -> List[Dict[str, Any]]:
+        """Q6: the `n` actor names with the fewest assignments, zero included."""
+        return self._actor_counts(db, n, most=False)
+
+    # -------------------------------------------------------------
+    # Consistency check
+    # -------------------------------------------------------------
+
+    def check(self, db: Session) -> List[str]:
+        """
+        Compares the current aggregates (without reloading them) with the SQL
+        GROUP BYs they replace. Returns one line per difference.
+        """
+        expected_totals = dict(db.execute(
+            select(Production.title, func.coalesce(func.sum(ProductionExpense.amount), 0))
+            .outerjoin(ProductionExpense, Production.production_id == ProductionExpense.production_id)
+            .group_by(Production.title)
+        ).all())
+        expected_counts = dict(db.execute(
+            select(Personnel.name, func.count(PersonnelAssignment.production_id))
+            .outerjoin(PersonnelAssignment, Personnel.personnel_id == PersonnelAssignment.personnel_id)
+            .where(Personnel.personnel_type.in_(ACTOR_TYPES))
+            .group_by(Personnel.name)
+        ).all())
+        with self._lock:
+            if self._loaded_at is None:
+                return ["aggregates are not loaded"]
+            totals = {title: group.total for title, group in self._title_groups.items()}
+            counts = {name: group.total for name, group in self._name_groups.items()}
+            orders_sorted = self._title_order == sorted(self._title_order) and self._name_order == sorted(self._name_order)
+
+        differences = []
+        for title in sorted(expected_totals.keys() | totals.keys(), key=_name_key):
+            want, have = expected_totals.get(title), totals.get(title)
+            if want is None or have is None or not math.isclose(float(want), float(have), rel_tol=1e-9, abs_tol=1e-6):
+                differences.append(f"expense total of {title!r}: expected {want}, stored {have}")
+        for name in sorted(expected_counts.keys() | counts.keys(), key=_name_key):
+            if expected_counts.get(name) != counts.get(name):
+                differences.append(f"assignment count of {name!r}: expected {expected_counts.get(name)}, stored {counts.get(name)}")
+        if not orders_sorted:
+            differences.append("sorted orders are out of order")
+        return differences
+
+
+# -----------------------------------------------------------------
+# Q4 activity counts per day
+# -----------------------------------------------------------------
+
+BUCKETS = ("day", "week", "month")
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the day / week (Monday) / month bucket containing `day`."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _as_date(value: Any) -> date:
+    # func.date() returns a date on MySQL and an ISO string on SQLite.
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value if type(value) is date else value.date()
+
+
+def daily_activity_counts(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[date, Optional[str], int]]:
+    """(day, taskname, count) of schedule entries by start day, from a GROUP BY on the database."""
+    day = func.date(ProductionSchedule.start_dt)
+    stmt = (
+        select(day, ProductionSchedule.taskname, func.count())
+        .where(ProductionSchedule.start_dt.is_not(None))
+        .group_by(day, ProductionSchedule.taskname)
+    )
+    if start is not None:
+        stmt = stmt.where(ProductionSchedule.start_dt >= start)
+    if end is not None:
+        stmt = stmt.where(ProductionSchedule.start_dt < end + timedelta(days=1))
+    return [(_as_date(d), taskname, count) for d, taskname, count in db.execute(stmt).all()]
+
+
+def activity_series(daily: Iterable[Tuple[date, Optional[str], int]], bucket: str) -> List[Dict[str, Any]]:
+    """
+    Sums daily counts into buckets. Rows are ordered by bucket, then by count
+    (highest first) and task name, like Q4 within each bucket.
+    """
+    totals: Dict[Tuple[date, Optional[str]], int] = {}
+    for day, taskname, count in daily:
+        key = (bucket_start(day, bucket), taskname)
+        totals[key] = totals.get(key, 0) + count
+    return [
+        {"bucket_start": start.isoformat(), "taskname": taskname, "activity_count": count}
+        for (start, taskname), count in sorted(totals.items(), key=lambda kv: (kv[0][0], -kv[1], _name_key(kv[0][1])))
+    ]
+
+
+class ActivityRollup(InMemoryStore):
+    """
+    COUNT(*) of schedule entries per (start day, taskname), kept in a dict per
+    day with the days in a sorted list for range lookups.
+
+    Loads with one GROUP BY and applies committed inserts and deletes of
+    schedule entries; an update (whose old start day is unknown) reloads it.
+    """
+
+    TABLES = frozenset({ProductionSchedule.__tablename__})
+
+    def __init__(self, max_age: float = MAX_AGE):
+        super().__init__(max_age)
+        self._days: Dict[date, Dict[Optional[str], int]] = {}
+        self._order: List[date] = []
+
+    def _read(self, db: Session) -> List[Tuple[date, Optional[str], int]]:
+        return daily_activity_counts(db)
+
+    def _install(self, rows: List[Tuple[date, Optional[str], int]]) -> None:
+        self._days = {}
+        for day, taskname, count in rows:
+            self._days.setdefault(day, {})[taskname] = count
+        self._order = sorted(self._days)
+
+    def _apply_one(self, change: RowChange) -> bool:
+        row = change.row
+        if change.op not in ("insert", "delete") or row is None or not {"start_dt", "taskname"} <= row.keys():
+            return False
+        if row["start_dt"] is None:
+            return True
+        day, taskname = row["start_dt"].date(), row["taskname"]
+        counts = self._days.get(day)
+        if counts is None:
+            counts = self._days[day] = {}
+            insort(self._order, day)
+        counts[taskname] = counts.get(taskname, 0) + (1 if change.op == "insert" else -1)
+        if counts[taskname] <= 0:
+            del counts[taskname]
+            if not counts:
+                del self._days[day]
+                self._order.pop(bisect_left(self._order, day))
+        return True
+
+    def series(self, db: Session, start: date, end: date, bucket: str) -> List[Dict[str, Any]]:
+        """Counts per `bucket` and taskname of the entries starting between `start` and `end`, both inclusive."""
+        self._ensure_fresh(db)
+        with self._lock:
+            days = self._order[bisect_left(self._order, start):bisect_right(self._order, end)]
+            daily = [(day, taskname, count) for day in days for taskname, count in self._days[day].items()]
+        return activity_series(daily, bucket)
+
+    def check(self, db: Session) -> List[str]:
+        """Compares the rollup (without reloading it) with the SQL GROUP BY. Returns one line per difference."""
+        expected = {(day, taskname): count for day, taskname, count in daily_activity_counts(db)}
+        with self._lock:
+            if self._loaded_at is None:
+                return ["activity rollup is not loaded"]
+            stored = {
+                (day, taskname): count for day, counts in self._days.items() for taskname, count in counts.items()
+            }
+            order_ok = self._order == sorted(self._days)
+        differences = [
+            f"activity count of {taskname!r} on {day}: expected {expected.get((day, taskname))}, "
+            f"stored {stored.get((day, taskname))}"
+            for day, taskname in sorted(expected.keys() | stored.keys(), key=lambda k: (k[0], _name_key(k[1])))
+            if expected.get((day, taskname)) != stored.get((day, taskname))
+        ]
+        if not order_ok:
+            differences.append("activity days are out of order")
+        return differences
+
+
+aggregate_store = AggregateStore()
+subscribe(aggregate_store.apply)
+activity_rollup = ActivityRollup()
+subscribe(activity_rollup.apply)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.aggregates", description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("command", choices=["check"])
+    parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        aggregate_store.load(db)
+        activity_rollup.load(db)
+        differences = aggregate_store.check(db) + activity_rollup.check(db)
+    for line in differences:
+        print(f"MISMATCH {line}")
+    print(f"INFO: {len(differences)} difference(s).")
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import inspect
+from typing import Any, Callable
+
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import get_async_db
+
+# =================================================================
+# ASYNC VERSIONS OF THE QUERY ROUTES
+# =================================================================
+# Each sync handler takes `db: Session`. Its async twin takes an AsyncSession
+# and runs the unchanged handler body through `AsyncSession.run_sync`, which
+# drives the async driver (aiomysql / aiosqlite) from the event loop. No
+# threadpool worker is held while a query waits on the database, and the
+# query logic stays defined in exactly one place.
+
+
+def as_async_endpoint(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a sync `(db: Session, ...)` handler into an `async (db: AsyncSession, ...)` one."""
+    signature = inspect.signature(endpoint)
+
+    async def async_endpoint(**kwargs: Any) -> Any:
+        db: AsyncSession = kwargs.pop("db")
+        return await db.run_sync(lambda session: endpoint(db=session, **kwargs))
+
+    async_endpoint.__signature__ = signature.replace(parameters=[
+        param.replace(default=Depends(get_async_db), annotation=AsyncSession) if name == "db" else param
+        for name, param in signature.parameters.items()
+    ])
+    async_endpoint.__name__ = endpoint.__name__
+    async_endpoint.__qualname__ = endpoint.__qualname__
+    async_endpoint.__doc__ = endpoint.__doc__
+    return async_endpoint
+
+
+def as_async_router(router: APIRouter) -> APIRouter:
+    """Returns a copy of `router` whose database-backed routes run on the event loop."""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+        endpoint = route.endpoint
+        if "db" in inspect.signature(endpoint).parameters and not inspect.iscoroutinefunction(endpoint):
+            endpoint = as_async_endpoint(endpoint)
+        async_router.add_api_route(
+            route.path,
+            endpoint,
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            summary=route.summary,
+            description=route.description,
+            name=route.name,
+        )
+    return async_router
@@ -0,0 +1,240 @@
+"""
+In-memory availability index behind Q2 (`GET /personnel/available`).
+
+    python -m app.availability check    # compare a fresh load with the SQL anti-join
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .events import RowChange, subscribe
+from .intervals import merge_intervals, naive, overlaps
+from .models import Personnel, ProductionSchedule
+from .stores import InMemoryStore
+
+# Seconds before the index is reloaded even without local writes (see app.stores).
+MAX_AGE = float(os.getenv("AVAILABILITY_INDEX_MAX_AGE", "60"))
+
+
+class AvailabilityIndex(InMemoryStore):
+    """
+    In-memory view of `productionschedule` answering "who is free in [start, end)?"
+    without a database round trip.
+
+    Each personnel's schedule rows are merged into sorted, disjoint busy intervals,
+    so a single overlap check is a bisect (O(log n)).
+    """
+
+    TABLES = frozenset({ProductionSchedule.__tablename__, Personnel.__tablename__})
+
+    def __init__(self, max_age: float = MAX_AGE):
+        super().__init__(max_age)
+        # personnel_id -> (name, personnel_type), kept in personnel_id order
+        self._personnel: Dict[int, Tuple[str, str]] = {}
+        # prod_schedule_id -> (personnel_id, start_dt, end_dt)
+        self._schedules: Dict[int, Tuple[int, datetime, datetime]] = {}
+        # personnel_id -> {prod_schedule_id: (start_dt, end_dt)}
+        self._raw: Dict[int, Dict[int, Tuple[datetime, datetime]]] = {}
+        # personnel_id -> merged (starts, ends)
+        self._busy: Dict[int, Tuple[List[datetime], List[datetime]]] = {}
+
+    # -------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------
+
+    def _read(self, db: Session) -> Tuple[Dict, Dict, Dict, Dict]:
+        personnel_rows = db.execute(
+            select(Personnel.personnel_id, Personnel.name, Personnel.personnel_type)
+            .order_by(Personnel.personnel_id)
+        ).all()
+        schedule_rows = db.execute(
+            select(
+                ProductionSchedule.prod_schedule_id,
+                ProductionSchedule.personnel_id,
+                ProductionSchedule.start_dt,
+                ProductionSchedule.end_dt
+            )
+        ).all()
+
+        personnel = {r.personnel_id: (r.name, r.personnel_type) for r in personnel_rows}
+        schedules = {}
+        raw: Dict[int, Dict[int, Tuple[datetime, datetime]]] = {}
+        for r in schedule_rows:
+            schedules[r.prod_schedule_id] = (r.personnel_id, r.start_dt, r.end_dt)
+            raw.setdefault(r.personnel_id, {})[r.prod_schedule_id] = (r.start_dt, r.end_dt)
+        busy = {pid: merge_intervals(intervals.values()) for pid, intervals in raw.items()}
+        return personnel, schedules, raw, busy
+
+    def _install(self, state: Tuple[Dict, Dict, Dict, Dict]) -> None:
+        self._personnel, self._schedules, self._raw, self._busy = state
+
+    # -------------------------------------------------------------
+    # Incremental maintenance
+    # -------------------------------------------------------------
+
+    def _apply_changes(self, changes: Iterable[RowChange]) -> bool:
+        touched = set()
+        for change in changes:
+            if change.table == ProductionSchedule.__tablename__:
+                if not self._apply_schedule(change, touched):
+                    return False
+            elif change.table == Personnel.__tablename__:
+                if not self._apply_personnel(change):
+                    return False
+        for pid in touched:
+            intervals = self._raw.get(pid)
+            if intervals:
+                self._busy[pid] = merge_intervals(intervals.values())
+            else:
+                self._raw.pop(pid, None)
+                self._busy.pop(pid, None)
+        return True
+
+    def _apply_schedule(self, change: RowChange, touched: set) -> bool:
+        row = change.row
+        if row is None or row.get("prod_schedule_id") is None:
+            return False
+        schedule_id = row["prod_schedule_id"]
+
+        previous = self._schedules.pop(schedule_id, None)
+        if previous is not None:
+            self._raw.get(previous[0], {}).pop(schedule_id, None)
+            touched.add(previous[0])
+        if change.op == "delete":
+            return True
+
+        if not {"personnel_id", "start_dt", "end_dt"} <= row.keys():
+            return False
+        pid = row["personnel_id"]
+        self._schedules[schedule_id] = (pid, row["start_dt"], row["end_dt"])
+        self._raw.setdefault(pid, {})[schedule_id] = (row["start_dt"], row["end_dt"])
+        touched.add(pid)
+        return True
+
+    def _apply_personnel(self, change: RowChange) -> bool:
+        row = change.row
+        if row is None or row.get("personnel_id") is None:
+            return False
+        pid = row["personnel_id"]
+        if change.op == "delete":
+            self._personnel.pop(pid, None)
+            return True
+        if not {"name", "personnel_type"} <= row.keys():
+            return False
+        self._personnel[pid] = (row["name"], row["personnel_type"])
+        if change.op == "insert":
+            self._personnel = dict(sorted(self._personnel.items()))
+        return True
+
+    # -------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------
+
+    def available(
+        self,
+        db: Session,
+        start_dt: datetime,
+        end_dt: datetime,
+        personnel_types: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Same result as the SQL anti-join in `get_available_personnel`: personnel of
+        the given types with no schedule overlapping [start_dt, end_dt).
+        """
+        self._ensure_fresh(db)
+        return self._free(naive(start_dt), naive(end_dt), set(personnel_types))
+
+    def _free(self, start_dt: datetime, end_dt: datetime, wanted: set) -> List[Dict[str, Any]]:
+        empty = ([], [])
+        with self._lock:
+            return [
+                {"personnel_id": pid, "name": name, "personnel_type": ptype}
+                for pid, (name, ptype) in self._personnel.items()
+                if ptype in wanted
+                and not overlaps(*self._busy.get(pid, empty), start_dt, end_dt)
+            ]
+
+    def check(self, db: Session, probes: int = 200) -> List[str]:
+        """
+        Compares the index (without reloading it) with the database: the stored
+        personnel and schedule rows, and the Q2 answer for windows around the
+        first `probes` schedule entries (the entry itself and the hours just
+        before and after it, which only touch it). Returns one line per difference.
+        """
+        personnel = {
+            r.personnel_id: (r.name, r.personnel_type)
+            for r in db.execute(select(Personnel.personnel_id, Personnel.name, Personnel.personnel_type))
+        }
+        schedules = {
+            r.prod_schedule_id: (r.personnel_id, r.start_dt, r.end_dt)
+            for r in db.execute(select(
+                ProductionSchedule.prod_schedule_id, ProductionSchedule.personnel_id,
+                ProductionSchedule.start_dt, ProductionSchedule.end_dt
+            ))
+        }
+        with self._lock:
+            if self._loaded_at is None:
+                return ["availability index is not loaded"]
+            differences = [
+                f"personnel {pid}: expected {personnel.get(pid)}, stored {self._personnel.get(pid)}"
+                for pid in sorted(personnel.keys() | self._personnel.keys())
+                if personnel.get(pid) != self._personnel.get(pid)
+            ] + [
+                f"schedule {sid}: expected {schedules.get(sid)}, stored {self._schedules.get(sid)}"
+                for sid in sorted(schedules.keys() | self._schedules.keys())
+                if schedules.get(sid) != self._schedules.get(sid)
+            ]
+
+        types = {ptype for _, ptype in personnel.values()}
+        hour = timedelta(hours=1)
+        entries = sorted(
+            ((start, end, sid) for sid, (_, start, end) in schedules.items() if start is not None and end is not None)
+        )[:probes]
+        windows = sorted({
+            window for start, end, _ in entries
+            for window in ((start, end), (end, end + hour), (start - hour, start))
+            if window[0] < window[1]
+        })
+        for start, end in windows:
+            busy = set(db.execute(
+                select(ProductionSchedule.personnel_id)
+                .where(ProductionSchedule.start_dt < end, ProductionSchedule.end_dt > start)
+            ).scalars())
+            expected = sorted(pid for pid, (_, ptype) in personnel.items() if ptype in types and pid not in busy)
+            stored = [r["personnel_id"] for r in self._free(start, end, types)]
+            if expected != stored:
+                differences.append(
+                    f"free personnel in [{start}, {end}): expected {len(expected)}, index {len(stored)}, "
+                    f"differing ids {sorted(set(expected) ^ set(stored))[:10]}"
+                )
+        return differences
+
+
+availability_index = AvailabilityIndex()
+subscribe(availability_index.apply)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.availability", description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--probes", type=int, default=200, help="Schedule entries to probe windows around.")
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        availability_index.load(db)
+        differences = availability_index.check(db, args.probes)
+    for line in differences:
+        print(f"MISMATCH {line}")
+    print(f"INFO: {len(differences)} difference(s).")
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
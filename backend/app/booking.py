@@ -0,0 +1,149 @@
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .database import use_primary
+from .intervals import naive, overlapping_pairs
+from .models import Personnel, Production, ProductionSchedule, RentalPlace, RentalUsage
+from .schemas import BookingBatchRequest
+
+# =================================================================
+# CONFLICT-AWARE BATCH BOOKING
+# =================================================================
+# A batch of proposed schedule entries (busy periods of a person) and rental
+# bookings (busy periods of a place) is checked against the existing rows and
+# against itself in one sweep-line pass, with the same half-open overlap rule
+# the read side uses. Entries without conflicts are committed together.
+#
+# The personnel and place rows involved are locked (SELECT ... FOR UPDATE on
+# MySQL) before the existing intervals are read, so two concurrent batches
+# for the same resources cannot both pass the check.
+
+# kind -> (model, primary key, resource column, start column, end column, resource key)
+_KINDS = {
+    "schedule": (
+        ProductionSchedule, ProductionSchedule.prod_schedule_id, ProductionSchedule.personnel_id,
+        ProductionSchedule.start_dt, ProductionSchedule.end_dt, Personnel.personnel_id
+    ),
+    "rental": (
+        RentalUsage, RentalUsage.usage_id, RentalUsage.place_id,
+        RentalUsage.start_time, RentalUsage.end_time, RentalPlace.place_id
+    ),
+}
+
+
+def _existing_keys(db: Session, column: Any, values: set, lock: bool = False) -> set:
+    if not values:
+        return set()
+    stmt = select(column).where(column.in_(sorted(values)))
+    if lock:
+        stmt = stmt.with_for_update()
+    return set(db.execute(stmt).scalars())
+
+
+def book(db: Session, request: BookingBatchRequest) -> Dict[str, Any]:
+    """
+    Creates the conflict-free entries of `request` in one transaction and
+    reports, per entry, whether it was created and what it conflicts with.
+    With `all_or_nothing`, a single rejected entry rolls the whole batch back.
+    """
+    use_primary(db)
+    proposals: List[Tuple[str, Dict[str, Any]]] = (
+        [("schedule", p.model_dump()) for p in request.schedules]
+        + [("rental", p.model_dump()) for p in request.rentals]
+    )
+    results = [
+        {"kind": kind, "index": index, "status": "created", "id": None, "errors": [], "conflicts": []}
+        for kind, entries in (("schedule", request.schedules), ("rental", request.rentals))
+        for index in range(len(entries))
+    ]
+    for _, values in proposals:
+        for column in ("start_dt", "end_dt", "start_time", "end_time"):
+            if column in values:
+                values[column] = naive(values[column])
+
+    # 1. Lock the people and places involved and check every reference.
+    productions = _existing_keys(db, Production.production_id, {v["production_id"] for _, v in proposals})
+    intervals: List[Tuple[Any, Any, Any]] = []
+    owners: List[Any] = []
+    for kind, (model, pk, resource_col, start_col, end_col, resource_key) in _KINDS.items():
+        mine = [(pos, values) for pos, (k, values) in enumerate(proposals) if k == kind]
+        if not mine:
+            continue
+        resources = _existing_keys(db, resource_key, {v[resource_col.key] for _, v in mine}, lock=True)
+        for pos, values in mine:
+            if values[resource_col.key] not in resources:
+                results[pos]["errors"].append(
+                    f"{resource_col.key}: no {resource_key.class_.__tablename__} with id {values[resource_col.key]}")
+            if values["production_id"] not in productions:
+                results[pos]["errors"].append(f"production_id: no production with id {values['production_id']}")
+
+        # 2. Existing busy periods of those resources within the batch's span.
+        valid = [(pos, values) for pos, values in mine if not results[pos]["errors"]]
+        if not valid:
+            continue
+        span_start = min(values[start_col.key] for _, values in valid)
+        span_end = max(values[end_col.key] for _, values in valid)
+        existing = db.execute(
+            select(pk, resource_col, start_col, end_col)
+            .where(
+                resource_col.in_(sorted({values[resource_col.key] for _, values in valid})),
+                start_col < span_end,
+                end_col > span_start
+            )
+        ).all()
+        for row_id, resource, start, end in existing:
+            intervals.append(((kind, resource), start, end))
+            owners.append(("existing", kind, row_id, start, end))
+        for pos, values in valid:
+            intervals.append(((kind, values[resource_col.key]), values[start_col.key], values[end_col.key]))
+            owners.append(("batch", pos))
+
+    # 3. One sweep over everything finds every overlapping pair.
+    for a, b in overlapping_pairs(intervals):
+        first, second = owners[a], owners[b]
+        if first[0] == "existing" and second[0] == "existing":
+            continue
+        for mine, other in ((first, second), (second, first)):
+            if mine[0] != "batch":
+                continue
+            if other[0] == "existing":
+                _, kind, row_id, start, end = other
+                conflict = {"with": "existing", "kind": kind, "id": row_id, "start": start, "end": end}
+            else:
+                conflict = {"with": "batch", "kind": results[other[1]]["kind"], "index": results[other[1]]["index"]}
+            results[mine[1]]["conflicts"].append(conflict)
+
+    for result in results:
+        if result["errors"]:
+            result["status"] = "invalid"
+        elif result["conflicts"]:
+            result["status"] = "conflict"
+    accepted = [pos for pos, result in enumerate(results) if result["status"] == "created"]
+    rejected = len(results) - len(accepted)
+
+    if request.all_or_nothing and rejected:
+        db.rollback()
+        for pos in accepted:
+            results[pos]["status"] = "not_committed"
+        return {"committed": False, "created": 0, "rejected": rejected, "results": results}
+
+    # 4. Ids continue from the current maximum, read with FOR UPDATE so that a
+    # concurrent batch waits for this one to commit before taking its own.
+    next_ids = {
+        kind: (db.execute(select(func.max(pk)).with_for_update()).scalar() or 0) + 1
+        for kind, (_, pk, *_) in _KINDS.items()
+        if any(proposals[pos][0] == kind for pos in accepted)
+    }
+    objects = []
+    for pos in accepted:
+        kind, values = proposals[pos]
+        model, pk = _KINDS[kind][:2]
+        row_id = next_ids[kind]
+        next_ids[kind] += 1
+        objects.append(model(**{pk.key: row_id}, **values))
+        results[pos]["id"] = row_id
+    db.add_all(objects)
+    db.commit()
+    return {"committed": True, "created": len(accepted), "rejected": rejected, "results": results}
@@ -0,0 +1,401 @@
+"""
+Bulk import and export of personnel, productions, schedules and rental usages.
+
+Import files are CSV (with a header row), NDJSON (one object per line) or
+Parquet. Rows are validated one by one; the valid rows of each chunk are
+written with a single executemany INSERT (multi-row on MySQL) in their own
+transaction, and the invalid ones are reported with their row number:
+
+    python -m app.bulk import schedules season.csv [--batch-size 5000]
+    python -m app.bulk export schedules --format ndjson > schedules.ndjson
+
+The same operations are served under /bulk (see routers/bulk.py).
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Date, DateTime, Integer, Numeric, Table, select
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal, use_primary
+from .events import record_bulk_write
+from .models import Personnel, Production, ProductionSchedule, RentalUsage
+from .query import STREAM_BATCH_SIZE
+from .responses import dumps
+from .schemas import PersonnelRecord, ProductionRecord, RentalUsageRecord, ScheduleRecord
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # pragma: no cover - Parquet support is optional
+    pyarrow = parquet = None
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_BATCH_SIZE = 10000
+
+# Only the first errors are reported; the counts always cover every row.
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ("csv", "ndjson", "parquet")
+
+EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson", ".parquet": "parquet"}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# URL / CLI name -> (model, row schema)
+TABLES: Dict[str, Tuple[Any, Type[BaseModel]]] = {
+    "personnel": (Personnel, PersonnelRecord),
+    "productions": (Production, ProductionRecord),
+    "schedules": (ProductionSchedule, ScheduleRecord),
+    "rental-usages": (RentalUsage, RentalUsageRecord),
+}
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+class UnreadableFile(ValueError):
+    """The upload is not a file of the given format (bad encoding, broken CSV quoting, not Parquet)."""
+
+
+class _BadLine:
+    """Stands in for a record the parser could not read, so it is reported like a validation error."""
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+def check_format(file_format: str) -> None:
+    """Raises `UnsupportedFormat` unless `file_format` can be read and written here."""
+    if file_format not in FORMATS:
+        raise UnsupportedFormat(f"unknown format {file_format!r}; expected one of {', '.join(FORMATS)}")
+    if file_format == "parquet" and parquet is None:
+        raise UnsupportedFormat("Parquet files need the optional 'pyarrow' package")
+
+
+# -----------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------
+
+def read_records(stream: BinaryIO, file_format: str) -> Iterator[Any]:
+    """
+    Yields the rows of an import file as dicts (or `_BadLine` for unreadable ones).
+    Raises `UnreadableFile` when the file as a whole cannot be read any further.
+    """
+    check_format(file_format)
+    if file_format == "csv":
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        try:
+            for row in csv.DictReader(text):
+                # An empty CSV field is NULL; a short row leaves its missing fields as None too.
+                yield {k: (v if v != "" else None) for k, v in row.items() if k is not None}
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise UnreadableFile(f"not a readable UTF-8 CSV file: {exc}") from None
+    elif file_format == "ndjson":
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield _BadLine(f"invalid JSON: {exc}")
+                continue
+            yield record if isinstance(record, dict) else _BadLine("expected a JSON object")
+    else:
+        try:
+            for batch in parquet.ParquetFile(stream).iter_batches(batch_size=STREAM_BATCH_SIZE):
+                yield from batch.to_pylist()
+        except pyarrow.ArrowException as exc:
+            raise UnreadableFile(f"not a readable Parquet file: {exc}") from None
+
+
+# -----------------------------------------------------------------
+# Importing
+# -----------------------------------------------------------------
+
+def _existing(db: Session, column: Any, values: Iterable[Any]) -> set:
+    values = sorted(set(values))
+    if not values:
+        return set()
+    return set(db.execute(select(column).where(column.in_(values))).scalars())
+
+
+def _foreign_keys(table: Table) -> List[Tuple[str, Any]]:
+    """(column name, referenced column) of every foreign key of `table`."""
+    return [(column.name, fk.column) for column in table.columns for fk in column.foreign_keys]
+
+
+class _Import:
+    """Counters and error list of one import run."""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.chunks = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def reject(self, row: int, errors: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "errors": errors})
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "errors": sorted(self.errors, key=lambda e: e["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _validate(schema: Type[BaseModel], row: int, record: Any, run: _Import) -> Optional[Dict[str, Any]]:
+    if isinstance(record, _BadLine):
+        run.reject(row, [record.message])
+        return None
+    try:
+        return schema.model_validate(record).model_dump()
+    except ValidationError as exc:
+        run.reject(row, [
+            f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in exc.errors()
+        ])
+        return None
+
+
+def _insert_chunk(db: Session, table: Table, numbered: List[Tuple[int, Dict[str, Any]]], run: _Import) -> None:
+    """Checks keys against the database, then inserts the chunk's valid rows in one transaction."""
+    (pk,) = table.primary_key.columns
+    taken = _existing(db, pk, (values[pk.name] for _, values in numbered))
+    missing = {}
+    for name, target in _foreign_keys(table):
+        wanted = {values[name] for _, values in numbered if values[name] is not None}
+        missing[name] = (target.table.name, wanted - _existing(db, target, wanted))
+
+    rows: List[Tuple[int, Dict[str, Any]]] = []
+    seen = set()
+    for row, values in numbered:
+        errors = []
+        key = values[pk.name]
+        if key in taken or key in seen:
+            errors.append(f"{pk.name}: {key} already exists")
+        for name, (target_table, absent) in missing.items():
+            if values[name] in absent:
+                errors.append(f"{name}: no {target_table} with id {values[name]}")
+        if errors:
+            run.reject(row, errors)
+        else:
+            seen.add(key)
+            rows.append((row, values))
+    if not rows:
+        return
+
+    try:
+        db.connection().execute(table.insert(), [values for _, values in rows])
+        record_bulk_write(db, table.name)
+        db.commit()
+        run.inserted += len(rows)
+        return
+    except (IntegrityError, DataError):
+        db.rollback()
+
+    # Something the checks above cannot see (e.g. a concurrent insert of the
+    # same key, or a value MySQL's strict mode rejects as out of range or too
+    # long): retry row by row, so only the offending rows are rejected.
+    for row, values in rows:
+        try:
+            with db.begin_nested():
+                db.connection().execute(table.insert(), values)
+            run.inserted += 1
+        except (IntegrityError, DataError) as exc:
+            run.reject(row, [f"rejected by the database: {exc.orig}"])
+    record_bulk_write(db, table.name)
+    db.commit()
+
+
+def import_records(
+    db: Session,
+    table: str,
+    records: Iterable[Any],
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """
+    Validates and inserts `records` into `table` (a key of `TABLES`) in chunks
+    of `batch_size`, one transaction per chunk. Returns the counts and the
+    per-row errors (rows are numbered from 1, not counting a CSV header).
+    """
+    model, schema = TABLES[table]
+    sa_table = model.__table__
+    run = _Import(table)
+    # The duplicate and foreign key checks must see the primary's current rows.
+    use_primary(db)
+    numbered_records = enumerate(records, start=1)
+    while True:
+        try:
+            chunk = list(islice(numbered_records, batch_size))
+        except UnreadableFile as exc:
+            raise UnreadableFile(
+                f"{exc} (after row {run.received}; {run.inserted} row(s) of the earlier chunks were imported)"
+            ) from None
+        if not chunk:
+            break
+        run.received += len(chunk)
+        run.chunks += 1
+        valid = [(row, values) for row, record in chunk if (values := _validate(schema, row, record, run)) is not None]
+        if valid:
+            _insert_chunk(db, sa_table, valid, run)
+    return run.report()
+
+
+def import_file(
+    db: Session,
+    stream: BinaryIO,
+    table: str,
+    file_format: str,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """`import_records` over a CSV / NDJSON / Parquet file."""
+    return import_records(db, table, read_records(stream, file_format), batch_size)
+
+
+# -----------------------------------------------------------------
+# Exporting
+# -----------------------------------------------------------------
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def export_chunks(table: str, file_format: str) -> Iterator[bytes]:
+    """
+    Yields the whole table, ordered by primary key, as CSV / NDJSON / Parquet
+    bytes while the rows come off the cursor. Opens its own session, so it can
+    back a StreamingResponse.
+    """
+    check_format(file_format)
+    model, _ = TABLES[table]
+    sa_table = model.__table__
+    key = [c.name for c in sa_table.columns]
+    stmt = select(*sa_table.columns).order_by(*sa_table.primary_key.columns)
+
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        if file_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator="\n")
+            writer.writerow(key)
+            for partition in result.partitions():
+                writer.writerows([_csv_value(v) for v in row] for row in partition)
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+        elif file_format == "ndjson":
+            for partition in result.partitions():
+                yield b"".join(dumps(dict(zip(key, row))) + b"\n" for row in partition)
+        else:
+            schema = _arrow_schema(sa_table)
+            sink = io.BytesIO()
+            with parquet.ParquetWriter(sink, schema) as writer:
+                for partition in result.partitions():
+                    writer.write_table(pyarrow.Table.from_arrays(
+                        [_arrow_array(values, field) for values, field in zip(zip(*partition), schema)],
+                        schema=schema
+                    ))
+                    yield sink.getvalue()
+                    sink.seek(0)
+                    sink.truncate()
+            yield sink.getvalue()
+
+
+def _arrow_schema(table: Table) -> Any:
+    types = []
+    for column in table.columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pyarrow.int64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pyarrow.timestamp("us")
+        elif isinstance(column.type, Date):
+            arrow_type = pyarrow.date32()
+        elif isinstance(column.type, Numeric):
+            arrow_type = pyarrow.float64()
+        else:
+            arrow_type = pyarrow.string()
+        types.append(pyarrow.field(column.name, arrow_type))
+    return pyarrow.schema(types)
+
+
+def _arrow_array(values: Iterable[Any], field: Any) -> Any:
+    if field.type == pyarrow.float64():
+        values = [None if v is None else float(v) for v in values]
+    return pyarrow.array(list(values), type=field.type)
+
+
+# -----------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------
+
+def _format_of(path: str, given: Optional[str]) -> str:
+    file_format = given or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise UnsupportedFormat(f"cannot tell the format of {path!r}; pass --format")
+    return file_format
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bulk", description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("path", nargs="?", help="File to import (export writes to stdout).")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension on import, ndjson on export.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--batch-size must be between 1 and {MAX_BATCH_SIZE}")
+
+    if args.command == "export":
+        out = sys.stdout.buffer
+        for chunk in export_chunks(args.table, args.format or "ndjson"):
+            out.write(chunk)
+        out.flush()
+        return 0
+
+    if not args.path:
+        parser.error("import needs a file path")
+    try:
+        with open(args.path, "rb") as stream, SessionLocal() as db:
+            report = import_file(db, stream, args.table, _format_of(args.path, args.format), args.batch_size)
+    except (UnsupportedFormat, UnreadableFile) as exc:
+        print(f"ERROR: {exc}", file=sys.stderr)
+        return 2
+    for error in report["errors"]:
+        print(f"row {error['row']}: {'; '.join(error['errors'])}", file=sys.stderr)
+    print(f"INFO: {report['inserted']} of {report['received']} row(s) imported into {args.table}, "
+          f"{report['failed']} rejected, in {report['chunks']} chunk(s).")
+    return 0 if not report["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .events import RowChange, subscribe
+from .pagination import PageParams
+from .responses import APIJSONResponse, response_format, with_format_headers
+
+# =================================================================
+# RESULT CACHE WITH TABLE-LEVEL INVALIDATION
+# =================================================================
+# Cached results are keyed by endpoint, normalized parameters and the current
+# "version" of every table the endpoint reads. A committed write bumps the
+# versions of the tables it touched, so every dependent entry stops matching
+# at once and simply ages out of the backend. Entries hold the rendered JSON
+# body, so a hit skips serialization as well as the query.
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class MemoryBackend:
+    """In-process LRU with a per-entry time to live."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def versions(self, tables: Iterable[str]) -> List[int]:
+        with self._lock:
+            return [self._versions.get(t, 0) for t in tables]
+
+    def bump(self, tables: Iterable[str]) -> None:
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisBackend:
+    """
+    Shared cache for several worker processes. Table versions live in Redis too,
+    so a write in one process invalidates the entries every process reads.
+    Requires the optional `redis` package.
+
+    The keys written are also recorded in a sorted set, scored by their expiry
+    time, so `size` and `clear` never walk the keyspace with KEYS (O(all keys),
+    blocking Redis while it runs).
+    """
+
+    name = "redis"
+    evictions = 0
+    # Keys deleted per DEL in `clear`.
+    CLEAR_BATCH = 500
+
+    def __init__(self, url: str = REDIS_URL, ttl: float = CACHE_TTL, prefix: str = "agency:cache:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self._index = prefix + "index"
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._redis.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes) -> None:
+        ttl = max(1, int(self.ttl))
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.set(self.prefix + key, value, ex=ttl)
+        pipe.zadd(self._index, {self.prefix + key: time.time() + ttl})
+        pipe.execute()
+
+    def versions(self, tables: Iterable[str]) -> List[int]:
+        raw = self._redis.mget([f"{self.prefix}v:{t}" for t in tables])
+        return [int(v) if v is not None else 0 for v in raw]
+
+    def bump(self, tables: Iterable[str]) -> None:
+        pipe = self._redis.pipeline()
+        for t in tables:
+            pipe.incr(f"{self.prefix}v:{t}")
+        pipe.execute()
+
+    def size(self) -> int:
+        # Entries Redis evicted under memory pressure are counted until their TTL would have run out.
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(self._index, "-inf", time.time())
+        pipe.zcard(self._index)
+        return pipe.execute()[1]
+
+    def clear(self) -> None:
+        while True:
+            keys = self._redis.zrange(self._index, 0, self.CLEAR_BATCH - 1)
+            if not keys:
+                break
+            pipe = self._redis.pipeline(transaction=False)
+            pipe.delete(*keys)
+            pipe.zrem(self._index, *keys)
+            pipe.execute()
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, PageParams):
+        return [value.limit, value.cursor, value.stream]
+    if isinstance(value, (list, tuple, set)):
+        # List parameters are IN filters, so their order does not matter.
+        return sorted(_normalize(v) for v in value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class ResultCache:
+    """Caches endpoint results and counts hits and misses so the cache can be sized."""
+
+    def __init__(self, backend: Optional[Any]):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, *models: Any) -> Callable:
+        """
+        Decorates a route handler whose result depends only on its query parameters
+        and on the tables of `models`. Only `APIJSONResponse` results are stored;
+        anything else (e.g. NDJSON streams) is passed through uncached.
+        """
+        tables = sorted(m.__tablename__ for m in models)
+
+        def decorator(handler: Callable) -> Callable:
+            @functools.wraps(handler)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                if self.backend is None:
+                    return handler(*args, **kwargs)
+                params = {k: _normalize(v) for k, v in sorted(kwargs.items()) if k != "db"}
+                key = json.dumps(
+                    [handler.__module__, handler.__name__, params, response_format(), self.backend.versions(tables)],
+                    separators=(",", ":"), default=str
+                )
+                body = self.backend.get(key)
+                if body is not None:
+                    self.hits += 1
+                    return with_format_headers(APIJSONResponse.from_body(body))
+                self.misses += 1
+                response = handler(*args, **kwargs)
+                if isinstance(response, APIJSONResponse):
+                    self.backend.set(key, response.body)
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, changes: List[RowChange]) -> None:
+        if self.backend is not None:
+            self.backend.bump({c.table for c in changes})
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name if self.backend is not None else "off",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": self.backend.size() if self.backend is not None else 0,
+            "evictions": self.backend.evictions if self.backend is not None else 0,
+        }
+
+
+def _backend_from_env() -> Optional[Any]:
+    if CACHE_BACKEND == "redis":
+        return RedisBackend()
+    if CACHE_BACKEND in ("off", "none", "false", "0"):
+        return None
+    return MemoryBackend()
+
+
+result_cache = ResultCache(_backend_from_env())
+subscribe(result_cache.invalidate)
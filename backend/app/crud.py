@@ -1,37 +1,196 @@
+"""
+Generic create / read / update / delete of personnel, productions and rental
+places, served under /entities (see routers/entities.py).
+
+Every operation is a fixed number of statements whatever the batch size, and
+no row is loaded into the session before it is changed:
+
+  * create  - one executemany INSERT (multi-row on MySQL);
+  * update  - one executemany `UPDATE ... WHERE pk = ?` per set of changed columns;
+  * delete  - one `DELETE ... WHERE pk IN (...)`.
+
+A batch is validated as a whole and written in one transaction, so it is
+applied completely or not at all.
+"""
+
+from typing import Any, Dict, List, Tuple, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Column, Table, bindparam, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from . import models, schemas
+
+from .database import use_primary
+from .events import record_bulk_write
+from .models import Personnel, Production, RentalPlace
+from .pagination import Keyset
+from .schemas import (
+    PersonnelRecord, PersonnelUpdate, ProductionRecord, ProductionUpdate,
+    RentalPlaceRecord, RentalPlaceUpdate
+)
+
+MAX_CRUD_BATCH = 1000
+
+# URL name -> (model, row schema for inserts, row schema for updates)
+ENTITIES: Dict[str, Tuple[Any, Type[BaseModel], Type[BaseModel]]] = {
+    "personnel": (Personnel, PersonnelRecord, PersonnelUpdate),
+    "productions": (Production, ProductionRecord, ProductionUpdate),
+    "rental-places": (RentalPlace, RentalPlaceRecord, RentalPlaceUpdate),
+}
+
+
+class _Statements:
+    """The statements of one entity, built once per process with their values as bound parameters."""
+
+    def __init__(self, model: Any):
+        table: Table = model.__table__
+        (pk,) = table.primary_key.columns
+        self.table = table
+        self.pk: Column = pk
+        self.select = select(*table.columns)
+        self.keyset = Keyset((pk, pk.name, False))
+        self.get = self.select.where(pk == bindparam("key"))
+        self.insert = table.insert()
+        # The SET clause is taken from the parameter names of each execution.
+        self.update = table.update().where(pk == bindparam("_key"))
+        self.delete = table.delete().where(pk.in_(bindparam("keys", expanding=True)))
+
+
+STATEMENTS: Dict[str, _Statements] = {name: _Statements(model) for name, (model, _, _) in ENTITIES.items()}
+
+
+def _validate(schema: Type[BaseModel], rows: List[Dict[str, Any]], exclude_unset: bool) -> List[Dict[str, Any]]:
+    """Validates every row, raising a 422 listing each invalid row by position (from 0)."""
+    if len(rows) > MAX_CRUD_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_CRUD_BATCH} rows per request.")
+    valid: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append(schema.model_validate(row).model_dump(exclude_unset=exclude_unset))
+        except ValidationError as exc:
+            errors.append({"index": index, "errors": [
+                f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in exc.errors()
+            ]})
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+    return valid
+
+
+def _check_unique(statements: _Statements, rows: List[Dict[str, Any]]) -> None:
+    seen = set()
+    for index, values in enumerate(rows):
+        key = values[statements.pk.name]
+        if key in seen:
+            raise HTTPException(status_code=422, detail=[
+                {"index": index, "errors": [f"{statements.pk.name}: {key} appears more than once"]}
+            ])
+        seen.add(key)
+
+
+def _commit(db: Session, statements: _Statements) -> None:
+    record_bulk_write(db, statements.table.name)
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"rejected by the database: {exc.orig}") from None
+
+
+def _write(db: Session, stmt: Any, params: Any) -> int:
+    try:
+        return db.connection().execute(stmt, params).rowcount
+    except IntegrityError as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=f"rejected by the database: {exc.orig}") from None
+
+
+# -----------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------
+
+def get_row(db: Session, entity: str, key: int) -> Dict[str, Any]:
+    """The row with primary key `key`, or a 404."""
+    row = db.execute(STATEMENTS[entity].get, {"key": key}).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"No {entity} row with id {key}.")
+    return dict(row._mapping)
+
+
+# -----------------------------------------------------------------
+# Writing
+# -----------------------------------------------------------------
+
+def create_rows(db: Session, entity: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Inserts `rows` with one INSERT. Duplicate or unknown keys reject the whole batch with a 409."""
+    _, create_schema, _ = ENTITIES[entity]
+    statements = STATEMENTS[entity]
+    values = _validate(create_schema, rows, exclude_unset=False)
+    _check_unique(statements, values)
+    if values:
+        use_primary(db)
+        _write(db, statements.insert, values)
+        _commit(db, statements)
+    return {"entity": entity, "received": len(rows), "created": len(values)}
 
 
-def get_items(db: Session):
-    return db.query(models.Item).all()
+def update_rows(db: Session, entity: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Applies the changed columns of each row with `UPDATE ... WHERE pk = :key`,
+    one executemany per distinct set of changed columns. `updated` counts the
+    rows found, so ids that do not exist are the difference to `received`.
+    """
+    _, _, update_schema = ENTITIES[entity]
+    statements = STATEMENTS[entity]
+    pk = statements.pk.name
+    values = _validate(update_schema, rows, exclude_unset=True)
+    _check_unique(statements, values)
 
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for changes in values:
+        key = changes.pop(pk)
+        if changes:
+            groups.setdefault(tuple(sorted(changes)), []).append({"_key": key, **changes})
 
-def create_item(db: Session, item: schemas.ItemCreate):
-    db_item = models.Item(name=item.name, description=item.description)
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item
+    updated = 0
+    if groups:
+        use_primary(db)
+        for params in groups.values():
+            updated += _write(db, statements.update, params)
+        _commit(db, statements)
+    return {"entity": entity, "received": len(rows), "updated": updated}
 
 
-def update_item(db: Session, id: int, item: schemas.ItemCreate):
-    db_item = db.query(models.Item).filter(models.Item.id == id).first()
-    if not db_item:
-        return None
-    db_item.name = item.name
-    db_item.description = item.description
-    db.commit()
-    return db_item
+def delete_rows(db: Session, entity: str, keys: List[int]) -> Dict[str, Any]:
+    """Deletes the rows with the given primary keys with one `DELETE ... WHERE pk IN (...)`."""
+    if len(keys) > MAX_CRUD_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_CRUD_BATCH} rows per request.")
+    statements = STATEMENTS[entity]
+    deleted = 0
+    if keys:
+        use_primary(db)
+        deleted = _write(db, statements.delete, {"keys": sorted(set(keys))})
+        _commit(db, statements)
+    return {"entity": entity, "received": len(keys), "deleted": deleted}
 
 
-def delete_item(db: Session, id: int):
-    db_item = db.query(models.Item).filter(models.Item.id == id).first()
-    if not db_item:
-        return None
-    db.delete(db_item)
-    db.commit()
-    return True
+def update_row(db: Session, entity: str, key: int, changes: Dict[str, Any]) -> Dict[str, Any]:
+    """`update_rows` for one row; a 404 when `key` does not exist."""
+    pk = STATEMENTS[entity].pk.name
+    if changes.get(pk, key) != key:
+        raise HTTPException(status_code=422, detail=f"{pk} cannot be changed.")
+    report = update_rows(db, entity, [{**changes, pk: key}])
+    if not report["updated"]:
+        # Nothing was written: either the row is missing or there was nothing to change.
+        use_primary(db)
+        get_row(db, entity, key)
+    return report
 
 
-def search_items(db: Session, keyword: str):
-    return db.query(models.Item).filter(models.Item.name.like(f"%{keyword}%")).all()
+def delete_row(db: Session, entity: str, key: int) -> Dict[str, Any]:
+    """`delete_rows` for one row; a 404 when `key` does not exist."""
+    report = delete_rows(db, entity, [key])
+    if not report["deleted"]:
+        raise HTTPException(status_code=404, detail=f"No {entity} row with id {key}.")
+    return report
@@ -1,46 +1,420 @@
 # backend/app/database.py
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeout
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
+from sqlalchemy.pool import NullPool
+import asyncio
 import os
+import random
+import threading
 import time
+from itertools import count
+from typing import Any, List, Optional
 
-DATABASE_URL = (
+from .metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engines, instrument_pool
+
+# DATABASE_URL overrides the MySQL settings, e.g. "sqlite:///./agency.db" for offline runs.
+DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASS')}"
     f"@{os.getenv('DB_HOST')}/{os.getenv('DB_NAME')}"
 )
 
-MAX_RETRIES = 10
-RETRY_DELAY = 5 
+# Opt-in async mode: routes are served on the event loop through an AsyncSession
+# instead of FastAPI's threadpool. The async URL is derived from DATABASE_URL
+# (pymysql -> aiomysql, sqlite -> aiosqlite) unless given explicitly.
+ASYNC_MODE = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+
+def _async_url(url: str) -> str:
+    for sync_prefix, async_prefix in (("mysql+pymysql://", "mysql+aiomysql://"), ("sqlite://", "sqlite+aiosqlite://")):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+# Statement timing for /metrics (see metrics.py), for every engine created below.
+instrument_engines()
+
+# Connection pool. Size it so that workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# stays under the server's max_connections; /metrics shows checkout waits.
+# Instead of a pre-ping round trip on every checkout, a background liveness
+# check (every DB_LIVENESS_INTERVAL seconds) resets the pool when the
+# database goes away. DB_POOL_PRE_PING=true turns the per-checkout ping back on.
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+LIVENESS_INTERVAL = float(os.getenv("DB_LIVENESS_INTERVAL", "15"))
+
+
+def _pool_options(name: str) -> dict:
+    return dict(
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
+        pool_logging_name=name,
+    )
+
+# Engines are created on first use, not at import: importing the app (in
+# every worker, or for a CLI command) does no I/O. Whether the database is
+# reachable is found out by `wait_for_database`, which the app's lifespan
+# runs in the background, so startup is never blocked by it.
+
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **_pool_options("primary"))
+                instrument_pool("primary", _engine)
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = create_async_engine(
+                    ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **_pool_options("async")
+                )
+                instrument_pool("async", _async_engine.sync_engine)
+    return _async_engine
+
+
+# -----------------------------------------------------------------
+# Read replicas
+# -----------------------------------------------------------------
+# DATABASE_REPLICA_URLS (comma-separated) turns on read routing: plain SELECTs
+# go to a replica, round-robin per session, while writes, SELECT ... FOR
+# UPDATE and everything a session runs after its first write go to the
+# primary. A replica that fails a connection, or that `monitor_replicas` finds
+# unreachable or more than DB_REPLICA_MAX_LAG seconds behind, is skipped until
+# it recovers; with no usable replica, reads fall back to the primary.
+# DB_READ_YOUR_WRITES keeps every session of this process on the primary for
+# that many seconds after it committed a write.
+
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "10"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+READ_YOUR_WRITES = float(os.getenv("DB_READ_YOUR_WRITES", "0"))
+
+_PRIMARY_KEY = "_agency_use_primary"
+_REPLICA_KEY = "_agency_replica"
+
+
+class Replica:
+    """One replica URL with its lazily created engines and health."""
+
+    def __init__(self, index: int, url: str):
+        self.name = f"replica{index}"
+        self.url = url
+        self.down_until = 0.0
+        self.lag: Optional[float] = None
+        self._engine: Optional[Engine] = None
+        self._async_engine: Optional[AsyncEngine] = None
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, seconds: float = REPLICA_CHECK_INTERVAL) -> None:
+        self.down_until = time.monotonic() + max(seconds, 1.0)
+
+    def _watch(self, engine: Engine) -> None:
+        def on_error(context: Any) -> None:
+            # A lost connection, or no connection at all (it failed to open).
+            if context.is_disconnect or context.connection is None:
+                self.mark_down()
+        event.listen(engine, "handle_error", on_error)
+
+    def engine(self) -> Engine:
+        if self._engine is None:
+            with _engine_lock:
+                if self._engine is None:
+                    self._engine = create_engine(self.url, poolclass=InstrumentedQueuePool, **_pool_options(self.name))
+                    instrument_pool(self.name, self._engine)
+                    self._watch(self._engine)
+        return self._engine
+
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            with _engine_lock:
+                if self._async_engine is None:
+                    self._async_engine = create_async_engine(
+                        _async_url(self.url), poolclass=InstrumentedAsyncQueuePool, **_pool_options(f"{self.name}-async")
+                    )
+                    instrument_pool(f"{self.name}-async", self._async_engine.sync_engine)
+                    self._watch(self._async_engine.sync_engine)
+        return self._async_engine
+
+
+replicas: List[Replica] = [Replica(i, url) for i, url in enumerate(REPLICA_URLS, start=1)]
+_next_replica = count()
+_last_write = 0.0
+
+
+def _pick_replica() -> Optional[Replica]:
+    healthy = [replica for replica in replicas if replica.healthy]
+    if not healthy:
+        return None
+    return healthy[next(_next_replica) % len(healthy)]
+
+
+def _is_plain_read(clause: Any) -> bool:
+    return getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+
+
+def use_primary(session: Session) -> None:
+    """Sends every later statement of `session` to the primary, e.g. for read-then-write work."""
+    session.info[_PRIMARY_KEY] = True
+
+
+class RoutingSession(Session):
+    """
+    Session that picks the primary or a replica per statement (see above).
+    Sessions created with an explicit `bind` always use it.
+    """
+
+    _async = False
+
+    def _primary(self) -> Engine:
+        return get_async_engine().sync_engine if self._async else get_engine()
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.bind is not None:
+            return super().get_bind(mapper, clause=clause, **kw)
+        if not _is_plain_read(clause):
+            # Writes, FOR UPDATE reads, flushes and raw connections; the session
+            # then reads its own writes from the primary too.
+            self.info[_PRIMARY_KEY] = True
+        if self.info.get(_PRIMARY_KEY) or time.monotonic() - _last_write < READ_YOUR_WRITES:
+            return self._primary()
+        replica = self.info.get(_REPLICA_KEY)
+        if replica is None or not replica.healthy:
+            replica = self.info[_REPLICA_KEY] = _pick_replica()
+            if replica is None:
+                del self.info[_REPLICA_KEY]
+                return self._primary()
+        return replica.async_engine().sync_engine if self._async else replica.engine()
+
 
-engine = None 
+class AsyncRoutingSession(RoutingSession):
+    _async = True
 
-for i in range(MAX_RETRIES):
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session: Session) -> None:
+    global _last_write
+    if session.info.get(_PRIMARY_KEY):
+        _last_write = time.monotonic()
+
+
+def _replication_lag(conn: Any) -> Optional[float]:
+    """Seconds the replica behind `conn` is behind its source; None when replication is stopped."""
+    if conn.dialect.name != "mysql":
+        return 0.0
+    for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"), ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+        try:
+            row = conn.exec_driver_sql(statement).mappings().first()
+        except DBAPIError:
+            continue
+        if row is None:
+            # Not configured as a replica, e.g. a second standalone server in development.
+            return 0.0
+        return None if row[column] is None else float(row[column])
+    return 0.0
+
+
+def check_replica(replica: Replica) -> None:
+    """Pings `replica` and reads its lag; marks it down when it fails or lags too far."""
     try:
-        temp_engine = create_engine(
-            DATABASE_URL,
-            pool_pre_ping=True, 
-            pool_recycle=3600
-        )
-        with temp_engine.connect():
-            engine = temp_engine
-            print("INFO: Database connection successful! FastAPI starting...")
-            break 
-            
-    except OperationalError:
-        if i < MAX_RETRIES - 1:
-            print(f"WARNING: Database connection failed (Attempt {i+1}/{MAX_RETRIES}). Retrying in {RETRY_DELAY} seconds...")
-            time.sleep(RETRY_DELAY)
-        else:
-            print(f"FATAL: Database connection failed after {MAX_RETRIES} attempts.")
-            raise 
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with replica.engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+            replica.lag = _replication_lag(conn)
+    except Exception as exc:
+        print(f"WARNING: Replica {replica.name} not reachable: {exc.__class__.__name__}. Skipping it until it answers.")
+        replica.lag = None
+        replica.mark_down(REPLICA_CHECK_INTERVAL * 2)
+        return
+    if replica.lag is None or replica.lag > REPLICA_MAX_LAG:
+        print(f"WARNING: Replica {replica.name} is lagging ({replica.lag} s). Skipping it until it catches up.")
+        replica.mark_down(REPLICA_CHECK_INTERVAL * 2)
+    else:
+        replica.down_until = 0.0
+
+
+async def monitor_replicas() -> None:
+    """Checks every replica every DB_REPLICA_CHECK_INTERVAL seconds."""
+    if not replicas or REPLICA_CHECK_INTERVAL <= 0:
+        return
+    while True:
+        for replica in replicas:
+            await asyncio.to_thread(check_replica, replica)
+        await asyncio.sleep(REPLICA_CHECK_INTERVAL)
+
+
+class _LazySessionmaker(sessionmaker):
+    """
+    sessionmaker that binds its sessions to `get_engine()` unless given another
+    bind, or routes them between the primary and the replicas when any are set.
+    """
+
+    def __call__(self, **local_kw):
+        if not replicas:
+            local_kw.setdefault("bind", get_engine())
+        return super().__call__(**local_kw)
+
+
+class _LazyAsyncSessionmaker(async_sessionmaker):
+    def __call__(self, **local_kw):
+        if not replicas:
+            local_kw.setdefault("bind", get_async_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(class_=RoutingSession if replicas else Session, autocommit=False, autoflush=False)
 Base = declarative_base()
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+AsyncSessionLocal = _LazyAsyncSessionmaker(
+    sync_session_class=AsyncRoutingSession if replicas else Session, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# -----------------------------------------------------------------
+# Readiness
+# -----------------------------------------------------------------
+
+BACKOFF_INITIAL = 0.5
+BACKOFF_MAX = float(os.getenv("DB_BACKOFF_MAX", "30"))
+
+database_ready = threading.Event()
+
+
+# The probes connect through an engine of their own, without a pool: a ping
+# that had to queue behind busy requests for a pooled connection would time
+# out under load and report a saturated pool as a dead database.
+_probe_engine: Optional[Engine] = None
+
+
+def get_probe_engine() -> Engine:
+    global _probe_engine
+    if _probe_engine is None:
+        with _engine_lock:
+            if _probe_engine is None:
+                _probe_engine = create_engine(DATABASE_URL, poolclass=NullPool)
+    return _probe_engine
+
+
+def ping() -> None:
+    """Runs `SELECT 1` on a fresh connection; raises when the database cannot be reached."""
+    with get_probe_engine().connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+async def wait_for_database() -> None:
+    """
+    Pings the database until it answers, with exponential backoff and jitter
+    between attempts, then sets `database_ready`. Meant to run as a
+    background task: requests are served (and fail fast) meanwhile.
+    """
+    delay = BACKOFF_INITIAL
+    attempt = 1
+    while True:
+        try:
+            await asyncio.to_thread(ping)
+        except Exception as exc:
+            print(f"WARNING: Database not reachable (attempt {attempt}): {exc.__class__.__name__}. Retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, BACKOFF_MAX)
+            attempt += 1
+            continue
+        database_ready.set()
+        print("INFO: Database connection successful!")
+        return
+
+
+async def monitor_database() -> None:
+    """
+    Waits for the database, then pings it every LIVENESS_INTERVAL seconds.
+    When a ping fails the app reports not ready and the primary's pools (sync
+    and async) are emptied, so requests get fresh connections instead of dead
+    ones once it is back. Replicas have their own check (`monitor_replicas`).
+    A pool checkout timeout means the pool is saturated, not that the
+    database is gone, so it changes nothing.
+    """
+    await wait_for_database()
+    if LIVENESS_INTERVAL <= 0:
+        return
+    while True:
+        await asyncio.sleep(LIVENESS_INTERVAL)
+        try:
+            await asyncio.to_thread(ping)
+        except PoolTimeout:
+            print("WARNING: Database liveness check timed out waiting for a pooled connection. The pool is saturated.")
+        except Exception as exc:
+            print(f"WARNING: Database liveness check failed: {exc.__class__.__name__}. Resetting the primary connection pools.")
+            database_ready.clear()
+            await dispose_primary()
+            await wait_for_database()
+
+
+def reset_after_fork() -> None:
+    """
+    Gives a forked worker fresh connection pools. The pooled connections it
+    inherited belong to the parent, so they are dropped without being closed
+    (closing them would end the parent's sessions); the engines open new ones
+    on first use. Engines not created before the fork need nothing.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+    for replica in replicas:
+        if replica._engine is not None:
+            replica._engine.dispose(close=False)
+        if replica._async_engine is not None:
+            replica._async_engine.sync_engine.dispose(close=False)
+
+
+async def dispose_primary() -> None:
+    """Closes the pooled connections to the primary (sync and async)."""
+    if _engine is not None:
+        _engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+async def dispose_engines() -> None:
+    """Closes the pooled connections, e.g. on shutdown."""
+    await dispose_primary()
+    for replica in replicas:
+        if replica._engine is not None:
+            replica._engine.dispose()
+        if replica._async_engine is not None:
+            await replica._async_engine.dispose()
@@ -0,0 +1,95 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session, joinedload, raiseload, selectinload
+
+from .models import PersonnelAssignment, Production, ProductionSchedule, RentalUsage
+
+# =================================================================
+# WHOLE-PRODUCTION DETAIL
+# =================================================================
+# A production with everything hanging off it, for any number of ids, in a
+# fixed number of queries (six, or fewer when a level has no rows):
+#
+#   1. the productions, joined to their partner and general / event details
+#      (all many-to-one or one-to-one, so the join adds no rows);
+#   2-5. expenses, assignments (+ personnel), schedules (+ personnel) and
+#      rental usages (+ place), each one SELECT ... WHERE production_id IN (...);
+#   6. the payments of those rental usages.
+#
+# `raiseload("*")` turns any relationship left out here into an error instead
+# of a silent lazy load per row, so the query count cannot creep back up.
+
+MAX_DETAIL_BATCH = 200
+
+DETAIL_OPTIONS = (
+    joinedload(Production.partner),
+    joinedload(Production.general_details),
+    joinedload(Production.event_details),
+    selectinload(Production.expenses),
+    selectinload(Production.assignments).joinedload(PersonnelAssignment.personnel),
+    selectinload(Production.schedules).joinedload(ProductionSchedule.personnel),
+    selectinload(Production.rental_usages).options(
+        joinedload(RentalUsage.place),
+        selectinload(RentalUsage.payments),
+    ),
+    raiseload("*"),
+)
+
+
+@lru_cache(maxsize=None)
+def _column_keys(cls: type) -> Tuple[str, ...]:
+    return tuple(attr.key for attr in inspect(cls).column_attrs)
+
+
+def _columns(obj: Optional[Any]) -> Optional[Dict[str, Any]]:
+    """The column values of a loaded object, keyed by attribute name."""
+    if obj is None:
+        return None
+    return {key: getattr(obj, key) for key in _column_keys(type(obj))}
+
+
+def _sorted(objs: Sequence[Any], *keys: str) -> List[Any]:
+    # The IN-loads return children in whatever order the database reads them.
+    return sorted(objs, key=lambda obj: tuple(getattr(obj, key) for key in keys))
+
+
+def _detail(production: Production) -> Dict[str, Any]:
+    detail = _columns(production)
+    detail["partner"] = _columns(production.partner)
+    detail["general_details"] = _columns(production.general_details)
+    detail["event_details"] = _columns(production.event_details)
+    detail["expenses"] = [_columns(e) for e in _sorted(production.expenses, "expense_id")]
+    detail["assignments"] = [
+        {**_columns(a), "personnel": _columns(a.personnel)}
+        for a in _sorted(production.assignments, "personnel_id")
+    ]
+    detail["schedules"] = [
+        {**_columns(s), "personnel": _columns(s.personnel)}
+        for s in _sorted(production.schedules, "start_dt", "prod_schedule_id")
+    ]
+    detail["rental_usages"] = [
+        {
+            **_columns(u),
+            "place": _columns(u.place),
+            "payments": [_columns(p) for p in _sorted(u.payments, "payment_id")],
+        }
+        for u in _sorted(production.rental_usages, "start_time", "usage_id")
+    ]
+    return detail
+
+
+def production_details(db: Session, production_ids: Sequence[int]) -> List[Dict[str, Any]]:
+    """
+    The full detail of each existing production in `production_ids`, in the
+    order requested (ids that do not exist are left out).
+    """
+    wanted = list(dict.fromkeys(production_ids))
+    if not wanted:
+        return []
+    productions = db.execute(
+        select(Production).where(Production.production_id.in_(wanted)).options(*DETAIL_OPTIONS)
+    ).unique().scalars().all()
+    by_id = {p.production_id: p for p in productions}
+    return [_detail(by_id[pid]) for pid in wanted if pid in by_id]
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# =================================================================
+# COMMITTED WRITE NOTIFICATIONS
+# =================================================================
+# In-process structures derived from the tables (indexes, caches, aggregates)
+# subscribe here to learn about writes. Rows are captured at flush time and
+# only published once the transaction commits, so rolled-back work never
+# reaches a subscriber.
+
+_PENDING_KEY = "_agency_pending_changes"
+
+
+@dataclass(frozen=True)
+class RowChange:
+    """
+    One committed write. `op` is "insert", "update" or "delete" for ORM unit-of-work
+    flushes, with `row` holding the loaded column values of the object.
+    Statement-level writes (bulk insert/update/delete) are reported with op "bulk"
+    and `row` set to None, meaning "anything in this table may have changed".
+    """
+    table: str
+    op: str
+    row: Optional[Dict[str, Any]] = None
+
+
+Subscriber = Callable[[List[RowChange]], None]
+_subscribers: List[Subscriber] = []
+
+
+def subscribe(callback: Subscriber) -> Subscriber:
+    """Registers `callback` to receive the list of changes of every committed transaction."""
+    _subscribers.append(callback)
+    return callback
+
+
+def record_bulk_write(session: Session, *table_names: str) -> None:
+    """
+    Reports a write that bypassed the ORM (e.g. `connection.execute(insert(table), rows)`)
+    so subscribers treat the given tables as changed when `session` commits.
+    """
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    pending.extend(RowChange(name, "bulk") for name in table_names)
+
+
+def _snapshot(obj: Any) -> Dict[str, Any]:
+    # Only already-loaded values: touching an expired attribute here would
+    # emit a SELECT in the middle of the flush (or fail for deleted rows).
+    state = inspect(obj)
+    loaded = state.dict
+    return {
+        attr.key: loaded[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in loaded
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_rows(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for op, objects in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objects:
+            if op == "update" and not session.is_modified(obj, include_collections=False):
+                continue
+            table = inspect(obj).mapper.local_table.name
+            pending.append(RowChange(table, op, _snapshot(obj)))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statement_writes(orm_execute_state) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = orm_execute_state.statement.table
+        record_bulk_write(orm_execute_state.session, table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    changes = session.info.pop(_PENDING_KEY, None)
+    if not changes:
+        return
+    for callback in _subscribers:
+        callback(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,146 @@
+"""
+Secondary index management for the query routers.
+
+The indexes themselves are declared in `__table_args__` on the models (and
+mirrored in `dbproject.sql`). This module brings an existing database up to
+date with them and checks, with EXPLAIN, that the Q1-Q14 statements use them:
+
+    python -m app.indexes ensure     # create any declared index that is missing
+    python -m app.indexes explain    # run every query and report its plan
+"""
+
+import argparse
+import inspect as inspect_module
+import sys
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+
+from .database import Base, SessionLocal, get_engine
+from .metrics import explain_plan
+from .pagination import DEFAULT_PAGE_SIZE, PageParams
+from .routers import general_stats, personnel, rental, schedule_activity
+
+
+def ensure_indexes(bind: Optional[Engine] = None) -> List[str]:
+    """Creates every index declared on the models that the database lacks. Returns the created names."""
+    bind = bind or get_engine()
+    inspector = inspect(bind)
+    created = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda ix: ix.name):
+                if index.name not in existing:
+                    index.create(bind=conn)
+                    created.append(index.name)
+    return created
+
+
+# (label, handler, arguments, indexes the plan is expected to use). A tuple entry
+# accepts any of its indexes, for anti-joins the optimizer may drive from either side.
+_FIRST_PAGE = PageParams(limit=DEFAULT_PAGE_SIZE, cursor=None, stream=False)
+
+QUERY_PLAN_CHECKS: List[Tuple[str, Callable[..., Any], Dict[str, Any], List[Any]]] = [
+    ("Q1", personnel.list_personnel_by_type,
+     {"personnel_types": ["Director", "Actor"], "limit": 100},
+     ["ix_personnel_type_id"]),
+    ("Q2", personnel.get_available_personnel,
+     {"start_dt": datetime(2024, 2, 10, 9), "end_dt": datetime(2024, 2, 10, 12),
+      "personnel_types": ["Actor", "Crew"], "source": "sql"},
+     ["ix_personnel_type_id",
+      ("ix_productionschedule_start_end", "ix_productionschedule_personnel_start")]),
+    ("Q3", rental.get_available_rental_places,
+     {"start_dt": datetime(2024, 2, 10, 9), "end_dt": datetime(2024, 2, 10, 12)},
+     [("ix_rentalusage_time", "ix_rentalusage_place_time")]),
+    ("Q4", schedule_activity.get_activity_type_counts,
+     {"start_dt": datetime(2024, 1, 1), "end_dt": datetime(2024, 12, 31)},
+     ["ix_productionschedule_start_end"]),
+    ("Q5", personnel.get_top_n_actors_by_projects, {"n": 3, "source": "sql"},
+     ["ix_personnel_type_id"]),
+    ("Q6", personnel.get_least_n_actors_by_jobs, {"n": 5, "source": "sql"},
+     ["ix_personnel_type_id"]),
+    ("Q7", general_stats.list_all_personnel_assignments,
+     {"name_search": None, "title_search": None, "source": "sql", "page": _FIRST_PAGE},
+     ["ix_personnel_name"]),
+    ("Q8", general_stats.list_personnel_contract_data,
+     {"start_date": date(2024, 1, 1), "end_date": date(2024, 12, 31), "name_search": None, "source": "sql"},
+     ["ix_personnel_contract"]),
+    ("Q9", schedule_activity.get_music_production_details,
+     {"start_date": date(2023, 1, 1)},
+     ["ix_generalproduction_genre"]),
+    ("Q10", rental.get_places_in_use_on_date,
+     {"target_date": date(2024, 2, 10), "page": _FIRST_PAGE},
+     ["ix_rentalusage_time"]),
+    ("Q11", general_stats.show_production_expense_summary, {"source": "sql", "page": _FIRST_PAGE},
+     ["ix_production_title"]),
+    ("Q12", general_stats.list_all_performers, {"page": _FIRST_PAGE},
+     ["ix_personnel_name"]),
+    ("Q13", general_stats.get_partners_by_performer_name,
+     {"performer_name": "Alice Kim"},
+     ["ix_personnel_name"]),
+    ("Q14", schedule_activity.get_upcoming_schedule,
+     {"current_datetime": datetime(2025, 1, 1), "page": _FIRST_PAGE},
+     ["ix_productionschedule_start_end"]),
+]
+
+
+def explain_queries(bind: Optional[Engine] = None) -> List[Dict[str, Any]]:
+    """
+    Runs each Q1-Q14 handler against `bind`, captures the SQL it emits and
+    reports, per query, the plan and whether every expected index was used.
+    """
+    bind = bind or get_engine()
+    captured: List[Tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    reports = []
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        for label, handler, kwargs, expected in QUERY_PLAN_CHECKS:
+            captured.clear()
+            with SessionLocal(bind=bind) as db:
+                # Unwrapped so a result cache in front of the handler cannot skip the SQL.
+                inspect_module.unwrap(handler)(db=db, **kwargs)
+            statements = list(captured)
+            with bind.connect() as conn:
+                plan = "\n".join(explain_plan(conn, stmt, params) for stmt, params in statements)
+            missing = [
+                "|".join(names) for names in ((e,) if isinstance(e, str) else e for e in expected)
+                if not any(name in plan for name in names)
+            ]
+            reports.append({"query": label, "expected": expected, "missing": missing, "plan": plan})
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+    return reports
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.indexes", description=__doc__.split("\n\n")[0])
+    parser.add_argument("command", choices=["ensure", "explain"])
+    parser.add_argument("--verbose", action="store_true", help="Print the full plan of every query.")
+    args = parser.parse_args(argv)
+
+    if args.command == "ensure":
+        created = ensure_indexes()
+        print(f"INFO: Created {len(created)} index(es): {', '.join(created) or '-'}")
+        return 0
+
+    failures = 0
+    for report in explain_queries():
+        status = "OK" if not report["missing"] else f"MISSING {', '.join(report['missing'])}"
+        print(f"{report['query']:>4}  {status}")
+        if args.verbose or report["missing"]:
+            print("      " + report["plan"].replace("\n", "\n      "))
+        failures += bool(report["missing"])
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
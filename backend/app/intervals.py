@@ -0,0 +1,183 @@
+from bisect import bisect_left, bisect_right
+from heapq import heappop, heappush
+from typing import Any, Iterable, List, Sequence, Tuple
+from datetime import datetime, timedelta
+
+# =================================================================
+# HALF-OPEN INTERVAL HELPERS
+# =================================================================
+# Every busy period in the schema (schedules, rental usages) is treated as
+# the half-open range [start, end), matching the overlap predicate the
+# routers use in SQL:  start < window_end AND end > window_start.
+
+Interval = Tuple[datetime, datetime]
+
+
+def naive(value: datetime) -> datetime:
+    """
+    The schedule and rental columns are naive DATETIMEs; comparing them with an
+    aware value would raise, so the offset is dropped like MySQL does.
+    """
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> Tuple[List[datetime], List[datetime]]:
+    """
+    Merges overlapping or touching intervals and returns them as two parallel,
+    sorted lists (starts, ends). Because the merged intervals are disjoint,
+    both lists are strictly increasing, which is what `overlaps` relies on.
+    """
+    starts: List[datetime] = []
+    ends: List[datetime] = []
+    valid = [
+        (start, end) for start, end in intervals
+        if start is not None and end is not None and end >= start
+    ]
+    for start, end in sorted(valid):
+        if ends and start <= ends[-1]:
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def overlaps(starts: List[datetime], ends: List[datetime], start: datetime, end: datetime) -> bool:
+    """
+    Returns True if the window [start, end) overlaps any merged interval.
+    O(log n): only the last interval starting before `end` can reach past `start`.
+    """
+    idx = bisect_left(starts, end) - 1
+    return idx >= 0 and ends[idx] > start
+
+
+def overlapping_pairs(intervals: Sequence[Tuple[Any, datetime, datetime]]) -> List[Tuple[int, int]]:
+    """
+    Every pair of positions (i, j) in `intervals` whose (resource, start, end)
+    entries share a resource and overlap, found in one sweep over the entries
+    sorted by (resource, start). The sweep keeps a heap of the entries still
+    running; each new entry overlaps exactly those that end after it starts.
+    O(n log n + pairs) instead of checking all n^2 pairs.
+    """
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i])
+    pairs: List[Tuple[int, int]] = []
+    active: List[Tuple[datetime, int]] = []
+    resource = None
+    for i in order:
+        current, start, end = intervals[i]
+        if current != resource:
+            active = []
+            resource = current
+        while active and active[0][0] <= start:
+            heappop(active)
+        pairs.extend((j, i) for _, j in active)
+        heappush(active, (end, i))
+    return pairs
+
+
+# -----------------------------------------------------------------
+# Free time and window placement
+# -----------------------------------------------------------------
+# A window of length d fits in the free gap [a, b] exactly when it starts in
+# the closed range [a, b - d]. The helpers below work on such closed ranges of
+# feasible start times, so "free for the whole window" becomes a plain
+# intersection / counting problem over sorted ranges.
+
+
+def free_intervals(starts: List[datetime], ends: List[datetime], lo: datetime, hi: datetime) -> List[Interval]:
+    """The gaps [a, b] inside [lo, hi] left by merged busy intervals (from `merge_intervals`)."""
+    gaps: List[Interval] = []
+    cursor = lo
+    for start, end in zip(starts, ends):
+        if end <= cursor:
+            continue
+        if start >= hi:
+            break
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < hi:
+        gaps.append((cursor, hi))
+    return gaps
+
+
+def start_ranges(gaps: Iterable[Interval], duration: timedelta) -> List[Interval]:
+    """Closed ranges of start times at which a window of `duration` fits in one of `gaps`."""
+    return [(a, b - duration) for a, b in gaps if b - a >= duration]
+
+
+def covered_by_at_least(ranges: Iterable[Interval], k: int) -> List[Interval]:
+    """
+    Closed ranges of time covered by at least `k` of the given closed ranges,
+    in one sweep over their sorted endpoints (openings before closings at
+    equal times, since both ends are inclusive).
+    """
+    ranges = list(ranges)
+    events = sorted([(a, 0) for a, _ in ranges] + [(b, 1) for _, b in ranges])
+    covered: List[Interval] = []
+    depth = 0
+    opened = None
+    for at, closing in events:
+        if closing:
+            if depth == k:
+                covered.append((opened, at))
+            depth -= 1
+        else:
+            depth += 1
+            if depth == k:
+                opened = at
+    return _coalesce(covered)
+
+
+def intersect_ranges(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    """Intersection of two sorted lists of disjoint closed ranges (two pointers)."""
+    out: List[Interval] = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        lo = max(a[i][0], b[j][0])
+        hi = min(a[i][1], b[j][1])
+        if lo <= hi:
+            out.append((lo, hi))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+
+def _coalesce(ranges: List[Interval]) -> List[Interval]:
+    out: List[Interval] = []
+    for a, b in ranges:
+        if out and a <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], b))
+        else:
+            out.append((a, b))
+    return out
+
+
+# -----------------------------------------------------------------
+# Occupancy per bucket
+# -----------------------------------------------------------------
+
+
+def busy_time(starts: List[datetime], ends: List[datetime], boundaries: Sequence[datetime]) -> List[timedelta]:
+    """
+    Busy time of merged intervals (from `merge_intervals`) in each bucket
+    [boundaries[i], boundaries[i + 1]). A prefix sum over the interval lengths
+    gives the busy time before any instant with one binary search, so every
+    bucket is the difference of two lookups: O((n + buckets) log n) however
+    long the intervals are.
+    """
+    prefix = [timedelta(0)]
+    for start, end in zip(starts, ends):
+        prefix.append(prefix[-1] + (end - start))
+
+    def busy_before(at: datetime) -> timedelta:
+        idx = bisect_right(starts, at)
+        if idx and ends[idx - 1] > at:
+            return prefix[idx] - (ends[idx - 1] - at)
+        return prefix[idx]
+
+    cumulative = [busy_before(at) for at in boundaries]
+    return [b - a for a, b in zip(cumulative, cumulative[1:])]
@@ -1,19 +1,60 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import general_stats, personnel, rental, schedule_activity
-from .database import Base, engine
+from fastapi.middleware.gzip import GZipMiddleware
+from app.routers import bulk, entities, general_stats, personnel, productions, rental, schedule_activity, search
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.orm import Session
+
+from .database import ASYNC_MODE, database_ready, dispose_engines, get_db, monitor_database, monitor_replicas, ping
+from .async_routes import as_async_router
+from .aggregates import activity_rollup, aggregate_store
+from .cache import result_cache
+from .responses import negotiate_format
+from .metrics import RequestTimingMiddleware, render_metrics, track_endpoint
+
+
+# Startup does no database work itself: tables are created once with
+# `python -m app.schema`, and the database is probed in the background so
+# /healthz answers immediately and /readyz turns 200 once it is reachable
+# (and back to 503 while a later liveness check fails).
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    probe = asyncio.create_task(monitor_database())
+    replica_probe = asyncio.create_task(monitor_replicas())
+    yield
+    probe.cancel()
+    replica_probe.cancel()
+    await dispose_engines()
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Entertainment Agency Database API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-app.include_router(personnel.router)
-app.include_router(rental.router)
-app.include_router(schedule_activity.router)
-app.include_router(general_stats.router)
+# DB_ASYNC=true serves the same routes through an AsyncSession on the event loop.
+for router in (
+    personnel.router, rental.router, schedule_activity.router, general_stats.router,
+    search.router, bulk.router, entities.router, productions.router
+):
+    app.include_router(
+        as_async_router(router) if ASYNC_MODE else router,
+        dependencies=[Depends(negotiate_format), Depends(track_endpoint)]
+    )
+
+# 🔹 Compression: brotli when the optional brotli-asgi package is installed
+# (it falls back to gzip for clients without `br`), plain gzip otherwise.
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=1024)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 # 🔹 CORS
 app.add_middleware(
@@ -24,6 +65,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 🔹 Request latency per endpoint (outermost, so compression time is included)
+app.add_middleware(RequestTimingMiddleware)
+
 @app.get("/")
 def root():
     return {"message": "Backend is running"}
+
+
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up. Does not touch the database."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the startup probe has succeeded and the database still answers."""
+    if not database_ready.is_set():
+        return JSONResponse({"status": "starting"}, status_code=503)
+    try:
+        await run_in_threadpool(ping)
+    except PoolTimeout:
+        # A saturated pool: the database answers, the app is only busy.
+        return {"status": "ready", "detail": "pool saturated"}
+    except Exception as exc:
+        return JSONResponse({"status": "unavailable", "detail": exc.__class__.__name__}, status_code=503)
+    return {"status": "ready"}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return result_cache.stats()
+
+
+@app.get("/aggregates/check")
+def aggregates_check(db: Session = Depends(get_db)):
+    """Compares the live Q4/Q5/Q6/Q11 aggregates with the GROUP BY queries they replace."""
+    differences = aggregate_store.check(db) + activity_rollup.check(db)
+    return {"consistent": not differences, "differences": differences}
+
+
+@app.post("/aggregates/rebuild")
+def aggregates_rebuild(db: Session = Depends(get_db)):
+    aggregate_store.load(db)
+    activity_rollup.load(db)
+    return {"status": "rebuilt"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    cache = result_cache.stats()
+    return PlainTextResponse(
+        render_metrics(
+            gauges={"agency_cache_entries": cache["entries"]},
+            counters={
+                "agency_cache_hits": cache["hits"],
+                "agency_cache_misses": cache["misses"],
+                "agency_cache_evictions": cache["evictions"],
+            }
+        ),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,352 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import Request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# =================================================================
+# QUERY TIMING AND PROMETHEUS METRICS
+# =================================================================
+# Every statement sent through any Engine is timed with the cursor execute
+# events and recorded under the endpoint that issued it and a fingerprint of
+# its SQL. Response rendering is timed separately, so DB time and
+# serialization time can be told apart. `render_metrics()` exposes it all
+# in the Prometheus text format (served at /metrics).
+#
+# SLOW_QUERY_MS turns on the slow-query log: a SELECT slower than the
+# threshold is logged with its parameters and EXPLAIN output.
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+
+# SQL text is kept for the most recently seen METRICS_MAX_STATEMENTS
+# fingerprints only: statements whose SQL varies (e.g. inlined literals)
+# would otherwise grow the table without bound.
+MAX_STATEMENTS = int(os.getenv("METRICS_MAX_STATEMENTS", "1000"))
+
+logger = logging.getLogger("app.slow_query")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_endpoint: ContextVar[str] = ContextVar("metrics_endpoint", default="-")
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, label_values: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # One count per bucket, then +Inf, sum.
+                series = self._series[label_values] = [0.0] * (len(self.buckets) + 2)
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+            items = [(labels, list(series)) for labels, series in items]
+        for label_values, series in items:
+            base = _labels(self.labels, label_values)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{{{base},le=\"{le}\"}} {cumulative:g}")
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative:g}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, label_values: Tuple[str, ...], amount: float = 1) -> None:
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._series.items())
+        lines.extend(f"{self.name}{{{_labels(self.labels, k)}}} {v:g}" for k, v in items)
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    return ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+
+
+REQUEST_SECONDS = Histogram(
+    "agency_http_request_duration_seconds", "Request latency by endpoint.", ("endpoint", "method", "status"))
+QUERY_SECONDS = Histogram(
+    "agency_db_query_duration_seconds", "Statement execution time by endpoint and SQL fingerprint.",
+    ("endpoint", "fingerprint"))
+SERIALIZE_SECONDS = Histogram(
+    "agency_serialization_duration_seconds", "Time spent rendering response bodies.", ("endpoint",))
+ROWS_RETURNED = Counter(
+    "agency_rows_returned_total", "Rows returned to clients.", ("endpoint",))
+SLOW_QUERIES = Counter(
+    "agency_db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.", ("endpoint", "fingerprint"))
+POOL_WAIT_SECONDS = Histogram(
+    "agency_db_pool_wait_seconds", "Time a checkout waited for a pooled connection (including connecting).", ("pool",))
+POOL_EVENTS = Counter(
+    "agency_db_pool_events_total", "Pool connects, invalidations and checkout timeouts.", ("pool", "event"))
+
+
+# -----------------------------------------------------------------
+# Endpoint attribution
+# -----------------------------------------------------------------
+
+async def track_endpoint(request: Request) -> None:
+    """
+    Router-level dependency naming the endpoint that the statements and
+    responses of this request are recorded under (its route path).
+    """
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    request.scope["metrics_endpoint"] = path
+    _endpoint.set(path)
+
+
+def record_rows(count: int) -> None:
+    ROWS_RETURNED.inc((_endpoint.get(),), count)
+
+
+def record_serialization(seconds: float) -> None:
+    SERIALIZE_SECONDS.observe((_endpoint.get(),), seconds)
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware recording the latency of every request that reached a
+    tracked route. It reads the endpoint `track_endpoint` left in the scope.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            endpoint = scope.get("metrics_endpoint")
+            if endpoint is not None:
+                REQUEST_SECONDS.observe((endpoint, scope["method"], str(status)), time.perf_counter() - start)
+
+
+# -----------------------------------------------------------------
+# Statement fingerprints and timing
+# -----------------------------------------------------------------
+
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_IN_LIST = re.compile(rf"\bIN \(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# fingerprint -> normalized SQL, least recently seen first
+_statements: "OrderedDict[str, str]" = OrderedDict()
+_statements_lock = threading.Lock()
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Short stable id of a statement. Whitespace is collapsed and expanded IN
+    lists are folded to one placeholder, so the same query with a different
+    number of list values shares one fingerprint.
+    """
+    normalized = _IN_LIST.sub("IN (?+)", _WHITESPACE.sub(" ", statement).strip())
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:12]
+    with _statements_lock:
+        if digest in _statements:
+            _statements.move_to_end(digest)
+        else:
+            _statements[digest] = normalized
+            if len(_statements) > MAX_STATEMENTS:
+                _statements.popitem(last=False)
+    return digest
+
+
+def explain_plan(conn, statement: str, parameters: Any) -> str:
+    """Returns the query plan of `statement` flattened to text, for MySQL or SQLite."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return "\n".join(str(r[-1]) for r in rows)
+    rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).mappings().all()
+    return "\n".join(
+        f"{r.get('table')}: key={r.get('key')} type={r.get('type')} extra={r.get('Extra')}"
+        for r in rows
+    )
+
+
+def _log_slow_query(conn, context, statement: str, parameters: Any, seconds: float, digest: str) -> None:
+    plan = "-"
+    # A streamed (server-side cursor) result still owns the connection, and
+    # EXPLAIN itself must not be explained again.
+    streaming = context is not None and context.execution_options.get("stream_results")
+    if statement.lstrip()[:6].upper() == "SELECT" and not streaming and not conn.info.get("explaining"):
+        conn.info["explaining"] = True
+        try:
+            plan = explain_plan(conn, statement, parameters)
+        except Exception as exc:  # the plan is best effort, the query already ran
+            plan = f"EXPLAIN failed: {exc}"
+        finally:
+            conn.info["explaining"] = False
+    logger.warning(
+        "Slow query (%.1f ms) endpoint=%s fingerprint=%s\n%s\nparameters=%r\nplan:\n%s",
+        seconds * 1000, _endpoint.get(), digest, statement, parameters, plan
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    seconds = time.perf_counter() - starts.pop()
+    if conn.info.get("explaining"):
+        return
+    digest = fingerprint(statement)
+    endpoint = _endpoint.get()
+    QUERY_SECONDS.observe((endpoint, digest), seconds)
+    if SLOW_QUERY_MS and seconds * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc((endpoint, digest))
+        _log_slow_query(conn, context, statement, parameters, seconds, digest)
+
+
+def instrument_engines() -> None:
+    """Times every statement of every Engine, including the sync core of async engines."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# -----------------------------------------------------------------
+# Connection pools
+# -----------------------------------------------------------------
+# The pool name is its `logging_name`, which survives `engine.dispose()`
+# recreating the pool.
+
+class _TimedCheckout:
+    """Pool mixin recording how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        name = self.logging_name or "default"
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_EVENTS.inc((name, "timeout"))
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe((name,), time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+_engines: Dict[str, Engine] = {}
+
+
+def instrument_pool(name: str, engine: Engine) -> None:
+    """Reports the pool of `engine` (a sync Engine) under `name`."""
+    _engines[name] = engine
+    event.listen(engine, "connect", lambda *_: POOL_EVENTS.inc((name, "connect")))
+    event.listen(engine, "invalidate", lambda *_: POOL_EVENTS.inc((name, "invalidate")))
+
+
+def _pool_gauges() -> List[str]:
+    gauges = {
+        "agency_db_pool_size": "Configured number of persistent connections.",
+        "agency_db_pool_checked_out": "Connections currently checked out.",
+        "agency_db_pool_overflow": "Connections open beyond the pool size (negative: not yet opened).",
+        "agency_db_pool_checked_in": "Idle connections in the pool.",
+    }
+    values = {name: [] for name in gauges}
+    for pool_name, engine in sorted(_engines.items()):
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        label = f'pool="{_escape(pool_name)}"'
+        values["agency_db_pool_size"].append(f"agency_db_pool_size{{{label}}} {pool.size()}")
+        values["agency_db_pool_checked_out"].append(f"agency_db_pool_checked_out{{{label}}} {pool.checkedout()}")
+        values["agency_db_pool_overflow"].append(f"agency_db_pool_overflow{{{label}}} {pool.overflow()}")
+        values["agency_db_pool_checked_in"].append(f"agency_db_pool_checked_in{{{label}}} {pool.checkedin()}")
+    lines = []
+    for name, help in gauges.items():
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"] + values[name]
+    return lines
+
+
+# -----------------------------------------------------------------
+# Exposition
+# -----------------------------------------------------------------
+
+def render_metrics(gauges: Optional[Dict[str, float]] = None, counters: Optional[Dict[str, float]] = None) -> str:
+    """All metrics in the Prometheus text exposition format. `gauges` and `counters` add unlabelled values."""
+    lines: List[str] = []
+    for metric in (REQUEST_SECONDS, QUERY_SECONDS, SERIALIZE_SECONDS, ROWS_RETURNED, SLOW_QUERIES,
+                   POOL_WAIT_SECONDS, POOL_EVENTS):
+        lines.extend(metric.render())
+    lines.extend(_pool_gauges())
+    lines += ["# HELP agency_db_statement_info SQL text of each statement fingerprint.",
+              "# TYPE agency_db_statement_info gauge"]
+    with _statements_lock:
+        statements = sorted(_statements.items())
+    lines.extend(
+        f'agency_db_statement_info{{fingerprint="{digest}",statement="{_escape(text[:500])}"}} 1'
+        for digest, text in statements
+    )
+    for kind, values in (("gauge", gauges), ("counter", counters)):
+        for name, value in (values or {}).items():
+            lines += [f"# TYPE {name} {kind}", f"{name} {value:g}"]
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Numeric, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Date, Numeric, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship, declarative_base, Mapped # <-- Mapped is critical here
 from typing import List, Optional
 from .database import Base
@@ -8,6 +8,11 @@ from .database import Base
 # ===============================
 class Personnel(Base):
     __tablename__ = 'personnel'
+    __table_args__ = (
+        Index('ix_personnel_type_id', 'personnel_type', 'personnel_id'),
+        Index('ix_personnel_name', 'name'),
+        Index('ix_personnel_contract', 'contract_hire_date', 'contract_expiration_date'),
+    )
     personnel_id: int = Column(Integer, primary_key=True)
     name: str = Column(String(50))
     email: str = Column(String(50))
@@ -64,6 +69,10 @@ class PartnerPersonnel(Base):
 
 class Production(Base):
     __tablename__ = 'production'
+    __table_args__ = (
+        Index('ix_production_hire_date', 'contract_hire_date'),
+        Index('ix_production_title', 'title'),
+    )
     production_id: int = Column(Integer, primary_key=True)
     title: str = Column(String(50))
     production_type: str = Column(String(50))
@@ -81,6 +90,9 @@ class Production(Base):
 
 class GeneralProduction(Base):
     __tablename__ = 'generalproduction'
+    __table_args__ = (
+        Index('ix_generalproduction_genre', 'genre', 'production_id'),
+    )
     production_id: int = Column(Integer, ForeignKey('production.production_id'), primary_key=True)
     genre: str = Column(String(50))
     plan_release_quarter: int = Column(Integer)
@@ -110,6 +122,9 @@ class ProductionExpense(Base):
 
 class PersonnelAssignment(Base):
     __tablename__ = 'personnelassignment'
+    __table_args__ = (
+        Index('ix_personnelassignment_production', 'production_id', 'personnel_id'),
+    )
     personnel_id: int = Column(Integer, ForeignKey('personnel.personnel_id'), primary_key=True)
     production_id: int = Column(Integer, ForeignKey('production.production_id'), primary_key=True)
     role_title: str = Column(String(50))
@@ -119,6 +134,10 @@ class PersonnelAssignment(Base):
 
 class ProductionSchedule(Base):
     __tablename__ = 'productionschedule'
+    __table_args__ = (
+        Index('ix_productionschedule_start_end', 'start_dt', 'end_dt', 'personnel_id'),
+        Index('ix_productionschedule_personnel_start', 'personnel_id', 'start_dt', 'end_dt'),
+    )
     prod_schedule_id: int = Column(Integer, primary_key=True)
     production_id: int = Column(Integer, ForeignKey('production.production_id'))
     personnel_id: int = Column(Integer, ForeignKey('personnel.personnel_id'))
@@ -147,6 +166,10 @@ class RentalPlace(Base):
 
 class RentalUsage(Base):
     __tablename__ = 'rentalusage'
+    __table_args__ = (
+        Index('ix_rentalusage_place_time', 'place_id', 'start_time', 'end_time'),
+        Index('ix_rentalusage_time', 'start_time', 'end_time', 'place_id'),
+    )
     usage_id: int = Column(Integer, primary_key=True)
     production_id: int = Column(Integer, ForeignKey('production.production_id'))
     place_id: int = Column(Integer, ForeignKey('rentalplace.place_id'))
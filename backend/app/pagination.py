@@ -0,0 +1,160 @@
+import base64
+import json
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from weakref import WeakKeyDictionary
+
+from fastapi import HTTPException, Query
+from sqlalchemy import and_, bindparam, false, or_
+from sqlalchemy.sql import ColumnElement, Select
+
+# =================================================================
+# KEYSET PAGINATION FOR LIST ENDPOINTS
+# =================================================================
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 10000
+
+
+class PageParams:
+    """
+    Shared query parameters of the paginated list endpoints. Without `limit` or
+    `cursor` an endpoint returns every row, as before.
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(
+            None, ge=1, le=MAX_PAGE_SIZE,
+            description=f"Page size. Defaults to {DEFAULT_PAGE_SIZE} when a cursor is given."),
+        cursor: Optional[str] = Query(
+            None, description="The `next_cursor` of the previous page."),
+        stream: bool = Query(
+            False, description="Stream rows as NDJSON (application/x-ndjson) instead of one JSON document.")
+    ):
+        self.limit = limit if limit is not None or cursor is None else DEFAULT_PAGE_SIZE
+        self.cursor = cursor
+        self.stream = stream
+
+
+# -----------------------------------------------------------------
+# Cursor encoding
+# -----------------------------------------------------------------
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "$dt" in value:
+            return datetime.fromisoformat(value["$dt"])
+        if "$d" in value:
+            return date.fromisoformat(value["$d"])
+        if "$dec" in value:
+            return Decimal(value["$dec"])
+        raise ValueError("unknown cursor value")
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(v) for v in json.loads(raw)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from None
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
+
+
+# -----------------------------------------------------------------
+# Keyset ordering
+# -----------------------------------------------------------------
+
+class Keyset:
+    """
+    The ordering of a paginated query, as (expression, row field, descending)
+    triples. The keys must make the order total, so the last one is usually a
+    primary key. Set `aggregate` when a key is an aggregate, so the seek
+    condition goes into HAVING instead of WHERE.
+    """
+
+    def __init__(self, *keys: Tuple[ColumnElement, str, bool], aggregate: bool = False):
+        self.keys = keys
+        self.aggregate = aggregate
+        # Ordered (and limited) versions of the statements passed to `apply`.
+        # Handlers pass module-level statements, so each is built once per process.
+        self._ordered: "WeakKeyDictionary[Select, Dict[bool, Select]]" = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _beyond(expr: ColumnElement, value: Any, descending: bool) -> ColumnElement:
+        # MySQL and SQLite sort NULL first ascending (and so last descending).
+        if value is None:
+            return false() if descending else expr.is_not(None)
+        if descending:
+            return or_(expr < value, expr.is_(None))
+        return expr > value
+
+    def _after(self, values: List[Any]) -> ColumnElement:
+        # (k1, k2, ...) > (v1, v2, ...) expanded so each key can have its own direction:
+        # k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...
+        clauses = []
+        for i, (expr, _, descending) in enumerate(self.keys):
+            equal = [self.keys[j][0] == values[j] for j in range(i)]
+            clauses.append(and_(*equal, self._beyond(expr, values[i], descending)))
+        return or_(*clauses)
+
+    def _order(self, stmt: Select, limited: bool) -> Select:
+        with self._lock:
+            ordered = self._ordered.setdefault(stmt, {})
+            if limited not in ordered:
+                selected = {c.key for c in stmt.selected_columns}
+                hidden = [expr.label(field) for expr, field, _ in self.keys if field not in selected]
+                prepared = stmt.add_columns(*hidden) if hidden else stmt
+                prepared = prepared.order_by(
+                    *(expr.desc() if descending else expr.asc() for expr, _, descending in self.keys))
+                if limited:
+                    prepared = prepared.limit(bindparam("page_limit"))
+                ordered[limited] = prepared
+            return ordered[limited]
+
+    def apply(self, stmt: Select, page: PageParams) -> Select:
+        """
+        Adds the ORDER BY, the seek condition for `page.cursor` and the LIMIT to `stmt`.
+        Keys that are not selected yet (e.g. a tie-breaking primary key) are appended
+        as extra trailing columns, after the ones the endpoint returns. The page size
+        is the `page_limit` parameter (see `params`), so without a cursor the result
+        is the same statement object on every call.
+        """
+        stmt = self._order(stmt, page.limit is not None)
+        if page.cursor:
+            after = self._after(decode_cursor(page.cursor, len(self.keys)))
+            stmt = stmt.having(after) if self.aggregate else stmt.where(after)
+        return stmt
+
+    @staticmethod
+    def params(page: PageParams) -> Dict[str, Any]:
+        """Bound parameters of the statement returned by `apply`."""
+        return {"page_limit": page.limit} if page.limit is not None else {}
+
+    def next_cursor(self, rows: Sequence[Any], page: PageParams) -> Optional[str]:
+        """The cursor of the page after `rows`, or None when this was the last page."""
+        if page.limit is None or len(rows) < page.limit:
+            return None
+        last = rows[-1]
+        return encode_cursor([getattr(last, field) for _, field, _ in self.keys])
@@ -0,0 +1,127 @@
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from functools import reduce
+from itertools import chain
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .intervals import (
+    Interval, covered_by_at_least, free_intervals, intersect_ranges,
+    merge_intervals, naive, start_ranges
+)
+from .models import Personnel, ProductionSchedule, RentalPlace, RentalUsage
+from .schemas import WindowSearchRequest
+
+# =================================================================
+# EARLIEST COMMON FREE WINDOWS
+# =================================================================
+# Answers "when are these people and a suitable place all free?" for a whole
+# horizon from one read of the busy intervals, instead of one Q2 and one Q3
+# call per candidate window:
+#
+#   1. per resource, merge its busy intervals and take the free gaps in the
+#      horizon, then the closed range of start times where the window fits;
+#   2. per requirement ("3 Actors", "1 Studio"), sweep those ranges to find
+#      the times at which at least that many resources can start the window;
+#   3. intersect the requirements' ranges and read off the earliest grid starts.
+
+
+def _feasible_starts(
+    rows: List[Tuple[int, datetime, datetime]],
+    resource_ids: List[int],
+    lo: datetime,
+    hi: datetime,
+    duration: timedelta
+) -> Dict[int, List[Interval]]:
+    busy: Dict[int, List[Interval]] = {}
+    for resource_id, start, end in rows:
+        busy.setdefault(resource_id, []).append((start, end))
+    feasible = {}
+    for resource_id in resource_ids:
+        starts, ends = merge_intervals(busy.get(resource_id, []))
+        ranges = start_ranges(free_intervals(starts, ends, lo, hi), duration)
+        if ranges:
+            feasible[resource_id] = ranges
+    return feasible
+
+
+def _can_start(ranges: List[Interval], at: datetime) -> bool:
+    idx = bisect_right(ranges, (at, datetime.max)) - 1
+    return idx >= 0 and ranges[idx][1] >= at
+
+
+def find_windows(db: Session, request: WindowSearchRequest) -> List[Dict[str, Any]]:
+    """The earliest `request.limit` grid-aligned windows in which every requirement is met at once."""
+    lo, hi = naive(request.horizon_start), naive(request.horizon_end)
+    duration = timedelta(minutes=request.duration_minutes)
+    step = timedelta(minutes=request.step_minutes)
+
+    needs: Dict[str, int] = {}
+    for need in request.personnel:
+        needs[need.personnel_type] = needs.get(need.personnel_type, 0) + need.count
+
+    requirements: List[List[Interval]] = []
+    people: Dict[str, Dict[int, List[Interval]]] = {}
+    if needs:
+        personnel_rows = db.execute(
+            select(Personnel.personnel_id, Personnel.personnel_type)
+            .where(Personnel.personnel_type.in_(sorted(needs)))
+            .order_by(Personnel.personnel_id)
+        ).all()
+        schedule_rows = db.execute(
+            select(ProductionSchedule.personnel_id, ProductionSchedule.start_dt, ProductionSchedule.end_dt)
+            .join(Personnel, ProductionSchedule.personnel_id == Personnel.personnel_id)
+            .where(
+                Personnel.personnel_type.in_(sorted(needs)),
+                ProductionSchedule.start_dt < hi,
+                ProductionSchedule.end_dt > lo
+            )
+        ).all()
+        feasible = _feasible_starts(schedule_rows, [r.personnel_id for r in personnel_rows], lo, hi, duration)
+        for r in personnel_rows:
+            if r.personnel_id in feasible:
+                people.setdefault(r.personnel_type, {})[r.personnel_id] = feasible[r.personnel_id]
+        for personnel_type, count in needs.items():
+            candidates = people.get(personnel_type, {})
+            requirements.append(covered_by_at_least(chain.from_iterable(candidates.values()), count))
+
+    places: Dict[int, List[Interval]] = {}
+    if request.needs_place:
+        place_filter = []
+        if request.place_type is not None:
+            place_filter.append(RentalPlace.type == request.place_type)
+        if request.min_capacity is not None:
+            place_filter.append(RentalPlace.capacity >= request.min_capacity)
+        place_ids = list(db.execute(
+            select(RentalPlace.place_id).where(*place_filter).order_by(RentalPlace.place_id)
+        ).scalars())
+        usage_rows = db.execute(
+            select(RentalUsage.place_id, RentalUsage.start_time, RentalUsage.end_time)
+            .join(RentalPlace, RentalUsage.place_id == RentalPlace.place_id)
+            .where(*place_filter, RentalUsage.start_time < hi, RentalUsage.end_time > lo)
+        ).all()
+        places = _feasible_starts(usage_rows, place_ids, lo, hi, duration)
+        requirements.append(covered_by_at_least(chain.from_iterable(places.values()), 1))
+
+    windows: List[Dict[str, Any]] = []
+    for first, last in reduce(intersect_ranges, requirements):
+        # First grid point at or after `first`: ceil((first - lo) / step) steps, in exact arithmetic.
+        at = lo - ((lo - first) // step) * step
+        while at <= last and len(windows) < request.limit:
+            windows.append({
+                "start_dt": at.isoformat(),
+                "end_dt": (at + duration).isoformat(),
+                "personnel": {
+                    personnel_type: [
+                        pid for pid, ranges in people.get(personnel_type, {}).items() if _can_start(ranges, at)
+                    ]
+                    for personnel_type in needs
+                },
+                "places": [place_id for place_id, ranges in places.items() if _can_start(ranges, at)]
+            })
+            at += step
+        if len(windows) >= request.limit:
+            break
+    return windows
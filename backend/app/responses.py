@@ -0,0 +1,134 @@
+import json
+import time
+from contextvars import ContextVar
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import Query, Request
+from fastapi.responses import JSONResponse
+
+from .metrics import record_rows, record_serialization
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt, stdlib json is the fallback
+    orjson = None
+
+# =================================================================
+# FAST RESPONSE PATH FOR THE APIResponse ENVELOPE
+# =================================================================
+# Routes still declare `response_model=APIResponse` for the OpenAPI schema,
+# but return an APIJSONResponse. FastAPI passes Response objects through
+# untouched, so the rows the handler already built as plain dicts are not
+# re-validated by Pydantic and run through jsonable_encoder a second time.
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes `content` to JSON bytes with orjson, or the stdlib when it is unavailable."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class APIJSONResponse(JSONResponse):
+    """JSONResponse rendered with `dumps`."""
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = dumps(content)
+        record_serialization(time.perf_counter() - start)
+        return body
+
+    @classmethod
+    def from_body(cls, body: bytes) -> "APIJSONResponse":
+        """Rebuilds a response from an already rendered body (e.g. a cache hit)."""
+        response = cls(content=None)
+        response.body = body
+        response.init_headers()
+        return response
+
+
+# =================================================================
+# COLUMNAR ENCODING
+# =================================================================
+# `?format=columnar` (or `Accept: application/vnd.agency.columnar+json`)
+# replaces the `data` list of row objects by `columns`: one array per entry
+# of `key`, so the key names are not repeated in every row. Columnar bodies
+# are sent as that media type, and every envelope with `Vary: Accept`, so
+# caches keep the two formats of a URL apart.
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.agency.columnar+json"
+
+_response_format: ContextVar[str] = ContextVar("response_format", default="rows")
+
+
+async def negotiate_format(
+    request: Request,
+    format: Optional[Literal["rows", "columnar"]] = Query(
+        None, description="'columnar' returns one array per column instead of one object per row.")
+) -> None:
+    """
+    Router-level dependency choosing the envelope of `api_response` for this request.
+    It is async so the choice is made in the request's context, which FastAPI
+    copies into the threadpool worker running a sync handler.
+    """
+    if format is None:
+        format = "columnar" if COLUMNAR_MEDIA_TYPE in request.headers.get("accept", "") else "rows"
+    _response_format.set(format)
+
+
+def response_format() -> str:
+    """The envelope negotiated for the current request: 'rows' or 'columnar'."""
+    return _response_format.get()
+
+
+def with_format_headers(response: APIJSONResponse) -> APIJSONResponse:
+    """Sets the media type of the negotiated format and `Vary: Accept` on an envelope response."""
+    if _response_format.get() == "columnar":
+        response.headers["content-type"] = COLUMNAR_MEDIA_TYPE
+    response.headers.add_vary_header("Accept")
+    return response
+
+
+def to_columns(key: List[str], data: List[Dict[str, Any]]) -> List[List[Any]]:
+    """Transposes row dicts into one list per key."""
+    return [[row.get(k) for row in data] for k in key]
+
+
+def to_rows(key: List[str], columns: List[List[Any]]) -> List[Dict[str, Any]]:
+    """Inverse of `to_columns`."""
+    return [dict(zip(key, values)) for values in zip(*columns)]
+
+
+def api_response(key: List[str], data: List[Dict[str, Any]], next_cursor: Optional[str] = None) -> APIJSONResponse:
+    """Builds the universal `APIResponse` envelope, in the negotiated format, without Pydantic validation."""
+    record_rows(len(data))
+    if _response_format.get() == "columnar":
+        content = {"count": len(data), "key": key, "columns": to_columns(key, data), "next_cursor": next_cursor}
+    else:
+        content = {"count": len(data), "key": key, "data": data, "next_cursor": next_cursor}
+    return with_format_headers(APIJSONResponse(content))
+
+
+def api_columns_response(
+    key: List[str],
+    columns: List[List[Any]],
+    count: int,
+    next_cursor: Optional[str] = None
+) -> APIJSONResponse:
+    """Same envelope as `api_response`, built from column lists: the columnar format needs no per-row dicts at all."""
+    record_rows(count)
+    if _response_format.get() == "columnar":
+        content = {"count": count, "key": key, "columns": columns, "next_cursor": next_cursor}
+    else:
+        content = {"count": count, "key": key, "data": to_rows(key, columns), "next_cursor": next_cursor}
+    return with_format_headers(APIJSONResponse(content))
@@ -0,0 +1,99 @@
+import tempfile
+from typing import Any, Dict, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ..bulk import (
+    DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, MEDIA_TYPES,
+    UnreadableFile, UnsupportedFormat, check_format, export_chunks, import_file
+)
+from ..database import get_db
+
+router = APIRouter(
+    prefix="/bulk",
+    tags=["Bulk Import & Export"]
+)
+
+BulkTable = Literal["personnel", "productions", "schedules", "rental-usages"]
+FileFormat = Literal["csv", "ndjson", "parquet"]
+
+# Uploads up to this size stay in memory; larger ones are spooled to disk.
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+
+# =================================================================
+# ROUTE 1: Bulk Import
+# =================================================================
+
+@router.post(
+    "/{table}/import",
+    summary="Bulk-insert rows from a CSV, NDJSON or Parquet request body"
+)
+async def import_table(
+    request: Request,
+    table: BulkTable,
+    file_format: FileFormat = Query("csv", description="Format of the request body."),
+    batch_size: int = Query(
+        DEFAULT_BATCH_SIZE, ge=1, le=MAX_BATCH_SIZE,
+        description="Rows per INSERT; every chunk is committed in its own transaction."),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Validates every row of the uploaded file and inserts the valid ones in chunks
+    of `batch_size` with one multi-row INSERT each. Invalid rows (bad values,
+    duplicate ids, unknown foreign keys) are skipped and reported by row number;
+    the response counts received, inserted and rejected rows. A body that cannot
+    be read as the given format (not UTF-8, broken CSV quoting, not Parquet) is
+    rejected with 400; chunks committed before the unreadable part are kept.
+    """
+    try:
+        check_format(file_format)
+    except UnsupportedFormat as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            return await run_in_threadpool(import_file, db, spool, table, file_format, batch_size)
+        except UnreadableFile as exc:
+            # Drops the chunk being read; the chunks before it are committed.
+            await run_in_threadpool(db.rollback)
+            raise HTTPException(status_code=400, detail=str(exc))
+        except Exception:
+            await run_in_threadpool(db.rollback)
+            raise
+
+
+# =================================================================
+# ROUTE 2: Streaming Export
+# =================================================================
+
+@router.get(
+    "/{table}/export",
+    summary="Stream a whole table as CSV, NDJSON or Parquet"
+)
+def export_table(
+    table: BulkTable,
+    file_format: FileFormat = Query("ndjson", description="Format of the exported file.")
+) -> StreamingResponse:
+    """
+    Streams every row of the table, ordered by primary key, while it is read
+    from the database. The output can be imported again as is. The rows are
+    read after this handler has returned, so the export opens its own session
+    instead of the request's.
+    """
+    try:
+        check_format(file_format)
+    except UnsupportedFormat as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+
+    return StreamingResponse(
+        export_chunks(table, file_format),
+        media_type=MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{file_format}"'}
+    )
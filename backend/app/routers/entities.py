@@ -0,0 +1,159 @@
+from typing import Any, Dict, List, Literal
+
+from fastapi import APIRouter, Body, Depends
+from sqlalchemy.orm import Session
+
+from ..crud import STATEMENTS, create_rows, delete_row, delete_rows, get_row, update_row, update_rows
+from ..database import get_db
+from ..pagination import DEFAULT_PAGE_SIZE, PageParams
+from ..query import run_query
+from ..responses import APIJSONResponse, api_response
+from ..schemas import APIResponse
+
+router = APIRouter(
+    prefix="/entities",
+    tags=["Entity CRUD"]
+)
+
+Entity = Literal["personnel", "productions", "rental-places"]
+
+
+# =================================================================
+# ROUTE 1: List Rows
+# =================================================================
+
+@router.get(
+    "/{entity}",
+    response_model=APIResponse,
+    summary="List personnel, productions or rental places by id, one bounded page at a time"
+)
+def list_entities(
+    entity: Entity,
+    db: Session = Depends(get_db),
+    page: PageParams = Depends()
+) -> Dict[str, Any]:
+    """
+    Returns the rows ordered by primary key. Unlike the query endpoints, a page
+    is always bounded: without `limit` it holds at most the default page size,
+    and `next_cursor` continues after its last id.
+    """
+    if page.limit is None:
+        page.limit = DEFAULT_PAGE_SIZE
+    statements = STATEMENTS[entity]
+    return run_query(db, statements.select, keyset=statements.keyset, page=page)
+
+
+# =================================================================
+# ROUTE 2: Get One Row
+# =================================================================
+
+@router.get(
+    "/{entity}/{key}",
+    response_model=APIResponse,
+    summary="Get one personnel, production or rental place by id"
+)
+def get_entity(
+    entity: Entity,
+    key: int,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Returns the row with primary key `key`, or 404."""
+    row = get_row(db, entity, key)
+    return api_response(list(row), [row])
+
+
+# =================================================================
+# ROUTE 3: Bulk Create
+# =================================================================
+
+@router.post(
+    "/{entity}",
+    summary="Insert up to 1000 rows with one INSERT"
+)
+def create_entities(
+    entity: Entity,
+    rows: List[Dict[str, Any]] = Body(..., description="Full rows, including their primary key."),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Validates every row and inserts them all in one statement and one transaction.
+    Invalid rows are listed by position (422); a duplicate or unknown key rejects
+    the whole batch (409).
+    """
+    return APIJSONResponse(create_rows(db, entity, rows), status_code=201)
+
+
+# =================================================================
+# ROUTE 4: Bulk Update
+# =================================================================
+
+@router.patch(
+    "/{entity}",
+    summary="Change columns of up to 1000 rows with UPDATE ... WHERE statements"
+)
+def update_entities(
+    entity: Entity,
+    rows: List[Dict[str, Any]] = Body(..., description="Primary key plus the columns to change, per row."),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Sets the given columns of each row without reading it first, with one
+    executemany `UPDATE ... WHERE` per distinct set of changed columns, in one
+    transaction. `updated` counts the ids that exist.
+    """
+    return APIJSONResponse(update_rows(db, entity, rows), status_code=200)
+
+
+# =================================================================
+# ROUTE 5: Bulk Delete
+# =================================================================
+
+@router.delete(
+    "/{entity}",
+    summary="Delete up to 1000 rows by id with one DELETE"
+)
+def delete_entities(
+    entity: Entity,
+    keys: List[int] = Body(..., description="Primary keys of the rows to delete."),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Deletes the rows in one `DELETE ... WHERE id IN (...)`. Rows still referenced
+    by other tables reject the batch (409). `deleted` counts the ids that existed.
+    """
+    return APIJSONResponse(delete_rows(db, entity, keys), status_code=200)
+
+
+# =================================================================
+# ROUTE 6: Update One Row
+# =================================================================
+
+@router.patch(
+    "/{entity}/{key}",
+    summary="Change columns of one row with a single UPDATE ... WHERE"
+)
+def update_entity(
+    entity: Entity,
+    key: int,
+    changes: Dict[str, Any] = Body(..., description="The columns to change."),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Sets the given columns of the row with primary key `key`, or returns 404."""
+    return APIJSONResponse(update_row(db, entity, key, changes), status_code=200)
+
+
+# =================================================================
+# ROUTE 7: Delete One Row
+# =================================================================
+
+@router.delete(
+    "/{entity}/{key}",
+    summary="Delete one row by id"
+)
+def delete_entity(
+    entity: Entity,
+    key: int,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Deletes the row with primary key `key`, or returns 404."""
+    return APIJSONResponse(delete_row(db, entity, key), status_code=200)
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, or_
+from sqlalchemy import bindparam, select, func, or_
+from sqlalchemy.sql import Select
 from datetime import datetime, date
-from typing import Dict, Any, List, Optional
+from functools import lru_cache
+from typing import Dict, Any, List, Literal, Optional, Tuple
 
 from ..models import (
     Personnel, 
@@ -14,6 +16,12 @@ from ..models import (
 )
 from ..schemas import APIResponse 
 from ..database import get_db
+from ..pagination import Keyset, PageParams
+from ..query import run_query
+from ..cache import result_cache
+from ..search import contains_clause, search_index
+from ..aggregates import aggregate_store
+from ..responses import api_response
 
 router = APIRouter(
     prefix="/stats",
@@ -25,205 +33,244 @@ router = APIRouter(
 # ROUTE 1: All Personnel and Assignments (Searchable) (Query 7)
 # =================================================================
 
+_SEARCH_SOURCE = Query(
+    "index",
+    description="'index' matches search terms with the in-memory trigram index, 'sql' with LIKE '%term%'."
+)
+
+
+def _or_na(value: Optional[str]) -> str:
+    return value if value else "N/A"
+
+
+def _search_param(db: Session, field: str, term: str, source: str) -> Tuple[bool, Any]:
+    # (True, ids) for an IN list from the index, (False, pattern) for LIKE.
+    if source == "index":
+        return search_index.contains_param(db, field, term)
+    return False, f"%{term}%"
+
+
+_assignment_formatters = {"production_title": _or_na, "role_title": _or_na}
+
+# production_id is NULL only for the single row of a person without assignments.
+_assignment_keyset = Keyset(
+    (Personnel.name, "personnel_name", False),
+    (Personnel.personnel_id, "personnel_id", False),
+    (PersonnelAssignment.production_id, "production_id", False)
+)
+
+_assignments = (
+    select(
+        Personnel.name.label("personnel_name"),
+        Personnel.personnel_type,
+        Production.title.label("production_title"),
+        PersonnelAssignment.role_title
+    )
+    .outerjoin(PersonnelAssignment, Personnel.personnel_id == PersonnelAssignment.personnel_id)
+    .outerjoin(Production, PersonnelAssignment.production_id == Production.production_id)
+)
+
+
+@lru_cache(maxsize=None)
+def _assignments_matching(name_by_ids: Optional[bool], title_by_ids: Optional[bool]) -> Select:
+    # One statement per filter shape: absent (None), id IN list (True) or LIKE (False).
+    filters = []
+    if name_by_ids is not None:
+        filters.append(contains_clause("personnel", name_by_ids, "name_match"))
+    if title_by_ids is not None:
+        filters.append(contains_clause("production", title_by_ids, "title_match"))
+    return _assignments.where(or_(*filters)) if filters else _assignments
+
+
 @router.get(
     "/personnel/assignments",
     response_model=APIResponse,
     summary="(Q7)List all personnel and their assignments (Searchable)"
 )
+@result_cache.cached(Personnel, PersonnelAssignment, Production)
 def list_all_personnel_assignments(
     db: Session = Depends(get_db),
     name_search: Optional[str] = Query(None, description="Partial name of personnel to search for."),
-    title_search: Optional[str] = Query(None, description="Partial title of production to search for.")
+    title_search: Optional[str] = Query(None, description="Partial title of production to search for."),
+    source: Literal["index", "sql"] = _SEARCH_SOURCE,
+    page: PageParams = Depends()
 ) -> Dict[str, Any]:
     """
     Lists all personnel, their assigned production, and their role. 
     Allows filtering by personnel name or production title using partial matches.
+    Supports keyset pagination and NDJSON streaming.
     """
-    stmt = (
-        select(
-            Personnel.name.label("personnel_name"),
-            Personnel.personnel_type,
-            Production.title.label("production_title"),
-            PersonnelAssignment.role_title
-        )
-        .outerjoin(PersonnelAssignment, Personnel.personnel_id == PersonnelAssignment.personnel_id)
-        .outerjoin(Production, PersonnelAssignment.production_id == Production.production_id)
-        .order_by(Personnel.name)
-    )
-
-    filters = []
+    params: Dict[str, Any] = {}
+    name_by_ids = title_by_ids = None
     if name_search:
-        filters.append(Personnel.name.like(f"%{name_search}%"))
+        name_by_ids, params["name_match"] = _search_param(db, "personnel", name_search, source)
     if title_search:
-        filters.append(Production.title.like(f"%{title_search}%"))
-        
-    if filters:
-        stmt = stmt.where(or_(*filters))
-
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "personnel_name": r.personnel_name,
-            "personnel_type": r.personnel_type,
-            "production_title": r.production_title if r.production_title else "N/A",
-            "role_title": r.role_title if r.role_title else "N/A"
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["personnel_name", "personnel_type", "production_title", "role_title"],
-        "data": data_list
-    }
+        title_by_ids, params["title_match"] = _search_param(db, "production", title_search, source)
+
+    return run_query(
+        db, _assignments_matching(name_by_ids, title_by_ids),
+        keyset=_assignment_keyset, page=page, formatters=_assignment_formatters, params=params
+    )
 
 
 # =================================================================
 # ROUTE 2: Personnel Contract Details in Range (Query 8)
 # =================================================================
 
+_contracts = (
+    select(
+        Personnel.personnel_id,
+        Personnel.name,
+        Personnel.personnel_type,
+        Personnel.contract_hire_date,
+        Personnel.contract_expiration_date
+    )
+    .where(Personnel.contract_hire_date <= bindparam("end_date"))
+    .where(Personnel.contract_expiration_date >= bindparam("start_date"))
+)
+
+
+@lru_cache(maxsize=None)
+def _contracts_matching(name_by_ids: Optional[bool]) -> Select:
+    if name_by_ids is None:
+        return _contracts
+    return _contracts.where(contains_clause("personnel", name_by_ids, "name_match"))
+
+
 @router.get(
     "/personnel/contracts",
     response_model=APIResponse,
     summary="(Q8)Personnel Contract Overlap (Searchable)"
 )
+@result_cache.cached(Personnel)
 def list_personnel_contract_data(
     db: Session = Depends(get_db),
     start_date: date = Query(..., description="Start date of the required contract period."),
     end_date: date = Query(..., description="End date of the required contract period."),
-    name_search: Optional[str] = Query(None, description="Partial name of personnel to search for.")
+    name_search: Optional[str] = Query(None, description="Partial name of personnel to search for."),
+    source: Literal["index", "sql"] = _SEARCH_SOURCE
 ) -> Dict[str, Any]:
     """
     Displays personnel whose contract duration overlaps with the specified date range. 
     Allows optional filtering by personnel name.
     """
-    stmt = (
-        select(
-            Personnel.personnel_id,
-            Personnel.name,
-            Personnel.personnel_type,
-            Personnel.contract_hire_date,
-            Personnel.contract_expiration_date
-        )
-        .where(Personnel.contract_hire_date <= end_date)
-        .where(Personnel.contract_expiration_date >= start_date)
-    )
-
+    params: Dict[str, Any] = {"start_date": start_date, "end_date": end_date}
+    name_by_ids = None
     if name_search:
-        stmt = stmt.where(Personnel.name.like(f"%{name_search}%"))
-    
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "personnel_id": r.personnel_id,
-            "name": r.name,
-            "personnel_type": r.personnel_type,
-            "contract_hire_date": r.contract_hire_date.isoformat(),
-            "contract_expiration_date": r.contract_expiration_date.isoformat()
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["personnel_id", "name", "personnel_type", "contract_hire_date", "contract_expiration_date"],
-        "data": data_list
-    }
+        name_by_ids, params["name_match"] = _search_param(db, "personnel", name_search, source)
+
+    return run_query(db, _contracts_matching(name_by_ids), params=params)
 
 
 # =================================================================
 # ROUTE 3: Production Expense Summary (Query 11)
 # =================================================================
 
+_total_expense = func.coalesce(func.sum(ProductionExpense.amount), 0)
+
+_expense_keyset = Keyset(
+    (_total_expense, "total_expense", True),
+    (Production.title, "production_title", False),
+    aggregate=True
+)
+
+_expense_summary = (
+    select(
+        Production.title.label("production_title"),
+        _total_expense.label("total_expense")
+    )
+    .outerjoin(ProductionExpense, Production.production_id == ProductionExpense.production_id)
+    .group_by(Production.title)
+)
+
+
 @router.get(
     "/production/expenses/summary",
     response_model=APIResponse,
     summary="(Q11)Total expenses grouped by production"
 )
+@result_cache.cached(Production, ProductionExpense)
 def show_production_expense_summary(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    source: Literal["index", "sql"] = Query(
+        "index",
+        description="'index' reads the incrementally maintained totals, 'sql' runs the GROUP BY on the database."
+    ),
+    page: PageParams = Depends()
 ) -> Dict[str, Any]:
     """
     Calculates the total expense amount for every production, including productions with zero expenses.
+    Supports keyset pagination and NDJSON streaming (streams always run the SQL query).
     """
-    stmt = (
-        select(
-            Production.title.label("production_title"),
-            func.sum(ProductionExpense.amount).label("total_expense")
-        )
-        .outerjoin(ProductionExpense, Production.production_id == ProductionExpense.production_id)
-        .group_by(Production.title)
-        .order_by(func.sum(ProductionExpense.amount).desc())
-    )
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "production_title": r.production_title,
-            "total_expense": float(r.total_expense) if r.total_expense is not None else 0.0
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["production_title", "total_expense"],
-        "data": data_list
-    }
+    if source == "index" and not page.stream:
+        data_list, next_cursor = aggregate_store.expense_summary(db, page)
+        return api_response(["production_title", "total_expense"], data_list, next_cursor=next_cursor)
+
+    return run_query(db, _expense_summary, keyset=_expense_keyset, page=page, formatters={"total_expense": float})
 
 
 # =================================================================
 # ROUTE 4: List All Performers (Query 12)
 # =================================================================
 
+_performer_keyset = Keyset(
+    (Personnel.name, "performer_name", False),
+    (Personnel.personnel_id, "personnel_id", False)
+)
+
+_performers = (
+    select(
+        Personnel.name.label("performer_name"),
+        Performer.performance_type,
+        Performer.agency
+    )
+    .join(Performer, Personnel.personnel_id == Performer.personnel_id)
+)
+
+
 @router.get(
     "/performers",
     response_model=APIResponse,
     summary="(Q12)List all performers and their performance types/agencies"
 )
+@result_cache.cached(Personnel, Performer)
 def list_all_performers(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    page: PageParams = Depends()
 ) -> Dict[str, Any]:
     """
     Lists all individuals classified as performers, along with their performance type and agency.
+    Supports keyset pagination and NDJSON streaming.
     """
-    stmt = (
-        select(
-            Personnel.name.label("performer_name"),
-            Performer.performance_type,
-            Performer.agency
-        )
-        .join(Performer, Personnel.personnel_id == Performer.personnel_id)
-        .order_by(Personnel.name)
-    )
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "performer_name": r.performer_name,
-            "performance_type": r.performance_type,
-            "agency": r.agency
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["performer_name", "performance_type", "agency"],
-        "data": data_list
-    }
+    return run_query(db, _performers, keyset=_performer_keyset, page=page)
 
 
 # =================================================================
 # ROUTE 5: Find Partners and Their Contracted Personnel (Query 13)
 # =================================================================
 
+_performer_id = (
+    select(Personnel.personnel_id)
+    .join(Performer, Personnel.personnel_id == Performer.personnel_id)
+    .where(Personnel.name == bindparam("performer_name"))
+)
+
+_partners = (
+    select(
+        PartnerPersonnel.name.label("partner_name"),
+        PartnerPersonnel.service_type,
+        Personnel.name.label("personnel_name")
+    )
+    .join(Personnel, PartnerPersonnel.personnel_id == Personnel.personnel_id)
+    .where(PartnerPersonnel.personnel_id == bindparam("personnel_id"))
+    .order_by(PartnerPersonnel.name)
+)
+
 @router.get(
     "/partners/for-performer",
     summary="(Q13)Find all partners contracted with a specific Performer"
 )
+@result_cache.cached(Personnel, Performer, PartnerPersonnel)
 def get_partners_by_performer_name(
     db: Session = Depends(get_db),
     performer_name: str = Query(..., description="Full name of the Performer (e.g., 'Alice Kim').")
@@ -232,39 +279,6 @@ def get_partners_by_performer_name(
     Retrieves all external partners and their service types that are contracted
     with the specified personnel, provided that personnel is a Performer.
     """
+    personnel_id = db.execute(_performer_id, {"performer_name": performer_name}).scalar_one_or_none()
 
-    personnel_id_stmt = (
-        select(Personnel.personnel_id)
-        .join(Performer, Personnel.personnel_id == Performer.personnel_id)
-        .where(Personnel.name == performer_name)
-    )
-
-    personnel_id = db.execute(personnel_id_stmt).scalar_one_or_none()
-
-    stmt = (
-        select(
-            PartnerPersonnel.name.label("partner_name"),
-            PartnerPersonnel.service_type,
-            Personnel.name.label("personnel_name")
-        )
-        .join(Personnel, PartnerPersonnel.personnel_id == Personnel.personnel_id)
-        .where(PartnerPersonnel.personnel_id == personnel_id)
-        .order_by(PartnerPersonnel.name)
-    )
-
-    result = db.execute(stmt).all()
-
-    data_list = [
-        {
-            "partner_name": r.partner_name,
-            "service_type": r.service_type,
-            "personnel_name": r.personnel_name
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["partner_name", "service_type", "personnel_name"],
-        "data": data_list
-    }
\ No newline at end of file
+    return run_query(db, _partners, params={"personnel_id": personnel_id})
\ No newline at end of file
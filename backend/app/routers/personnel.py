@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func, literal_column
+from sqlalchemy import bindparam, select, func, literal_column
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal
 
 from ..models import Personnel, ProductionSchedule, PersonnelAssignment
 from ..schemas import APIResponse
 from ..database import get_db
+from ..responses import api_response
+from ..availability import availability_index
+from ..intervals import naive
+from ..aggregates import aggregate_store
+from ..query import run_query
 
 router = APIRouter(
     prefix="/personnel",
@@ -18,6 +23,16 @@ router = APIRouter(
 # ROUTE 1: List Personnel by Type (Query 1)
 # =================================================================
 
+_personnel_by_type = (
+    select(
+        Personnel.personnel_id,
+        Personnel.name,
+        Personnel.personnel_type
+    )
+    .where(Personnel.personnel_type.in_(bindparam("personnel_types", expanding=True)))
+    .limit(bindparam("limit"))
+)
+
 @router.get(
     "/by-type",
     response_model=APIResponse,
@@ -35,37 +50,35 @@ def list_personnel_by_type(
     """
     Retrieves a list of personnel filtered by their specified position/type.
     """
-    stmt = (
-        select(
-            Personnel.personnel_id,
-            Personnel.name,
-            Personnel.personnel_type
-        )
-        .where(Personnel.personnel_type.in_(personnel_types))
-        .limit(limit)
-    )
-    result = db.execute(stmt).all()
-
-    data_list = [
-        {
-            "personnel_id": r.personnel_id,
-            "name": r.name,
-            "personnel_type": r.personnel_type
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["personnel_id", "name", "personnel_type"],
-        "data": data_list
-    }
+    return run_query(db, _personnel_by_type, params={"personnel_types": personnel_types, "limit": limit})
 
 
 # =================================================================
 # ROUTE 2: Find Available Personnel (Query 2)
 # =================================================================
 
+_conflicting_personnel_ids = (
+    select(ProductionSchedule.personnel_id)
+    .where(
+        ProductionSchedule.start_dt < bindparam("end_dt"),
+        ProductionSchedule.end_dt > bindparam("start_dt")
+    )
+    .distinct()
+).scalar_subquery()
+
+_available_personnel = (
+    select(
+        Personnel.personnel_id,
+        Personnel.name,
+        Personnel.personnel_type
+    )
+    .where(
+        Personnel.personnel_type.in_(bindparam("personnel_types", expanding=True)),
+        Personnel.personnel_id.not_in(_conflicting_personnel_ids)
+    )
+    .order_by(Personnel.personnel_id)
+)
+
 @router.get(
     "/available",
     response_model=APIResponse,
@@ -80,54 +93,46 @@ def get_available_personnel(
     personnel_types: List[str] = Query(
         ['Actor', 'Crew'],
         description="Personnel types to check availability for."
+    ),
+    source: Literal["index", "sql"] = Query(
+        "index",
+        description="'index' answers from the in-memory availability index, 'sql' runs the anti-join on the database."
     )
 ) -> Dict[str, Any]:
     """
     Finds personnel of specified types who do not have a conflicting schedule
     between `start_dt` and `end_dt`.
     """
-    conflicting_personnel_ids = (
-        select(ProductionSchedule.personnel_id)
-        .where(
-            ProductionSchedule.start_dt < end_dt,
-            ProductionSchedule.end_dt > start_dt
-        )
-        .distinct()
-    ).scalar_subquery()
-
-    stmt = (
-        select(
-            Personnel.personnel_id,
-            Personnel.name,
-            Personnel.personnel_type
-        )
-        .where(
-            Personnel.personnel_type.in_(personnel_types),
-            Personnel.personnel_id.not_in(conflicting_personnel_ids)
-        )
-    )
-    result = db.execute(stmt).all()
+    if naive(end_dt) <= naive(start_dt):
+        raise HTTPException(status_code=422, detail="end_dt must be after start_dt")
 
-    data_list = [
-        {
-            "personnel_id": r.personnel_id,
-            "name": r.name,
-            "personnel_type": r.personnel_type
-        }
-        for r in result
-    ]
+    if source == "index":
+        data_list = availability_index.available(db, start_dt, end_dt, personnel_types)
+        return api_response(["personnel_id", "name", "personnel_type"], data_list)
 
-    return {
-        "count": len(data_list),
-        "key": ["personnel_id", "name", "personnel_type"],
-        "data": data_list
-    }
+    return run_query(
+        db, _available_personnel,
+        params={"start_dt": start_dt, "end_dt": end_dt, "personnel_types": personnel_types}
+    )
 
 
 # =================================================================
 # ROUTE 3: Top N Actors by Projects (Query 5)
 # =================================================================
 
+_top_actors = (
+    select(
+        Personnel.name,
+        func.count(PersonnelAssignment.production_id).label(
+            "total_projects")
+    )
+    .join(PersonnelAssignment, Personnel.personnel_id == PersonnelAssignment.personnel_id)
+    .where(Personnel.personnel_type.in_(['Actor', 'Actress']))
+    .group_by(Personnel.name)
+    .order_by(literal_column("total_projects").desc())
+    .limit(bindparam("n"))
+)
+
 @router.get(
     "/actors/top-projects",
     response_model=APIResponse,
@@ -136,44 +141,37 @@ def get_available_personnel(
 def get_top_n_actors_by_projects(
     db: Session = Depends(get_db),
     n: int = Query(
-        3, ge=1, description="The number of top actors/actresses to return.")
+        3, ge=1, description="The number of top actors/actresses to return."),
+    source: Literal["index", "sql"] = Query(
+        "index",
+        description="'index' reads the incrementally maintained counts, 'sql' runs the GROUP BY on the database."
+    )
 ) -> Dict[str, Any]:
     """
     Calculates and returns the top `n` actors/actresses based on their total number of production assignments.
     """
-    stmt = (
-        select(
-            Personnel.name,
-            func.count(PersonnelAssignment.production_id).label(
-                "total_projects")
-        )
-        .join(PersonnelAssignment, Personnel.personnel_id == PersonnelAssignment.personnel_id)
-        .where(Personnel.personnel_type.in_(['Actor', 'Actress']))
-        .group_by(Personnel.name)
-        .order_by(literal_column("total_projects").desc())
-        .limit(n)
-    )
-    result = db.execute(stmt).all()
-
-    data_list = [
-        {
-            "name": r.name,
-            "total_projects": r.total_projects
-        }
-        for r in result
-    ]
+    if source == "index":
+        return api_response(["name", "total_projects"], aggregate_store.top_actors(db, n))
 
-    return {
-        "count": len(data_list),
-        "key": ["name", "total_projects"],
-        "data": data_list
-    }
+    return run_query(db, _top_actors, params={"n": n})
 
 
 # =================================================================
 # ROUTE 4: Least N Actors by Jobs (Query 6)
 # =================================================================
 
+_least_actors = (
+    select(
+        Personnel.name,
+        func.count(PersonnelAssignment.production_id).label("total_jobs")
+    )
+    .outerjoin(PersonnelAssignment, Personnel.personnel_id == PersonnelAssignment.personnel_id)
+    .where(Personnel.personnel_type.in_(['Actor', 'Actress']))
+    .group_by(Personnel.name)
+    .order_by(literal_column("total_jobs").asc())
+    .limit(bindparam("n"))
+)
+
 @router.get(
     "/actors/least-jobs",
     response_model=APIResponse,
@@ -182,35 +180,17 @@ def get_top_n_actors_by_projects(
 def get_least_n_actors_by_jobs(
     db: Session = Depends(get_db),
     n: int = Query(
-        5, ge=1, description="The number of actors/actresses with the least jobs to return.")
+        5, ge=1, description="The number of actors/actresses with the least jobs to return."),
+    source: Literal["index", "sql"] = Query(
+        "index",
+        description="'index' reads the incrementally maintained counts, 'sql' runs the GROUP BY on the database."
+    )
 ) -> Dict[str, Any]:
     """
     Calculates and returns the least `n` actors/actresses based on their total number of production assignments, 
     including those with zero assignments (jobs).
     """
-    stmt = (
-        select(
-            Personnel.name,
-            func.count(PersonnelAssignment.production_id).label("total_jobs")
-        )
-        .outerjoin(PersonnelAssignment, Personnel.personnel_id == PersonnelAssignment.personnel_id)
-        .where(Personnel.personnel_type.in_(['Actor', 'Actress']))
-        .group_by(Personnel.name)
-        .order_by(literal_column("total_jobs").asc())
-        .limit(n)
-    )
-    result = db.execute(stmt).all()
-
-    data_list = [
-        {
-            "name": r.name,
-            "total_jobs": r.total_jobs
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["name", "total_jobs"],
-        "data": data_list
-    }
+    if source == "index":
+        return api_response(["name", "total_jobs"], aggregate_store.least_actors(db, n))
+
+    return run_query(db, _least_actors, params={"n": n})
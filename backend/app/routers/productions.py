@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from ..details import MAX_DETAIL_BATCH, production_details
+from ..responses import api_response
+from ..schemas import APIResponse
+
+router = APIRouter(
+    prefix="/productions",
+    tags=["Production Details"]
+)
+
+DETAIL_KEY = [
+    "production_id", "title", "production_type", "contract_hire_date", "contract_expiration_date",
+    "partner_id", "partner", "general_details", "event_details", "expenses", "assignments",
+    "schedules", "rental_usages"
+]
+
+
+# =================================================================
+# ROUTE 1: Production Details for Many Ids
+# =================================================================
+
+@router.get(
+    "",
+    response_model=APIResponse,
+    summary="Whole productions (details, partner, expenses, staff, schedule, rentals) for many ids"
+)
+def get_production_details(
+    db: Session = Depends(get_db),
+    # Optional so a missing parameter gets the 422 below: FastAPI 0.109 cannot
+    # render the validation error of a missing required list parameter.
+    ids: Optional[List[int]] = Query(
+        None, description=f"Production ids (repeat the parameter, up to {MAX_DETAIL_BATCH}).")
+) -> Dict[str, Any]:
+    """
+    Returns every requested production that exists, in the order requested, with
+    its partner, general or event details, expenses, assignments and schedule
+    entries (with the assigned personnel) and rental usages (with place and
+    payments). The whole batch is read in six queries, however many ids are given.
+    """
+    if not ids or len(ids) > MAX_DETAIL_BATCH:
+        raise HTTPException(status_code=422, detail=f"Give between 1 and {MAX_DETAIL_BATCH} ids.")
+    return api_response(DETAIL_KEY, production_details(db, ids))
+
+
+# =================================================================
+# ROUTE 2: Production Detail
+# =================================================================
+
+@router.get(
+    "/{production_id}",
+    response_model=APIResponse,
+    summary="One whole production (details, partner, expenses, staff, schedule, rentals)"
+)
+def get_production_detail(
+    production_id: int,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """The detail of ROUTE 1 for a single production, or 404."""
+    data_list = production_details(db, [production_id])
+    if not data_list:
+        raise HTTPException(status_code=404, detail=f"No production with id {production_id}.")
+    return api_response(DETAIL_KEY, data_list)
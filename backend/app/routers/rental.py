@@ -1,22 +1,50 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import select, cast, Date
-from datetime import datetime, date
-from typing import Dict, Any, List
+from sqlalchemy import bindparam, select
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Any, List, Literal, Optional
 
 from ..models import RentalPlace, RentalUsage
-from ..schemas import APIResponse
+from ..schemas import APIResponse, SlotSearchRequest
 from ..database import get_db
+from ..responses import api_columns_response, api_response
+from ..intervals import busy_time, merge_intervals, naive, overlaps
+from ..pagination import Keyset, PageParams
+from ..query import run_query
 
 router = APIRouter(
     prefix="/rental",
     tags=["Rental Management"]
 )
 
+BUCKETS = {"hour": timedelta(hours=1), "day": timedelta(days=1), "week": timedelta(weeks=1)}
+# places x buckets; a year of daily buckets for a few hundred places.
+MAX_OCCUPANCY_CELLS = 200000
+
 # =================================================================
 # ROUTE 1: Find Available Rental Places (Query 3)
 # =================================================================
 
+_conflicting_place_ids = (
+    select(RentalUsage.place_id)
+    .where(
+        RentalUsage.start_time < bindparam("end_dt"),
+        RentalUsage.end_time > bindparam("start_dt")
+    )
+    .distinct()
+).scalar_subquery()
+
+_available_places = (
+    select(
+        RentalPlace.place_id,
+        RentalPlace.name,
+        RentalPlace.address,
+        RentalPlace.type,
+        RentalPlace.capacity
+    )
+    .where(RentalPlace.place_id.not_in(_conflicting_place_ids))
+)
+
 @router.get(
     "/available",
     response_model=APIResponse,
@@ -30,16 +58,36 @@ def get_available_rental_places(
     """
     Finds rental places that have no usage conflict between `start_dt` and `end_dt`.
     """
-    conflicting_place_ids = (
-        select(RentalUsage.place_id)
-        .where(
-            RentalUsage.start_time < end_dt,
-            RentalUsage.end_time > start_dt
-        )
-        .distinct()
-    ).scalar_subquery()
+    return run_query(db, _available_places, params={"start_dt": start_dt, "end_dt": end_dt})
 
-    stmt = (
+
+# =================================================================
+# ROUTE 2: Batch Free Slots for Rental Places (Query 3, batched)
+# =================================================================
+
+@router.post(
+    "/available/batch",
+    response_model=APIResponse,
+    summary="(Q3)Find available rental places for many datetime windows at once"
+)
+def get_available_rental_places_batch(
+    request: SlotSearchRequest,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Answers Query 3 for every window in the request with one pass over the data:
+    usages overlapping the whole span are read once, merged into busy intervals
+    per place, and each window is checked against them with a binary search.
+    """
+    # The usage columns are naive DATETIMEs, so aware windows drop their offset (see `naive`).
+    windows = [(naive(w.start_dt), naive(w.end_dt)) for w in request.to_windows()]
+    if not windows:
+        return api_response(["start_dt", "end_dt", "available_count", "places"], [])
+
+    span_start = min(start for start, _ in windows)
+    span_end = max(end for _, end in windows)
+
+    places = db.execute(
         select(
             RentalPlace.place_id,
             RentalPlace.name,
@@ -47,32 +95,80 @@ def get_available_rental_places(
             RentalPlace.type,
             RentalPlace.capacity
         )
-        .where(RentalPlace.place_id.not_in(conflicting_place_ids))
-    )
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "place_id": r.place_id,
-            "name": r.name,
-            "address": r.address,
-            "type": r.type,
-            "capacity": r.capacity
-        }
-        for r in result
+        .order_by(RentalPlace.place_id)
+    ).all()
+
+    usages = db.execute(
+        select(RentalUsage.place_id, RentalUsage.start_time, RentalUsage.end_time)
+        .where(
+            RentalUsage.start_time < span_end,
+            RentalUsage.end_time > span_start
+        )
+        .order_by(RentalUsage.place_id, RentalUsage.start_time)
+    ).all()
+
+    usage_by_place: Dict[int, List[Any]] = {}
+    for u in usages:
+        usage_by_place.setdefault(u.place_id, []).append((u.start_time, u.end_time))
+    busy = {place_id: merge_intervals(intervals) for place_id, intervals in usage_by_place.items()}
+
+    place_dicts = [
+        (
+            busy.get(r.place_id, ([], [])),
+            {
+                "place_id": r.place_id,
+                "name": r.name,
+                "address": r.address,
+                "type": r.type,
+                "capacity": r.capacity
+            }
+        )
+        for r in places
     ]
 
-    return {
-        "count": len(data_list),
-        "key": ["place_id", "name", "address", "type", "capacity"],
-        "data": data_list
-    }
+    data_list = []
+    for start_dt, end_dt in windows:
+        free = [
+            place for (starts, ends), place in place_dicts
+            if not overlaps(starts, ends, start_dt, end_dt)
+        ]
+        data_list.append({
+            "start_dt": start_dt.isoformat(),
+            "end_dt": end_dt.isoformat(),
+            "available_count": len(free),
+            "places": free
+        })
+
+    return api_response(["start_dt", "end_dt", "available_count", "places"], data_list)
 
 
 # =================================================================
-# ROUTE 2: Places In Use on Date (Query 10)
+# ROUTE 3: Places In Use on Date (Query 10)
 # =================================================================
 
+_in_use_keyset = Keyset(
+    (RentalPlace.name, "name", False),
+    (RentalUsage.start_time, "start_time", False),
+    (RentalUsage.end_time, "end_time", False),
+    (RentalPlace.address, "address", False)
+)
+
+_in_use = (
+    select(
+        RentalPlace.name,
+        RentalPlace.address,
+        RentalUsage.start_time,
+        RentalUsage.end_time
+    )
+    .join(RentalUsage, RentalPlace.place_id == RentalUsage.place_id)
+    .where(
+        RentalUsage.start_time < bindparam("day_end"),
+        RentalUsage.end_time >= bindparam("day_start")
+    )
+    .distinct()
+)
+
+
 @router.get(
     "/in-use-on-date",
     response_model=APIResponse,
@@ -80,39 +176,96 @@ def get_available_rental_places(
 )
 def get_places_in_use_on_date(
     db: Session = Depends(get_db),
-    target_date: date = Query(..., description="The date (YYYY-MM-DD) to check for rental usage.")
+    target_date: date = Query(..., description="The date (YYYY-MM-DD) to check for rental usage."),
+    page: PageParams = Depends()
 ) -> Dict[str, Any]:
     """
     Finds rental places with usage that overlaps with any time on the specified `target_date`.
+    Supports keyset pagination and NDJSON streaming.
     """
-    stmt = (
-        select(
-            RentalPlace.name,
-            RentalPlace.address,
-            RentalUsage.start_time,
-            RentalUsage.end_time
-        )
-        .join(RentalUsage, RentalPlace.place_id == RentalUsage.place_id)
+    # Compare the raw DATETIME columns against the day's bounds instead of
+    # casting them to DATE, so the (start_time, end_time) index can be used.
+    day_start = datetime.combine(target_date, time.min)
+    day_end = day_start + timedelta(days=1)
+    return run_query(
+        db, _in_use, keyset=_in_use_keyset, page=page, params={"day_start": day_start, "day_end": day_end}
+    )
+
+
+# =================================================================
+# ROUTE 4: Occupancy Heatmap (Query 10, bucketed)
+# =================================================================
+
+@router.get(
+    "/occupancy",
+    response_model=APIResponse,
+    summary="(Q10)Occupied fraction of every rental place per hour, day or week of a date range"
+)
+def get_occupancy(
+    db: Session = Depends(get_db),
+    start_date: date = Query(..., description="First day of the range (YYYY-MM-DD)."),
+    end_date: date = Query(..., description="Last day of the range, inclusive."),
+    bucket: Literal["hour", "day", "week"] = Query("day", description="Bucket size. Weeks start on Monday."),
+    place_type: Optional[str] = Query(None, description="Only places of this type, e.g. 'Studio'.")
+) -> Dict[str, Any]:
+    """
+    Returns one row per place and bucket with the fraction of the bucket during
+    which the place is rented. The usages overlapping the range are read once
+    with a plain range predicate on the DATETIME columns, merged per place, and
+    turned into per-bucket busy time with a prefix-sum pass, so a calendar view
+    needs one request instead of one Q10 call per day.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=422, detail="end_date must not be before start_date")
+
+    step = BUCKETS[bucket]
+    lo = datetime.combine(start_date, time.min)
+    if bucket == "week":
+        lo -= timedelta(days=start_date.weekday())
+    hi = datetime.combine(end_date, time.min) + timedelta(days=1)
+    bucket_count = -((lo - hi) // step)
+    boundaries = [lo + i * step for i in range(bucket_count + 1)]
+
+    place_filter = [RentalPlace.type == place_type] if place_type is not None else []
+    places = db.execute(
+        select(RentalPlace.place_id, RentalPlace.name)
+        .where(*place_filter)
+        .order_by(RentalPlace.place_id)
+    ).all()
+    if len(places) * bucket_count > MAX_OCCUPANCY_CELLS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{len(places)} places x {bucket_count} buckets exceeds {MAX_OCCUPANCY_CELLS} cells; "
+                   "use a shorter range, a larger bucket or a place_type")
+
+    usages = db.execute(
+        select(RentalUsage.place_id, RentalUsage.start_time, RentalUsage.end_time)
+        .join(RentalPlace, RentalUsage.place_id == RentalPlace.place_id)
         .where(
-            cast(RentalUsage.start_time, Date) <= target_date,
-            cast(RentalUsage.end_time, Date) >= target_date
+            *place_filter,
+            RentalUsage.start_time < boundaries[-1],
+            RentalUsage.end_time > lo
         )
-        .distinct()
-    )
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "name": r.name,
-            "address": r.address,
-            "start_time": r.start_time.isoformat(),
-            "end_time": r.end_time.isoformat()
-        }
-        for r in result
-    ]
+    ).all()
+    usage_by_place: Dict[int, List[Any]] = {}
+    for u in usages:
+        usage_by_place.setdefault(u.place_id, []).append((u.start_time, u.end_time))
+
+    bucket_starts = [b.isoformat() for b in boundaries[:-1]]
+    place_ids: List[int] = []
+    names: List[str] = []
+    starts_col: List[str] = []
+    fractions: List[float] = []
+    for place in places:
+        starts, ends = merge_intervals(usage_by_place.get(place.place_id, []))
+        busy = busy_time(starts, ends, boundaries) if starts else [timedelta(0)] * bucket_count
+        place_ids.extend([place.place_id] * bucket_count)
+        names.extend([place.name] * bucket_count)
+        starts_col.extend(bucket_starts)
+        fractions.extend(round(b / step, 4) for b in busy)
 
-    return {
-        "count": len(data_list),
-        "key": ["name", "address", "start_time", "end_time"],
-        "data": data_list
-    }
\ No newline at end of file
+    return api_columns_response(
+        ["place_id", "name", "bucket_start", "occupied_fraction"],
+        [place_ids, names, starts_col, fractions],
+        len(place_ids)
+    )
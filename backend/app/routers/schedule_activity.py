@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import bindparam, select, func
 from datetime import datetime, date
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal
 
 from ..models import (
     Personnel, 
@@ -12,8 +12,14 @@ from ..models import (
     PersonnelAssignment
 ) 
 
-from ..schemas import APIResponse 
+from ..aggregates import activity_rollup, activity_series, daily_activity_counts
+from ..schemas import APIResponse, BookingBatchRequest, WindowSearchRequest
 from ..database import get_db
+from ..booking import book
+from ..planner import find_windows
+from ..responses import APIJSONResponse, api_response
+from ..pagination import Keyset, PageParams
+from ..query import run_query
 
 router = APIRouter(
     prefix="/schedule",
@@ -25,6 +31,17 @@ router = APIRouter(
 # ROUTE 1: Activity Type Counts (Query 4)
 # =================================================================
 
+_activity_counts = (
+    select(
+        ProductionSchedule.taskname,
+        func.count().label("activity_count")
+    )
+    .where(ProductionSchedule.start_dt >= bindparam("start_dt"))
+    .where(ProductionSchedule.end_dt <= bindparam("end_dt"))
+    .group_by(ProductionSchedule.taskname)
+    .order_by(func.count().desc())
+)
+
 @router.get(
     "/activity/counts",
     response_model=APIResponse,
@@ -39,37 +56,28 @@ def get_activity_type_counts(
     Counts the number of occurrences for each distinct task name 
     within the schedule between `start_dt` and `end_dt`.
     """
-    stmt = (
-        select(
-            ProductionSchedule.taskname,
-            func.count().label("activity_count")
-        )
-        .where(ProductionSchedule.start_dt >= start_dt)
-        .where(ProductionSchedule.end_dt <= end_dt)
-        .group_by(ProductionSchedule.taskname)
-        .order_by(func.count().desc())
-    )
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "taskname": r.taskname,
-            "activity_count": r.activity_count
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["taskname", "activity_count"],
-        "data": data_list
-    }
+    return run_query(db, _activity_counts, params={"start_dt": start_dt, "end_dt": end_dt})
 
 
 # =================================================================
 # ROUTE 2: Music Production Details (Query 9)
 # =================================================================
 
+_music_productions = (
+    select(
+        Production.title.label("production_title"),
+        Personnel.name.label("performer_name"),
+        GeneralProduction.plan_release_quarter,
+        GeneralProduction.plan_release_year
+    )
+    .join(GeneralProduction, Production.production_id == GeneralProduction.production_id)
+    .join(PersonnelAssignment, Production.production_id == PersonnelAssignment.production_id)
+    .join(Personnel, PersonnelAssignment.personnel_id == Personnel.personnel_id)
+    .where(GeneralProduction.genre == 'Music')
+    .where(Production.contract_hire_date >= bindparam("start_date"))
+    .order_by(Production.title, Personnel.name)
+)
+
 @router.get(
     "/production/music",
     response_model=APIResponse,
@@ -83,43 +91,33 @@ def get_music_production_details(
     Finds all general productions with the genre 'Music' that were contracted on 
     or after the `start_date`, listing the assigned performer(s) and planned release details.
     """
-    stmt = (
-        select(
-            Production.title.label("production_title"),
-            Personnel.name.label("performer_name"),
-            GeneralProduction.plan_release_quarter,
-            GeneralProduction.plan_release_year
-        )
-        .join(GeneralProduction, Production.production_id == GeneralProduction.production_id)
-        .join(PersonnelAssignment, Production.production_id == PersonnelAssignment.production_id)
-        .join(Personnel, PersonnelAssignment.personnel_id == Personnel.personnel_id)
-        .where(GeneralProduction.genre == 'Music')
-        .where(Production.contract_hire_date >= start_date)
-        .order_by(Production.title, Personnel.name)
-    )
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "production_title": r.production_title,
-            "performer_name": r.performer_name,
-            "plan_release_quarter": r.plan_release_quarter,
-            "plan_release_year": r.plan_release_year
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["production_title", "performer_name", "plan_release_quarter", "plan_release_year"],
-        "data": data_list
-    }
+    return run_query(db, _music_productions, params={"start_date": start_date})
 
 
 # =================================================================
 # ROUTE 3: Upcoming Schedule (Query 14)
 # =================================================================
 
+_upcoming_keyset = Keyset(
+    (ProductionSchedule.start_dt, "start_dt", False),
+    (ProductionSchedule.prod_schedule_id, "prod_schedule_id", False)
+)
+
+_upcoming = (
+    select(
+        ProductionSchedule.start_dt,
+        ProductionSchedule.end_dt,
+        ProductionSchedule.taskname,
+        ProductionSchedule.location,
+        Production.title.label("production_title"),
+        Personnel.name.label("personnel_name")
+    )
+    .join(Production, ProductionSchedule.production_id == Production.production_id)
+    .join(Personnel, ProductionSchedule.personnel_id == Personnel.personnel_id)
+    .where(ProductionSchedule.start_dt >= bindparam("current_datetime"))
+)
+
+
 @router.get(
     "/upcoming",
     response_model=APIResponse,
@@ -128,42 +126,93 @@ def get_music_production_details(
 def get_upcoming_schedule(
     db: Session = Depends(get_db),
     # Optional parameter defaults to current time if not provided
-    current_datetime: datetime = Query(datetime.now(), description="Schedules starting at or after this datetime.")
+    current_datetime: datetime = Query(datetime.now(), description="Schedules starting at or after this datetime."),
+    page: PageParams = Depends()
 ) -> Dict[str, Any]:
     """
     Retrieves all production schedule entries that are upcoming (start at or after 
-    the specified datetime).
+    the specified datetime). Supports keyset pagination and NDJSON streaming.
+    """
+    return run_query(db, _upcoming, keyset=_upcoming_keyset, page=page, params={"current_datetime": current_datetime})
+
+
+
+# =================================================================
+# ROUTE 4: Conflict-Aware Batch Booking
+# =================================================================
+
+@router.post(
+    "/bookings/batch",
+    summary="Create schedule entries and rental bookings, rejecting double bookings"
+)
+def create_bookings_batch(
+    request: BookingBatchRequest,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Checks every proposed schedule entry (per person) and rental booking (per place)
+    against the existing rows and against the rest of the batch, in one sweep over
+    the sorted intervals, and commits the conflict-free entries in one transaction.
+    Each result lists the conflicting rows or batch entries. With `all_or_nothing`,
+    any rejected entry cancels the batch and the response status is 409.
     """
-    stmt = (
-        select(
-            ProductionSchedule.start_dt,
-            ProductionSchedule.end_dt,
-            ProductionSchedule.taskname,
-            ProductionSchedule.location,
-            Production.title.label("production_title"),
-            Personnel.name.label("personnel_name")
-        )
-        .join(Production, ProductionSchedule.production_id == Production.production_id)
-        .join(Personnel, ProductionSchedule.personnel_id == Personnel.personnel_id)
-        .where(ProductionSchedule.start_dt >= current_datetime)
-        .order_by(ProductionSchedule.start_dt)
+    report = book(db, request)
+    return APIJSONResponse(report, status_code=200 if report["committed"] else 409)
+
+
+# =================================================================
+# ROUTE 5: Earliest Common Free Windows (Query 2 + Query 3)
+# =================================================================
+
+@router.post(
+    "/windows/search",
+    response_model=APIResponse,
+    summary="(Q2+Q3)Earliest windows where the needed personnel and a place are all free"
+)
+def search_free_windows(
+    request: WindowSearchRequest,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Returns the earliest windows of the requested length in which, at the same time,
+    the requested number of people of each type and one matching rental place are free.
+    Busy intervals are read once for the whole horizon and merged per person and place;
+    the free intervals are then intersected, so no query runs per candidate window.
+    Each window lists the free personnel ids per type and the free place ids.
+    """
+    data_list = find_windows(db, request)
+    return api_response(["start_dt", "end_dt", "personnel", "places"], data_list)
+
+
+# =================================================================
+# ROUTE 6: Activity Type Counts Over Time (Query 4, bucketed)
+# =================================================================
+
+@router.get(
+    "/activity/series",
+    response_model=APIResponse,
+    summary="(Q4)Count of activities per task name and day, week or month of a date range"
+)
+def get_activity_type_series(
+    db: Session = Depends(get_db),
+    start_date: date = Query(..., description="First day of the range (YYYY-MM-DD)."),
+    end_date: date = Query(..., description="Last day of the range, inclusive."),
+    bucket: Literal["day", "week", "month"] = Query("day", description="Bucket size. Weeks start on Monday."),
+    source: Literal["index", "sql"] = Query(
+        "index",
+        description="'index' adds up the incrementally maintained daily counts, 'sql' runs the GROUP BY on the database."
     )
-    result = db.execute(stmt).all()
-    
-    data_list = [
-        {
-            "start_dt": r.start_dt.isoformat(),
-            "end_dt": r.end_dt.isoformat(),
-            "taskname": r.taskname,
-            "location": r.location,
-            "production_title": r.production_title,
-            "personnel_name": r.personnel_name
-        }
-        for r in result
-    ]
-
-    return {
-        "count": len(data_list),
-        "key": ["start_dt", "end_dt", "taskname", "location", "production_title", "personnel_name"],
-        "data": data_list
-    }
\ No newline at end of file
+) -> Dict[str, Any]:
+    """
+    The Q4 counts for every bucket of the range in one call: one row per bucket
+    and task name, counting the schedule entries that start in the bucket.
+    Buckets without any entry are omitted.
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=422, detail="end_date must not be before start_date")
+
+    if source == "index":
+        data_list = activity_rollup.series(db, start_date, end_date, bucket)
+    else:
+        data_list = activity_series(daily_activity_counts(db, start_date, end_date), bucket)
+    return api_response(["bucket_start", "taskname", "activity_count"], data_list)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Dict, Any, Literal
+
+from ..schemas import APIResponse
+from ..database import get_db
+from ..responses import api_response
+from ..search import MATCH_KINDS, search_index
+
+router = APIRouter(
+    prefix="/search",
+    tags=["Search"]
+)
+
+
+# =================================================================
+# ROUTE 1: Name and Title Search (typeahead)
+# =================================================================
+
+@router.get(
+    "",
+    response_model=APIResponse,
+    summary="Ranked substring search over personnel names and production titles"
+)
+def search_names_and_titles(
+    db: Session = Depends(get_db),
+    q: str = Query(..., min_length=1, description="Search term (case-insensitive substring)."),
+    type: Literal["all", "personnel", "production"] = Query(
+        "all", description="Search personnel names, production titles, or both."),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of matches to return.")
+) -> Dict[str, Any]:
+    """
+    Returns the best matches for `q` from the in-memory search index: exact matches
+    first, then prefix matches of the whole text, then of a word, then other substrings.
+    Served without a database query once the index is loaded, so it suits typeahead.
+    """
+    fields = ["personnel", "production"] if type == "all" else [type]
+    data_list = []
+    for field in fields:
+        data_list.extend(search_index.search(db, field, q, limit))
+    if len(fields) > 1:
+        data_list.sort(key=lambda r: (MATCH_KINDS.index(r["match"]), len(r["text"])))
+        data_list = data_list[:limit]
+
+    return api_response(["type", "id", "text", "match"], data_list)
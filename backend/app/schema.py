@@ -0,0 +1,34 @@
+"""
+One-shot schema setup, run once per deployment instead of at every app start:
+
+    python -m app.schema     # create missing tables, then missing indexes
+
+Tables come from the models; on MySQL the docker image normally creates them
+from `dbproject.sql` already, in which case this only adds missing indexes.
+"""
+
+import argparse
+import sys
+from typing import List
+
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .database import Base, get_engine
+from .indexes import ensure_indexes
+
+
+def create_schema() -> List[str]:
+    """Creates every missing table, then every missing declared index. Returns the created index names."""
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    return ensure_indexes(engine)
+
+
+def main(argv: List[str] = None) -> int:
+    argparse.ArgumentParser(prog="python -m app.schema", description=__doc__.split("\n\n")[0]).parse_args(argv)
+    created = create_schema()
+    print(f"INFO: Schema is up to date. Created {len(created)} index(es): {', '.join(created) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Union
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import List, Dict, Any, Union, Optional
+from datetime import date, datetime, timedelta
+
+from .intervals import naive
 
 # =================================================================
 # UNIVERSAL API RESPONSE WRAPPER
@@ -14,6 +16,300 @@ class APIResponse(BaseModel):
     """
     count: int = Field(..., description="The total number of records returned in the 'data' list.")
     key: List[str] = Field(..., description="A list of string keys (column names) present in each object in the 'data' list.")
-    data: List[Dict[str, Any]] = Field(..., description="The list of results, where each item is a dictionary matching the 'key' list.")
+    data: Optional[List[Dict[str, Any]]] = Field(None, description="The list of results, where each item is a dictionary matching the 'key' list. Replaced by 'columns' with format=columnar.")
+    columns: Optional[List[List[Any]]] = Field(None, description="Only with format=columnar: one list of values per entry of 'key', in row order.")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page when the endpoint is paginated and more rows may follow.")
+
+
+# =================================================================
+# REQUEST BODIES
+# =================================================================
+
+MAX_BATCH_WINDOWS = 5000
+
+
+class TimeWindow(BaseModel):
+    """A half-open [start_dt, end_dt) period."""
+    start_dt: datetime = Field(..., description="Start of the window (inclusive).")
+    end_dt: datetime = Field(..., description="End of the window (exclusive).")
+
+    @model_validator(mode="after")
+    def check_order(self) -> "TimeWindow":
+        if naive(self.end_dt) <= naive(self.start_dt):
+            raise ValueError("end_dt must be after start_dt")
+        return self
+
+
+class SlotSearchRequest(BaseModel):
+    """
+    A batch of windows to check in one request. Either list the windows explicitly,
+    or give a horizon and a slot length to have it cut into consecutive slots.
+    """
+    windows: Optional[List[TimeWindow]] = Field(None, description="Explicit windows to check.")
+    horizon_start: Optional[datetime] = Field(None, description="Start of the horizon to slice into slots.")
+    horizon_end: Optional[datetime] = Field(None, description="End of the horizon to slice into slots.")
+    slot_minutes: Optional[int] = Field(None, ge=1, description="Length of each slot in minutes.")
+
+    @model_validator(mode="after")
+    def check_shape(self) -> "SlotSearchRequest":
+        horizon = (self.horizon_start, self.horizon_end, self.slot_minutes)
+        if self.windows is None and None in horizon:
+            raise ValueError("give either 'windows' or 'horizon_start', 'horizon_end' and 'slot_minutes'")
+        if self.windows is not None and any(v is not None for v in horizon):
+            raise ValueError("'windows' cannot be combined with a horizon")
+        if self.windows is None and naive(self.horizon_end) <= naive(self.horizon_start):
+            raise ValueError("horizon_end must be after horizon_start")
+        if self._window_count() > MAX_BATCH_WINDOWS:
+            raise ValueError(f"at most {MAX_BATCH_WINDOWS} windows per request")
+        return self
+
+    def _window_count(self) -> int:
+        if self.windows is not None:
+            return len(self.windows)
+        return int((naive(self.horizon_end) - naive(self.horizon_start)) / timedelta(minutes=self.slot_minutes))
+
+    def to_windows(self) -> List[TimeWindow]:
+        """The windows to check; horizon slots that would run past `horizon_end` are dropped."""
+        if self.windows is not None:
+            return self.windows
+        step = timedelta(minutes=self.slot_minutes)
+        return [
+            TimeWindow(start_dt=self.horizon_start + i * step, end_dt=self.horizon_start + (i + 1) * step)
+            for i in range(self._window_count())
+        ]
+
+
+# =================================================================
+# BULK IMPORT RECORDS
+# =================================================================
+# One row of an import file. Primary keys are required (the tables have no
+# AUTO_INCREMENT) and unknown columns are rejected, so a misspelt header is
+# reported instead of silently dropped.
+
+class PersonnelRecord(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    personnel_id: int
+    name: str = Field(..., max_length=50)
+    email: Optional[str] = Field(None, max_length=50)
+    phone: Optional[str] = Field(None, max_length=50)
+    personnel_type: str = Field(..., max_length=50)
+    contract_hire_date: Optional[date] = None
+    contract_expiration_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_contract(self) -> "PersonnelRecord":
+        if self.contract_hire_date and self.contract_expiration_date \
+                and self.contract_expiration_date < self.contract_hire_date:
+            raise ValueError("contract_expiration_date must not be before contract_hire_date")
+        return self
+
+
+class ProductionRecord(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    production_id: int
+    title: str = Field(..., max_length=50)
+    production_type: Optional[str] = Field(None, max_length=50)
+    contract_hire_date: Optional[date] = None
+    contract_expiration_date: Optional[date] = None
+    partner_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_contract(self) -> "ProductionRecord":
+        if self.contract_hire_date and self.contract_expiration_date \
+                and self.contract_expiration_date < self.contract_hire_date:
+            raise ValueError("contract_expiration_date must not be before contract_hire_date")
+        return self
+
+
+class ScheduleRecord(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    prod_schedule_id: int
+    production_id: int
+    personnel_id: int
+    start_dt: datetime
+    end_dt: datetime
+    taskname: Optional[str] = Field(None, max_length=50)
+    location: Optional[str] = Field(None, max_length=50)
+
+    @model_validator(mode="after")
+    def check_order(self) -> "ScheduleRecord":
+        if naive(self.end_dt) <= naive(self.start_dt):
+            raise ValueError("end_dt must be after start_dt")
+        return self
+
+
+class RentalUsageRecord(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    usage_id: int
+    production_id: int
+    place_id: int
+    start_time: datetime
+    end_time: datetime
+
+    @model_validator(mode="after")
+    def check_order(self) -> "RentalUsageRecord":
+        if naive(self.end_time) <= naive(self.start_time):
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class RentalPlaceRecord(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    place_id: int
+    name: str = Field(..., max_length=50)
+    address: Optional[str] = None
+    type: Optional[str] = Field(None, max_length=50)
+    capacity: Optional[int] = Field(None, ge=0)
+    contact_info: Optional[str] = None
+
+
+# =================================================================
+# ENTITY UPDATES
+# =================================================================
+# One row of a bulk update: the primary key plus the columns to change.
+# Columns left out keep their value; an explicit null clears the column.
+
+class PersonnelUpdate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    personnel_id: int
+    name: Optional[str] = Field(None, max_length=50)
+    email: Optional[str] = Field(None, max_length=50)
+    phone: Optional[str] = Field(None, max_length=50)
+    personnel_type: Optional[str] = Field(None, max_length=50)
+    contract_hire_date: Optional[date] = None
+    contract_expiration_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def check_contract(self) -> "PersonnelUpdate":
+        if self.contract_hire_date and self.contract_expiration_date \
+                and self.contract_expiration_date < self.contract_hire_date:
+            raise ValueError("contract_expiration_date must not be before contract_hire_date")
+        return self
+
+
+class ProductionUpdate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    production_id: int
+    title: Optional[str] = Field(None, max_length=50)
+    production_type: Optional[str] = Field(None, max_length=50)
+    contract_hire_date: Optional[date] = None
+    contract_expiration_date: Optional[date] = None
+    partner_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_contract(self) -> "ProductionUpdate":
+        if self.contract_hire_date and self.contract_expiration_date \
+                and self.contract_expiration_date < self.contract_hire_date:
+            raise ValueError("contract_expiration_date must not be before contract_hire_date")
+        return self
+
+
+class RentalPlaceUpdate(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    place_id: int
+    name: Optional[str] = Field(None, max_length=50)
+    address: Optional[str] = None
+    type: Optional[str] = Field(None, max_length=50)
+    capacity: Optional[int] = Field(None, ge=0)
+    contact_info: Optional[str] = None
+
+
+# =================================================================
+# BATCH BOOKING
+# =================================================================
+
+MAX_BOOKING_BATCH = 10000
+
+
+class ScheduleProposal(BaseModel):
+    """A schedule entry to create; the id is assigned on commit."""
+    production_id: int
+    personnel_id: int
+    start_dt: datetime
+    end_dt: datetime
+    taskname: Optional[str] = Field(None, max_length=50)
+    location: Optional[str] = Field(None, max_length=50)
+
+    @model_validator(mode="after")
+    def check_order(self) -> "ScheduleProposal":
+        if naive(self.end_dt) <= naive(self.start_dt):
+            raise ValueError("end_dt must be after start_dt")
+        return self
+
+
+class RentalProposal(BaseModel):
+    """A rental booking to create; the id is assigned on commit."""
+    production_id: int
+    place_id: int
+    start_time: datetime
+    end_time: datetime
+
+    @model_validator(mode="after")
+    def check_order(self) -> "RentalProposal":
+        if naive(self.end_time) <= naive(self.start_time):
+            raise ValueError("end_time must be after start_time")
+        return self
+
+
+class BookingBatchRequest(BaseModel):
+    schedules: List[ScheduleProposal] = Field(default_factory=list, description="Schedule entries to create.")
+    rentals: List[RentalProposal] = Field(default_factory=list, description="Rental bookings to create.")
+    all_or_nothing: bool = Field(
+        False, description="Commit nothing if any entry is rejected, instead of committing the conflict-free ones.")
+
+    @model_validator(mode="after")
+    def check_size(self) -> "BookingBatchRequest":
+        if len(self.schedules) + len(self.rentals) > MAX_BOOKING_BATCH:
+            raise ValueError(f"at most {MAX_BOOKING_BATCH} entries per request")
+        return self
+
+
+# =================================================================
+# MULTI-RESOURCE WINDOW SEARCH
+# =================================================================
+
+MAX_SEARCH_HORIZON = timedelta(days=366)
+MAX_WINDOWS = 100
+
+
+class PersonnelNeed(BaseModel):
+    personnel_type: str = Field(..., description="Personnel type, e.g. 'Actor'.")
+    count: int = Field(1, ge=1, description="How many people of this type must be free.")
+
+
+class WindowSearchRequest(BaseModel):
+    """
+    Find the earliest windows of `duration_minutes` inside the horizon in which
+    the requested personnel and (when `place_type` or `min_capacity` is given)
+    one matching rental place are all free.
+    """
+    horizon_start: datetime = Field(..., description="Earliest start of a window.")
+    horizon_end: datetime = Field(..., description="Latest end of a window.")
+    duration_minutes: int = Field(..., ge=1, description="Length of the window.")
+    personnel: List[PersonnelNeed] = Field(default_factory=list, description="People needed, by type.")
+    place_type: Optional[str] = Field(None, description="Type of rental place needed, e.g. 'Studio'.")
+    min_capacity: Optional[int] = Field(None, ge=0, description="Smallest acceptable place capacity.")
+    step_minutes: int = Field(30, ge=1, description="Windows start on this grid, counted from horizon_start.")
+    limit: int = Field(10, ge=1, le=MAX_WINDOWS, description="Number of windows to return.")
 
+    @model_validator(mode="after")
+    def check_horizon(self) -> "WindowSearchRequest":
+        if naive(self.horizon_end) <= naive(self.horizon_start):
+            raise ValueError("horizon_end must be after horizon_start")
+        if naive(self.horizon_end) - naive(self.horizon_start) > MAX_SEARCH_HORIZON:
+            raise ValueError(f"the horizon can span at most {MAX_SEARCH_HORIZON.days} days")
+        if not self.personnel and not self.needs_place:
+            raise ValueError("ask for at least one personnel type, a place_type or a min_capacity")
+        return self
 
+    @property
+    def needs_place(self) -> bool:
+        return self.place_type is not None or self.min_capacity is not None
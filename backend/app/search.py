@@ -0,0 +1,233 @@
+import os
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+from .events import RowChange, subscribe
+from .models import Personnel, Production
+from .stores import InMemoryStore
+
+# Seconds before the index is reloaded even without local writes (see app.stores).
+MAX_AGE = float(os.getenv("SEARCH_INDEX_MAX_AGE", "60"))
+
+# Above this many matches a filter falls back to LIKE: such an unselective
+# term saves nothing over the scan, and the IN list would get unwieldy.
+IN_LIST_MAX = 1000
+
+# Match kinds, best first.
+MATCH_KINDS = ("exact", "prefix", "word", "substring")
+
+
+def _fold(text: str) -> str:
+    return text.casefold()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Field:
+    """Trigram and prefix index over one text column, keyed by primary key."""
+
+    def __init__(self, rows: Iterable[Tuple[int, Optional[str]]]):
+        self.text: Dict[int, str] = {}
+        self.folded: Dict[int, str] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        for key, text in rows:
+            self.add(key, text)
+        self._sorted: Optional[List[Tuple[str, int]]] = None
+
+    def add(self, key: int, text: Optional[str]) -> None:
+        self.remove(key)
+        if not text:
+            return
+        folded = _fold(text)
+        self.text[key] = text
+        self.folded[key] = folded
+        for gram in _trigrams(folded):
+            self.postings.setdefault(gram, set()).add(key)
+        self._sorted = None
+
+    def remove(self, key: int) -> None:
+        folded = self.folded.pop(key, None)
+        if folded is None:
+            return
+        del self.text[key]
+        for gram in _trigrams(folded):
+            keys = self.postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[gram]
+        self._sorted = None
+
+    def _prefix_list(self) -> List[Tuple[str, int]]:
+        # Every word start of every text, so "kim" finds "Alice Kim" by prefix.
+        if self._sorted is None:
+            entries = []
+            for key, folded in self.folded.items():
+                start = 0
+                for word in folded.split():
+                    start = folded.index(word, start)
+                    entries.append((folded[start:], key))
+                    start += len(word)
+            entries.sort()
+            self._sorted = entries
+        return self._sorted
+
+    def matching(self, term: str) -> Set[int]:
+        """Keys whose text contains `term` (case-insensitive), like `LIKE '%term%'`."""
+        if len(term) < 3:
+            return {key for key, folded in self.folded.items() if term in folded}
+        grams = sorted((self.postings.get(g, set()) for g in _trigrams(term)), key=len)
+        if not grams or not grams[0]:
+            return set()
+        candidates = set.intersection(*grams)
+        if len(term) == 3:
+            return candidates
+        return {key for key in candidates if term in self.folded[key]}
+
+    def prefixed(self, term: str) -> Set[int]:
+        """Keys having a word that starts with `term`, found by bisection."""
+        entries = self._prefix_list()
+        keys: Set[int] = set()
+        for suffix, key in entries[bisect_left(entries, (term, -1)):]:
+            if not suffix.startswith(term):
+                break
+            keys.add(key)
+        return keys
+
+    def rank(self, key: int, term: str) -> Tuple[int, int, int, str, int]:
+        folded = self.folded[key]
+        position = folded.find(term)
+        if folded == term:
+            kind = 0
+        elif position == 0:
+            kind = 1
+        elif position > 0 and folded[position - 1].isspace():
+            kind = 2
+        else:
+            kind = 2 if f" {term}" in folded else 3
+        return kind, position, len(folded), folded, key
+
+
+class SearchIndex(InMemoryStore):
+    """
+    In-memory trigram index over `personnel.name` and `production.title` for
+    substring, prefix and typeahead search, and for the name/title filters of
+    Q7 and Q8 (which would otherwise scan with `LIKE '%term%'`).
+
+    A query's trigrams are intersected to get candidates, which are then
+    verified, so results equal a case-insensitive substring match.
+    """
+
+    FIELDS = {
+        "personnel": (Personnel, Personnel.personnel_id, Personnel.name, "personnel_id", "name"),
+        "production": (Production, Production.production_id, Production.title, "production_id", "title"),
+    }
+    TABLES = frozenset(model.__tablename__ for model, *_ in FIELDS.values())
+
+    def __init__(self, max_age: float = MAX_AGE):
+        super().__init__(max_age)
+        self._fields: Dict[str, _Field] = {name: _Field([]) for name in self.FIELDS}
+        self._tables = {model.__tablename__: name for name, (model, *_) in self.FIELDS.items()}
+
+    # -------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------
+
+    def _read(self, db: Session) -> Dict[str, _Field]:
+        return {
+            name: _Field(db.execute(select(key_col, text_col)).all())
+            for name, (_, key_col, text_col, _, _) in self.FIELDS.items()
+        }
+
+    def _install(self, fields: Dict[str, _Field]) -> None:
+        self._fields = fields
+
+    # -------------------------------------------------------------
+    # Incremental maintenance
+    # -------------------------------------------------------------
+
+    def _apply_one(self, change: RowChange) -> bool:
+        name = self._tables[change.table]
+        _, _, _, key_attr, text_attr = self.FIELDS[name]
+        row = change.row
+        if row is None or row.get(key_attr) is None:
+            return False
+        if change.op == "delete":
+            self._fields[name].remove(row[key_attr])
+        elif text_attr in row:
+            self._fields[name].add(row[key_attr], row[text_attr])
+        else:
+            return False
+        return True
+
+    # -------------------------------------------------------------
+    # Queries
+    # -------------------------------------------------------------
+
+    def matching_ids(self, db: Session, field: str, term: str) -> Set[int]:
+        """Primary keys of the `field` rows whose text contains `term`, case-insensitively."""
+        self._ensure_fresh(db)
+        with self._lock:
+            return self._fields[field].matching(_fold(term))
+
+    def contains(self, db: Session, field: str, term: str) -> ColumnElement:
+        """
+        WHERE clause selecting the `field` rows whose text contains `term`: a
+        primary-key IN list from the index in place of `LIKE '%term%'`.
+        """
+        by_ids, value = self.contains_param(db, field, term)
+        _, key_col, text_col, _, _ = self.FIELDS[field]
+        return key_col.in_(value) if by_ids else text_col.like(value)
+
+    def contains_param(self, db: Session, field: str, term: str) -> Tuple[bool, Any]:
+        """
+        `contains` as (shape, bound value) for a prepared statement (see
+        `contains_clause`): (True, sorted ids) for the IN list, or (False,
+        '%term%') when too many rows match and LIKE is used instead.
+        """
+        ids = self.matching_ids(db, field, term)
+        if len(ids) > IN_LIST_MAX:
+            return False, f"%{term}%"
+        return True, sorted(ids)
+
+    def search(self, db: Session, field: str, term: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        The `limit` best matches of `term` in `field`: exact matches first, then
+        prefixes of the whole text, then word prefixes, then other substrings;
+        ties go to the earlier match position and the shorter text.
+        """
+        self._ensure_fresh(db)
+        term = _fold(term.strip())
+        if not term:
+            return []
+        with self._lock:
+            index = self._fields[field]
+            # Typeahead fast path for terms too short for trigrams: when enough
+            # words start with the term, no plain substring match can rank higher.
+            keys = index.prefixed(term) if len(term) < 3 else set()
+            if len(keys) < limit:
+                keys = index.matching(term)
+            ranked = sorted(index.rank(key, term) for key in keys)[:limit]
+            return [
+                {"type": field, "id": key, "text": index.text[key], "match": MATCH_KINDS[kind]}
+                for kind, _, _, _, key in ranked
+            ]
+
+
+def contains_clause(field: str, by_ids: bool, name: str) -> ColumnElement:
+    """
+    The WHERE clause of `SearchIndex.contains` with its value left as the bound
+    parameter `name`: an expanding IN on the primary key, or a LIKE on the text.
+    """
+    _, key_col, text_col, _, _ = SearchIndex.FIELDS[field]
+    return key_col.in_(bindparam(name, expanding=True)) if by_ids else text_col.like(bindparam(name))
+
+
+search_index = SearchIndex()
+subscribe(search_index.apply)
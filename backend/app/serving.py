@@ -0,0 +1,61 @@
+import os
+from typing import Optional
+
+from uvicorn.workers import UvicornWorker
+
+# =================================================================
+# MULTI-PROCESS SERVING (gunicorn + uvicorn workers)
+# =================================================================
+# `gunicorn -c gunicorn.conf.py app.main:app` runs one uvicorn worker per
+# available core. The helpers below size the worker count from the cores the
+# container may actually use, and pick the event loop and HTTP parser.
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPU quota of the container (cgroup v2, then v1), or None when unlimited."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def available_cpus() -> int:
+    """Cores this process may run on: the CPU affinity mask, capped by the cgroup quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - not available on macOS
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, int(limit + 0.5)))
+    return max(1, cpus)
+
+
+def worker_count() -> int:
+    """WEB_CONCURRENCY when set, otherwise one worker per available core."""
+    configured = os.getenv("WEB_CONCURRENCY")
+    return max(1, int(configured)) if configured else available_cpus()
+
+
+class AgencyUvicornWorker(UvicornWorker):
+    """
+    UvicornWorker whose event loop and HTTP parser come from SERVER_LOOP
+    ("auto", "uvloop", "asyncio") and SERVER_HTTP ("auto", "httptools", "h11").
+    "auto" uses uvloop and httptools when they are installed (they are, with
+    uvicorn[standard]).
+    """
+
+    CONFIG_KWARGS = {
+        "loop": os.getenv("SERVER_LOOP", "auto"),
+        "http": os.getenv("SERVER_HTTP", "auto"),
+    }
@@ -0,0 +1,126 @@
+"""
+Lifecycle shared by the in-memory structures derived from the tables: the
+availability index (Q2), the search index (/search, Q7/Q8), the Q5/Q6/Q11
+aggregates and the Q4 activity rollup.
+
+A store loads itself lazily on first use, applies committed ORM writes
+incrementally through `app.events`, and falls back to a full reload after a
+write it cannot apply row by row (any bulk write) or once it is `max_age`
+seconds old, so changes made by other worker processes are eventually
+picked up.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, FrozenSet, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from .events import RowChange
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class InMemoryStore:
+    """
+    Base of the in-memory stores. Subclasses name the tables they are derived
+    from in `TABLES` (writes to other tables leave them alone) and implement:
+
+      * `_read(db)`       - the queries of a full load, run outside the lock;
+      * `_install(state)` - replaces the contents with what `_read` returned;
+      * `_apply_one(change)` - applies one committed write, or returns False
+        when it cannot be applied row by row (the store then reloads).
+
+    `_install` and `_apply_one` run under `_lock`, which queries also hold
+    while they read the contents. Full loads run one at a time under
+    `_load_lock`: requests finding the store stale wait for the load already
+    running instead of each reading the whole tables again.
+    """
+
+    TABLES: FrozenSet[str] = frozenset()
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        # Bumped on every applied write so a reload racing with a commit is retried.
+        self._version = 0
+
+    # -------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------
+
+    def invalidate(self) -> None:
+        """Forces a full reload on the next query."""
+        with self._lock:
+            self._loaded_at = None
+
+    def load(self, db: Session) -> None:
+        """Rebuilds the whole store from the database."""
+        with self._load_lock:
+            self._load(db)
+
+    def _load(self, db: Session) -> None:
+        version = self._version
+        state = self._read(db)
+        with self._lock:
+            self._install(state)
+            self._loaded_at = time.monotonic() if version == self._version else None
+
+    def _is_fresh(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at <= self.max_age
+
+    def _ensure_fresh(self, db: Session) -> None:
+        if self._is_fresh():
+            return
+        if _on_event_loop():
+            # In async mode the running load continues on this same thread, so
+            # waiting for it would block it for good: load alongside instead.
+            if not self._load_lock.acquire(blocking=False):
+                self._load(db)
+                return
+        else:
+            self._load_lock.acquire()
+        try:
+            # Loaded by another request while this one waited.
+            if not self._is_fresh():
+                self._load(db)
+        finally:
+            self._load_lock.release()
+
+    def _read(self, db: Session) -> Any:
+        raise NotImplementedError
+
+    def _install(self, state: Any) -> None:
+        raise NotImplementedError
+
+    # -------------------------------------------------------------
+    # Incremental maintenance
+    # -------------------------------------------------------------
+
+    def apply(self, changes: Iterable[RowChange]) -> None:
+        """Applies committed writes; anything that cannot be applied row by row triggers a reload."""
+        changes = [change for change in changes if change.table in self.TABLES]
+        if not changes:
+            return
+        with self._lock:
+            self._version += 1
+            if self._loaded_at is None:
+                return
+            if not self._apply_changes(changes):
+                self._loaded_at = None
+
+    def _apply_changes(self, changes: Iterable[RowChange]) -> bool:
+        return all(self._apply_one(change) for change in changes)
+
+    def _apply_one(self, change: RowChange) -> bool:
+        raise NotImplementedError
@@ -0,0 +1,310 @@
+"""
+Generates a synthetic, referentially consistent agency dataset for all twelve
+tables at a chosen scale factor, and bulk-loads it with chunked executemany
+(multi-row INSERTs on MySQL) into SQLite or MySQL:
+
+    python -m bench.datagen --url sqlite:///./bench.db --scale 1
+    python -m bench.datagen --url mysql+pymysql://root:pw@localhost/AgencyBench --scale 100 --drop
+
+Scale 1 is 2,000 personnel, 500 productions and 10,000 schedule rows; every
+table grows linearly, so scale 100 gives a million schedule rows. The same
+seed always produces the same data.
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from app import models  # noqa: F401  (registers the tables on Base.metadata)
+from app.database import Base
+
+# Rows per table at scale 1.
+BASE_COUNTS = {
+    "personnel": 2000,
+    "partner_personnel": 200,
+    "production": 500,
+    "productionexpense": 2500,
+    "personnelassignment": 5000,
+    "productionschedule": 10000,
+    "rentalplace": 100,
+    "rentalusage": 2000,
+}
+
+CHUNK_SIZE = 5000
+
+# Dates are spread over this window; the benchmark's query parameters fall inside it.
+EPOCH = date(2023, 1, 1)
+SPAN_DAYS = 3 * 365
+
+FIRST_NAMES = [
+    "Alice", "Ben", "Cara", "Dan", "Eva", "Finn", "Gina", "Hugo", "Ivy", "Jon",
+    "Kara", "Leo", "Mia", "Nate", "Olga", "Paul", "Quinn", "Rosa", "Sam", "Tara",
+    "Uma", "Vic", "Wendy", "Xavi", "Yuki", "Zoe"
+]
+LAST_NAMES = [
+    "Kim", "Park", "Lim", "Chen", "Wong", "Tan", "Lee", "Singh", "Nguyen", "Sato",
+    "Garcia", "Smith", "Brown", "Rossi", "Muller", "Silva", "Khan", "Ito", "Costa", "Novak"
+]
+PERSONNEL_TYPES = [
+    ("Actor", 30), ("Actress", 30), ("Crew", 15), ("Director", 5),
+    ("Producer", 5), ("Costumer", 5), ("Makeup", 5), ("Singer", 5)
+]
+PERFORMER_TYPES = {"Actor": "Actor", "Actress": "Actor", "Singer": "Singer"}
+AGENCIES = ["StarMagic", "VisionTalent", "MoveCrew", "BrightLane", "NorthStar"]
+SERVICE_TYPES = ["Equipment", "Lighting", "Stage Design", "Catering", "Transport", "Sound"]
+GENRES = ["Drama", "Music", "Fantasy", "Comedy", "Documentary", "Thriller"]
+EVENT_TYPES = ["Concert", "Festival", "Fan Meeting", "Award Show"]
+TITLE_WORDS = [
+    "Moonlight", "River", "Sky", "Story", "Echo", "Night", "Summer", "Stone",
+    "Silver", "Dream", "City", "Ocean", "Fire", "Garden", "Road", "Star"
+]
+EXPENSE_TYPES = ["Costume", "Lighting", "Props", "Catering", "Travel", "Equipment"]
+ROLE_TITLES = ["Lead Actor", "Supporting Actor", "Director", "Producer", "Crew", "Stylist", "Performer"]
+TASKNAMES = ["Shoot", "Rehearsal", "Reading", "Fitting", "Recording", "Meeting", "Editing", "Makeup"]
+PLACE_TYPES = ["Studio", "Arena", "Hall", "Theater", "Outdoor"]
+
+
+def counts(scale: float) -> Dict[str, int]:
+    return {table: max(1, int(n * scale)) for table, n in BASE_COUNTS.items()}
+
+
+def _day(rng: random.Random) -> date:
+    return EPOCH + timedelta(days=rng.randrange(SPAN_DAYS))
+
+
+def _contract(rng: random.Random) -> Tuple[date, date]:
+    hire = _day(rng)
+    return hire, hire + timedelta(days=rng.randint(90, 3 * 365))
+
+
+def _slot(rng: random.Random, max_hours: int) -> Tuple[datetime, datetime]:
+    start = datetime.combine(_day(rng), datetime.min.time()) + timedelta(hours=rng.randint(6, 20))
+    return start, start + timedelta(hours=rng.randint(1, max_hours))
+
+
+def generate(scale: float, seed: int = 42) -> Iterator[Tuple[str, Iterable[Dict[str, Any]]]]:
+    """
+    Yields `(table, rows)` in foreign-key order. `rows` is a lazy iterable of
+    dicts and must be consumed before the next table is requested: later
+    tables draw from the same random stream (and payments follow usages).
+    """
+    n = counts(scale)
+    rng = random.Random(seed)
+    types = [t for t, _ in PERSONNEL_TYPES]
+    weights = [w for _, w in PERSONNEL_TYPES]
+    personnel_types = rng.choices(types, weights, k=n["personnel"])
+
+    # Names are unique, as Q13 looks a performer up by full name: each round
+    # through the first x last combinations adds a middle initial.
+    combos = [(first, last) for first in FIRST_NAMES for last in LAST_NAMES]
+    rng.shuffle(combos)
+
+    def name(i: int) -> str:
+        first, last = combos[i % len(combos)]
+        round_ = i // len(combos)
+        if round_ == 0:
+            return f"{first} {last}"
+        suffix = f" {(round_ - 1) // 26 + 1}" if round_ > 26 else ""
+        return f"{first} {chr(ord('A') + (round_ - 1) % 26)}. {last}{suffix}"
+
+    def personnel():
+        for i, personnel_type in enumerate(personnel_types, start=1):
+            first, last = combos[(i - 1) % len(combos)]
+            hire, expiration = _contract(rng)
+            yield {
+                "personnel_id": i,
+                "name": name(i - 1),
+                "email": f"{first.lower()}.{last.lower()}{i}@example.com",
+                "phone": f"08{rng.randrange(10 ** 8):08d}",
+                "personnel_type": personnel_type,
+                "contract_hire_date": hire,
+                "contract_expiration_date": expiration,
+            }
+
+    def performer():
+        for i, personnel_type in enumerate(personnel_types, start=1):
+            if personnel_type in PERFORMER_TYPES and rng.random() < 0.8:
+                yield {
+                    "personnel_id": i,
+                    "performance_type": PERFORMER_TYPES[personnel_type],
+                    "agency": rng.choice(AGENCIES),
+                }
+
+    def partner_personnel():
+        for i in range(1, n["partner_personnel"] + 1):
+            hire, expiration = _contract(rng)
+            yield {
+                "partner_id": i,
+                "name": f"{rng.choice(TITLE_WORDS)} {rng.choice(SERVICE_TYPES)} {i}",
+                "service_type": rng.choice(SERVICE_TYPES),
+                "personnel_id": rng.randint(1, n["personnel"]),
+                "contact_hire_date": hire,
+                "contact_expiration_date": expiration,
+                "contract_amount": rng.randrange(5, 200) * 1000,
+                "contact_info": f"contact{i}@partner.example.com",
+            }
+
+    production_types = ["General" if rng.random() < 0.7 else "Event" for _ in range(n["production"])]
+
+    def production():
+        for i, production_type in enumerate(production_types, start=1):
+            hire, expiration = _contract(rng)
+            yield {
+                "production_id": i,
+                "title": f"{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {i}",
+                "production_type": production_type,
+                "contract_hire_date": hire,
+                "contract_expiration_date": expiration,
+                "partner_id": rng.randint(1, n["partner_personnel"]),
+            }
+
+    def generalproduction():
+        for i, production_type in enumerate(production_types, start=1):
+            if production_type == "General":
+                yield {
+                    "production_id": i,
+                    "genre": rng.choice(GENRES),
+                    "plan_release_quarter": rng.randint(1, 4),
+                    "plan_release_year": rng.randint(2024, 2027),
+                }
+
+    def eventproduction():
+        for i, production_type in enumerate(production_types, start=1):
+            if production_type == "Event":
+                yield {
+                    "production_id": i,
+                    "event_type": rng.choice(EVENT_TYPES),
+                    "location": f"{rng.choice(TITLE_WORDS)} Arena",
+                    "audience_capacity": rng.randrange(1, 100) * 100,
+                }
+
+    def productionexpense():
+        for i in range(1, n["productionexpense"] + 1):
+            expense_type = rng.choice(EXPENSE_TYPES)
+            yield {
+                "expense_id": i,
+                "production_id": rng.randint(1, n["production"]),
+                "expense_type": expense_type,
+                "amount": rng.randrange(1, 500) * 100,
+                "expense_date": _day(rng),
+                "description": f"{expense_type} for shoot",
+            }
+
+    def personnelassignment():
+        # Distinct (personnel, production) pairs, capped by how many exist.
+        target = min(n["personnelassignment"], n["personnel"] * n["production"])
+        seen = set()
+        while len(seen) < target:
+            pair = (rng.randint(1, n["personnel"]), rng.randint(1, n["production"]))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            yield {"personnel_id": pair[0], "production_id": pair[1], "role_title": rng.choice(ROLE_TITLES)}
+
+    def productionschedule():
+        for i in range(1, n["productionschedule"] + 1):
+            start, end = _slot(rng, 8)
+            yield {
+                "prod_schedule_id": i,
+                "production_id": rng.randint(1, n["production"]),
+                "personnel_id": rng.randint(1, n["personnel"]),
+                "start_dt": start,
+                "end_dt": end,
+                "taskname": rng.choice(TASKNAMES),
+                "location": f"Studio {rng.randint(1, 50)}",
+            }
+
+    def rentalplace():
+        for i in range(1, n["rentalplace"] + 1):
+            place_type = rng.choice(PLACE_TYPES)
+            yield {
+                "place_id": i,
+                "name": f"{place_type} {rng.choice(TITLE_WORDS)} {i}",
+                "address": f"{rng.randint(1, 999)} {rng.choice(TITLE_WORDS)} Rd",
+                "type": place_type,
+                "capacity": rng.randrange(1, 100) * 50,
+                "contact_info": f"09{rng.randrange(10 ** 8):08d}",
+            }
+
+    usage_days: List[int] = []
+
+    def rentalusage():
+        for i in range(1, n["rentalusage"] + 1):
+            start, end = _slot(rng, 12)
+            usage_days.append(1 + (end.date() - start.date()).days)
+            yield {
+                "usage_id": i,
+                "production_id": rng.randint(1, n["production"]),
+                "place_id": rng.randint(1, n["rentalplace"]),
+                "start_time": start,
+                "end_time": end,
+            }
+
+    def rentalpayment():
+        for i, days in enumerate(usage_days, start=1):
+            rate = rng.randrange(10, 100) * 100
+            yield {
+                "payment_id": i,
+                "usage_id": i,
+                "daily_rate": rate,
+                "total_cost": rate * days,
+                "payment_date": _day(rng),
+            }
+
+    tables: List[Callable[[], Iterable[Dict[str, Any]]]] = [
+        personnel, performer, partner_personnel, production, generalproduction, eventproduction,
+        productionexpense, personnelassignment, productionschedule, rentalplace, rentalusage, rentalpayment
+    ]
+    for table in tables:
+        yield table.__name__, table()
+
+
+def load(engine: Engine, scale: float, seed: int = 42, drop: bool = False,
+         chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """Creates the schema (dropping it first with `drop`) and bulk-loads the dataset. Returns rows per table."""
+    if drop:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    loaded = {}
+    for name, rows in generate(scale, seed):
+        table = Base.metadata.tables[name]
+        rows = iter(rows)
+        total = 0
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            with engine.begin() as conn:
+                conn.execute(table.insert(), chunk)
+            total += len(chunk)
+        loaded[name] = total
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of the database to fill.")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--drop", action="store_true", help="Drop the existing tables first.")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    started = time.perf_counter()
+    loaded = load(engine, args.scale, args.seed, args.drop, args.chunk_size)
+    elapsed = time.perf_counter() - started
+    for name, total in loaded.items():
+        print(f"{name:>20}  {total:>10}")
+    print(f"{'total':>20}  {sum(loaded.values()):>10}  rows in {elapsed:.1f} s")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
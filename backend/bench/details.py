@@ -0,0 +1,78 @@
+"""
+Counts the queries and time needed to read whole productions (see
+app/details.py) for growing batches of ids, in two forms:
+
+  * lazy   - the productions alone, each relationship loaded on first access
+             (one query per production and relationship: N+1 per level);
+  * eager  - `production_details`, with the selectin / joined loads.
+
+Both must return the same detail. The bound on the eager query count is
+asserted by tests/test_details.py; this script shows what it saves:
+
+    python -m bench.details --scale 0.05 --sizes 1 10 100
+"""
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import details
+from app.details import production_details
+from app.models import Production
+from bench.datagen import load
+
+
+def lazy_details(db: Session, production_ids: Sequence[int]) -> List[Dict[str, Any]]:
+    productions = db.execute(
+        select(Production).where(Production.production_id.in_(production_ids))
+    ).scalars().all()
+    by_id = {p.production_id: p for p in productions}
+    return [details._detail(by_id[pid]) for pid in production_ids if pid in by_id]
+
+
+def measure(engine: Any, fn: Callable[[Session], Any]) -> Tuple[Any, int, float]:
+    """(result, statements executed, seconds) of `fn` in a fresh session."""
+    count = 0
+
+    def counter(*_: Any) -> None:
+        nonlocal count
+        count += 1
+
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        with Session(engine) as db:
+            started = time.perf_counter()
+            result = fn(db)
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    return result, count, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=0.05, help="bench.datagen scale of the in-memory database.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100], help="Batch sizes to measure.")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    load(engine, args.scale)
+    with Session(engine) as db:
+        all_ids = list(db.execute(select(Production.production_id).order_by(Production.production_id)).scalars())
+
+    print(f"{'ids':>5}  {'lazy queries':>12}  {'lazy ms':>8}  {'eager queries':>13}  {'eager ms':>8}")
+    for size in args.sizes:
+        ids = all_ids[:size]
+        lazy, lazy_queries, lazy_seconds = measure(engine, lambda db: lazy_details(db, ids))
+        eager, eager_queries, eager_seconds = measure(engine, lambda db: production_details(db, ids))
+        assert eager == lazy, f"different detail for {size} ids"
+        print(f"{len(ids):>5}  {lazy_queries:>12}  {lazy_seconds * 1e3:>8.1f}  "
+              f"{eager_queries:>13}  {eager_seconds * 1e3:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
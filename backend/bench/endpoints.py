@@ -0,0 +1,177 @@
+"""
+Load-tests every router endpoint through the ASGI test client on synthetic
+data at one or more scale factors, and reports p50/p95/p99 latency, throughput
+and peak RSS per scale:
+
+    python -m bench.endpoints --scales 0.1 1 10 --requests 50
+    python -m bench.endpoints --scales 1 --url mysql+pymysql://root:pw@localhost/AgencyBench
+
+Each scale is loaded with `bench.datagen` (into a fresh SQLite file unless
+`--url` is given; a `--url` database is dropped and refilled) and measured in
+its own process, so peak RSS belongs to that scale alone. The result cache is
+off unless `--cache` is given, so repeated requests reach the query path. The
+first request of each endpoint (which also loads the in-memory indexes) is
+reported as `cold ms` and left out of the percentiles.
+"""
+
+import argparse
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, select
+
+from bench.datagen import load
+
+PAGE = {"limit": 500}
+DAY = {"start_dt": "2024-06-03T09:00:00", "end_dt": "2024-06-03T18:00:00"}
+YEAR = {"start_dt": "2024-01-01T00:00:00", "end_dt": "2024-12-31T23:59:59"}
+
+# (label, method, path, query parameters, JSON body). `{performer}` is filled in
+# with a performer's name from the generated data.
+ENDPOINTS: List[Tuple[str, str, str, Dict[str, Any], Optional[Dict[str, Any]]]] = [
+    ("Q1", "GET", "/personnel/by-type", {"personnel_types": ["Director", "Actor"], "limit": 100}, None),
+    ("Q2", "GET", "/personnel/available", {**DAY, "personnel_types": ["Actor", "Crew"]}, None),
+    ("Q2 sql", "GET", "/personnel/available", {**DAY, "personnel_types": ["Actor", "Crew"], "source": "sql"}, None),
+    ("Q3", "GET", "/rental/available", DAY, None),
+    ("Q3 batch", "POST", "/rental/available/batch", {},
+     {"horizon_start": "2024-06-03T08:00:00", "horizon_end": "2024-06-10T08:00:00", "slot_minutes": 60}),
+    ("Q4", "GET", "/schedule/activity/counts", YEAR, None),
+    ("Q5", "GET", "/personnel/actors/top-projects", {"n": 10}, None),
+    ("Q5 sql", "GET", "/personnel/actors/top-projects", {"n": 10, "source": "sql"}, None),
+    ("Q6", "GET", "/personnel/actors/least-jobs", {"n": 10}, None),
+    ("Q6 sql", "GET", "/personnel/actors/least-jobs", {"n": 10, "source": "sql"}, None),
+    ("Q7", "GET", "/stats/personnel/assignments", PAGE, None),
+    ("Q7 name", "GET", "/stats/personnel/assignments", {**PAGE, "name_search": "kim"}, None),
+    ("Q7 name sql", "GET", "/stats/personnel/assignments", {**PAGE, "name_search": "kim", "source": "sql"}, None),
+    ("Q8", "GET", "/stats/personnel/contracts", {"start_date": "2024-01-01", "end_date": "2024-03-31"}, None),
+    ("Q9", "GET", "/schedule/production/music", {"start_date": "2024-01-01"}, None),
+    ("Q10", "GET", "/rental/in-use-on-date", {**PAGE, "target_date": "2024-06-03"}, None),
+    ("Q11", "GET", "/stats/production/expenses/summary", PAGE, None),
+    ("Q11 sql", "GET", "/stats/production/expenses/summary", {**PAGE, "source": "sql"}, None),
+    ("Q12", "GET", "/stats/performers", PAGE, None),
+    ("Q13", "GET", "/stats/partners/for-performer", {"performer_name": "{performer}"}, None),
+    ("Q14", "GET", "/schedule/upcoming", {**PAGE, "current_datetime": "2024-06-01T00:00:00"}, None),
+    ("Q14 stream", "GET", "/schedule/upcoming", {"current_datetime": "2025-06-01T00:00:00", "stream": True}, None),
+    ("search", "GET", "/search", {"q": "mo", "limit": 10}, None),
+]
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def _performer_name(url: str) -> str:
+    from app.models import Performer, Personnel
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        name = conn.execute(
+            select(Personnel.name).join(Performer, Personnel.personnel_id == Performer.personnel_id).limit(1)
+        ).scalar()
+    engine.dispose()
+    return name or ""
+
+
+def measure(requests: int) -> Dict[str, Any]:
+    """Runs every endpoint `requests` times against the database in DATABASE_URL."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    performer = _performer_name(os.environ["DATABASE_URL"])
+    results = []
+    with TestClient(app) as client:
+        for label, method, path, params, body in ENDPOINTS:
+            params = {k: performer if v == "{performer}" else v for k, v in params.items()}
+
+            def call() -> int:
+                response = client.request(method, path, params=params, json=body)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{label}: HTTP {response.status_code} {response.text[:200]}")
+                return len(response.content)
+
+            started = time.perf_counter()
+            size = call()
+            cold = time.perf_counter() - started
+
+            timings = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                call()
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            results.append({
+                "endpoint": label,
+                "cold_ms": cold * 1000,
+                "p50_ms": percentile(timings, 50) * 1000,
+                "p95_ms": percentile(timings, 95) * 1000,
+                "p99_ms": percentile(timings, 99) * 1000,
+                "rps": len(timings) / sum(timings),
+                "bytes": size,
+            })
+    # ru_maxrss is in kilobytes on Linux.
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"results": results, "peak_rss_mb": peak_rss_mb}
+
+
+def run_scale(scale: float, args: argparse.Namespace, workdir: str) -> Dict[str, Any]:
+    url = args.url or f"sqlite:///{os.path.join(workdir, f'agency-{scale:g}.db')}"
+    engine = create_engine(url)
+    started = time.perf_counter()
+    loaded = load(engine, scale, args.seed, drop=True)
+    load_seconds = time.perf_counter() - started
+    engine.dispose()
+
+    # app.database reads its settings at import, so the app runs in a child process.
+    env = dict(os.environ, DATABASE_URL=url)
+    if not args.cache:
+        env["CACHE_BACKEND"] = "off"
+    child = subprocess.run(
+        [sys.executable, "-m", "bench.endpoints", "--measure", "--requests", str(args.requests)],
+        env=env, check=True, stdout=subprocess.PIPE, text=True
+    )
+    report = json.loads(child.stdout.strip().splitlines()[-1])
+    report.update(scale=scale, rows=sum(loaded.values()), load_seconds=load_seconds)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[0.1, 1])
+    parser.add_argument("--requests", type=int, default=30, help="Timed requests per endpoint.")
+    parser.add_argument("--url", help="Database to fill and measure instead of a temporary SQLite file.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", action="store_true", help="Leave the result cache on.")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON instead of tables.")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.requests)))
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        reports = [run_scale(scale, args, workdir) for scale in args.scales]
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    for report in reports:
+        print(f"\nscale {report['scale']:g}: {report['rows']} rows loaded in {report['load_seconds']:.1f} s, "
+              f"peak RSS {report['peak_rss_mb']:.0f} MB")
+        print(f"{'endpoint':<12}  {'cold ms':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'req/s':>8}  {'bytes':>9}")
+        for r in report["results"]:
+            print(f"{r['endpoint']:<12}  {r['cold_ms']:>8.1f}  {r['p50_ms']:>8.1f}  {r['p95_ms']:>8.1f}  "
+                  f"{r['p99_ms']:>8.1f}  {r['rps']:>8.0f}  {r['bytes']:>9}")
+
+
+if __name__ == "__main__":
+    main()
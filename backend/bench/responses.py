@@ -0,0 +1,81 @@
+"""
+Compares the two ways a route can turn its rows into an HTTP body:
+
+  * pydantic  - return a dict and let FastAPI validate it against
+                `response_model=APIResponse`, run jsonable_encoder and json.dumps
+                (what every route did before `app.responses`);
+  * fast      - return `api_response(...)`, rendered directly by orjson.
+
+Runs without a database on synthetic, Q14-shaped rows:
+
+    python -m bench.responses --rows 1000 10000 100000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.responses import api_response
+from app.schemas import APIResponse
+
+KEY = ["start_dt", "end_dt", "taskname", "location", "production_title", "personnel_name"]
+
+
+def synthetic_rows(count: int) -> List[Dict[str, Any]]:
+    start = datetime(2025, 1, 1, 9)
+    return [
+        {
+            "start_dt": (start + timedelta(hours=i)).isoformat(),
+            "end_dt": (start + timedelta(hours=i, minutes=90)).isoformat(),
+            "taskname": f"Task {i % 37}",
+            "location": f"Studio {i % 11}",
+            "production_title": f"Production {i % 500}",
+            "personnel_name": f"Person {i % 2000}"
+        }
+        for i in range(count)
+    ]
+
+
+def pydantic_path(rows: List[Dict[str, Any]]) -> bytes:
+    field = create_response_field(name="bench_response", type_=APIResponse)
+    payload = {"count": len(rows), "key": KEY, "data": rows}
+    content = asyncio.run(serialize_response(field=field, response_content=payload, is_coroutine=True))
+    return JSONResponse(content).body
+
+
+def fast_path(rows: List[Dict[str, Any]]) -> bytes:
+    return api_response(KEY, rows).body
+
+
+def best_of(fn: Callable[[List[Dict[str, Any]]], bytes], rows: List[Dict[str, Any]], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'pydantic ms':>12}  {'fast ms':>9}  {'speedup':>7}  {'bytes':>10}")
+    for count in args.rows:
+        rows = synthetic_rows(count)
+        slow = best_of(pydantic_path, rows, args.repeat)
+        fast = best_of(fast_path, rows, args.repeat)
+        size = len(fast_path(rows))
+        print(f"{count:>8}  {slow * 1000:>12.1f}  {fast * 1000:>9.1f}  {slow / fast:>6.1f}x  {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
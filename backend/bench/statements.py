@@ -0,0 +1,171 @@
+"""
+Measures the per-request Python cost of the query builders of the hottest
+endpoints, in two forms:
+
+  * rebuilt   - the select() tree is constructed for every request, with the
+                request's values inlined (what every route did before the
+                statements became module-level constants);
+  * prepared  - the route's module-level statement, executed with the values
+                as bound parameters.
+
+`build` is the statement alone (construction plus the cache key SQLAlchemy
+computes to find the compiled SQL), `execute` the full round trip against an
+in-memory SQLite database filled by `bench.datagen`:
+
+    python -m bench.statements --scale 0.05 --repeat 2000
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, func, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import Select
+
+from app.models import (
+    Personnel, PersonnelAssignment, Production, ProductionSchedule, RentalPlace, RentalUsage
+)
+from app.pagination import PageParams
+from app.routers.general_stats import _assignment_keyset, _assignments_matching
+from app.routers.personnel import _personnel_by_type
+from app.routers.rental import _available_places
+from app.routers.schedule_activity import _activity_counts, _upcoming, _upcoming_keyset
+from bench.datagen import load
+
+START = datetime(2024, 6, 3, 9)
+END = datetime(2024, 6, 3, 18)
+YEAR_START = datetime(2024, 1, 1)
+YEAR_END = datetime(2024, 12, 31, 23, 59, 59)
+TYPES = ["Director", "Actor"]
+
+
+def _page(limit: int) -> PageParams:
+    return PageParams(limit=limit, cursor=None, stream=False)
+
+
+def rebuilt_q1() -> Select:
+    return (
+        select(Personnel.personnel_id, Personnel.name, Personnel.personnel_type)
+        .where(Personnel.personnel_type.in_(TYPES))
+        .limit(100)
+    )
+
+
+def rebuilt_q3() -> Select:
+    conflicting = (
+        select(RentalUsage.place_id)
+        .where(RentalUsage.start_time < END, RentalUsage.end_time > START)
+        .distinct()
+    ).scalar_subquery()
+    return (
+        select(RentalPlace.place_id, RentalPlace.name, RentalPlace.address, RentalPlace.type, RentalPlace.capacity)
+        .where(RentalPlace.place_id.not_in(conflicting))
+    )
+
+
+def rebuilt_q4() -> Select:
+    return (
+        select(ProductionSchedule.taskname, func.count().label("activity_count"))
+        .where(ProductionSchedule.start_dt >= YEAR_START)
+        .where(ProductionSchedule.end_dt <= YEAR_END)
+        .group_by(ProductionSchedule.taskname)
+        .order_by(func.count().desc())
+    )
+
+
+def rebuilt_q7() -> Select:
+    return (
+        select(
+            Personnel.name.label("personnel_name"),
+            Personnel.personnel_type,
+            Production.title.label("production_title"),
+            PersonnelAssignment.role_title
+        )
+        .outerjoin(PersonnelAssignment, Personnel.personnel_id == PersonnelAssignment.personnel_id)
+        .outerjoin(Production, PersonnelAssignment.production_id == Production.production_id)
+        .where(or_(Personnel.name.like("%kim%")))
+        .add_columns(Personnel.personnel_id.label("personnel_id"), PersonnelAssignment.production_id.label("production_id"))
+        .order_by(Personnel.name.asc(), Personnel.personnel_id.asc(), PersonnelAssignment.production_id.asc())
+        .limit(500)
+    )
+
+
+def rebuilt_q14() -> Select:
+    return (
+        select(
+            ProductionSchedule.start_dt,
+            ProductionSchedule.end_dt,
+            ProductionSchedule.taskname,
+            ProductionSchedule.location,
+            Production.title.label("production_title"),
+            Personnel.name.label("personnel_name")
+        )
+        .join(Production, ProductionSchedule.production_id == Production.production_id)
+        .join(Personnel, ProductionSchedule.personnel_id == Personnel.personnel_id)
+        .where(ProductionSchedule.start_dt >= START)
+        .add_columns(ProductionSchedule.prod_schedule_id.label("prod_schedule_id"))
+        .order_by(ProductionSchedule.start_dt.asc(), ProductionSchedule.prod_schedule_id.asc())
+        .limit(500)
+    )
+
+
+def prepared_cases() -> Dict[str, Tuple[Callable[[], Select], Tuple[Select, Dict[str, Any]]]]:
+    """label -> (builder of the rebuilt statement, (prepared statement, its parameters))."""
+    page = _page(500)
+    return {
+        "Q1": (rebuilt_q1, (_personnel_by_type, {"personnel_types": TYPES, "limit": 100})),
+        "Q3": (rebuilt_q3, (_available_places, {"start_dt": START, "end_dt": END})),
+        "Q4": (rebuilt_q4, (_activity_counts, {"start_dt": YEAR_START, "end_dt": YEAR_END})),
+        "Q7 name sql": (rebuilt_q7, (
+            _assignment_keyset.apply(_assignments_matching(False, None), page),
+            {"name_match": "%kim%", **_assignment_keyset.params(page)}
+        )),
+        "Q14": (rebuilt_q14, (
+            _upcoming_keyset.apply(_upcoming, page),
+            {"current_datetime": START, **_upcoming_keyset.params(page)}
+        )),
+    }
+
+
+def per_call_us(fn: Callable[[], Any], repeat: int) -> float:
+    for _ in range(min(repeat, 100)):
+        fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", type=float, default=0.05, help="bench.datagen scale of the in-memory database.")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    load(engine, args.scale)
+
+    rows: List[Tuple[str, float, float, float, float]] = []
+    with Session(engine) as db:
+        for label, (rebuild, (stmt, params)) in prepared_cases().items():
+            # Same rows either way.
+            assert db.execute(rebuild()).all() == db.execute(stmt, params).all(), label
+            rows.append((
+                label,
+                per_call_us(lambda: rebuild()._generate_cache_key(), args.repeat),
+                per_call_us(lambda: stmt._generate_cache_key(), args.repeat),
+                per_call_us(lambda: db.execute(rebuild()).all(), args.repeat),
+                per_call_us(lambda: db.execute(stmt, params).all(), args.repeat),
+            ))
+
+    print(f"{'endpoint':<12}  {'build us':>9}  {'prepared':>9}  {'execute us':>10}  {'prepared':>9}  {'saved':>6}")
+    for label, build, build_prepared, execute, execute_prepared in rows:
+        saved = 1 - execute_prepared / execute
+        print(f"{label:<12}  {build:>9.1f}  {build_prepared:>9.1f}  {execute:>10.1f}  {execute_prepared:>9.1f}  {saved:>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -132,6 +132,23 @@ CREATE TABLE rentalpayment (
     FOREIGN KEY (usage_id) REFERENCES rentalusage(usage_id)
 );
 
+-- ===============================
+-- SECONDARY INDEXES
+-- (kept in sync with __table_args__ in backend/app/models.py)
+-- ===============================
+
+CREATE INDEX ix_personnel_type_id ON personnel (personnel_type, personnel_id);
+CREATE INDEX ix_personnel_name ON personnel (name);
+CREATE INDEX ix_personnel_contract ON personnel (contract_hire_date, contract_expiration_date);
+CREATE INDEX ix_production_hire_date ON production (contract_hire_date);
+CREATE INDEX ix_production_title ON production (title);
+CREATE INDEX ix_generalproduction_genre ON generalproduction (genre, production_id);
+CREATE INDEX ix_personnelassignment_production ON personnelassignment (production_id, personnel_id);
+CREATE INDEX ix_productionschedule_start_end ON productionschedule (start_dt, end_dt, personnel_id);
+CREATE INDEX ix_productionschedule_personnel_start ON productionschedule (personnel_id, start_dt, end_dt);
+CREATE INDEX ix_rentalusage_place_time ON rentalusage (place_id, start_time, end_time);
+CREATE INDEX ix_rentalusage_time ON rentalusage (start_time, end_time, place_id);
+
 -- ===============================
 -- SAMPLE DATA
 -- ===============================
@@ -0,0 +1,51 @@
+# Production serving profile:  gunicorn -c gunicorn.conf.py app.main:app
+#
+# One uvicorn worker per available core (WEB_CONCURRENCY overrides). The app is
+# imported once in the master and forked into the workers; importing it does no
+# I/O, and `post_fork` gives every worker its own connection pools.
+#
+# Signals to the master: HUP restarts the workers gracefully (code changes need
+# USR2 to start a new master, then QUIT to the old one, since the app is
+# preloaded), TTIN / TTOU add or remove a worker, TERM shuts down gracefully.
+
+import os
+
+from app.serving import worker_count
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = worker_count()
+
+# The memory result cache is per process: a write clears it only in the worker
+# that served the write, and the others would keep answering /stats from stale
+# entries for up to CACHE_TTL. With several workers the cache is therefore off
+# unless CACHE_BACKEND is set (redis shares both the entries and invalidation).
+# The in-memory indexes and aggregates (app/stores.py) are per process too: a
+# write is applied at once only in the worker that served it, and the others
+# see it at their next reload. Their default max age drops from 60 to
+# SEVERAL_WORKERS_MAX_AGE seconds to bound that.
+# Set before the app is imported, which happens after this file is read.
+SEVERAL_WORKERS_MAX_AGE = "5"
+
+if workers > 1:
+    os.environ.setdefault("CACHE_BACKEND", "off")
+    for name in ("AVAILABILITY_INDEX_MAX_AGE", "SEARCH_INDEX_MAX_AGE", "AGGREGATES_MAX_AGE"):
+        os.environ.setdefault(name, SEVERAL_WORKERS_MAX_AGE)
+worker_class = "app.serving.AgencyUvicornWorker"
+preload_app = os.getenv("SERVER_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+# Recycle a worker after this many requests (plus up to 10% jitter, so the
+# workers do not all restart together) to bound slow memory growth.
+max_requests = int(os.getenv("SERVER_MAX_REQUESTS", "10000"))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.getenv("SERVER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("SERVER_KEEPALIVE", "5"))
+
+accesslog = os.getenv("SERVER_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    from app.database import reset_after_fork
+    reset_after_fork()
@@ -0,0 +1,66 @@
+"""
+Shared fixtures: a small `bench.datagen` dataset in an in-memory SQLite
+database, and a TestClient whose routes use it.
+
+    cd backend && python -m pytest -q
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.aggregates import activity_rollup, aggregate_store
+from app.availability import availability_index
+from app.cache import result_cache
+from app.database import get_db
+from app.main import app
+from app.search import search_index
+from bench.datagen import load
+
+SCALE = 0.2
+
+
+@pytest.fixture(scope="session")
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    # pysqlite's own transaction handling ignores SAVEPOINTs, so a test that
+    # commits would write through the outer transaction of `db`. Let
+    # SQLAlchemy emit BEGIN itself instead.
+    @event.listens_for(engine, "connect")
+    def _no_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    load(engine, SCALE)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    # Every test runs in a transaction that is rolled back afterwards.
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    yield session
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+
+@pytest.fixture
+def client(db):
+    # The in-memory stores and the result cache outlive a test's rolled-back rows.
+    for store in (availability_index, aggregate_store, activity_rollup, search_index):
+        store.invalidate()
+    if result_cache.backend is not None:
+        result_cache.backend.clear()
+    app.dependency_overrides[get_db] = lambda: db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.aggregates import ActivityRollup, AggregateStore, activity_rollup, aggregate_store
+from app.models import Personnel, PersonnelAssignment, ProductionExpense, ProductionSchedule
+
+
+def test_store_matches_sql(db):
+    store = AggregateStore()
+    store.load(db)
+    assert store.check(db) == []
+
+
+def _get(client, path, **params):
+    return client.get(path, params=params).json()
+
+
+def test_actor_counts_index_and_sql_agree(client):
+    # The SQL orders ties arbitrarily; the index orders them by name.
+    for path, key in [("/personnel/actors/top-projects", "total_projects"), ("/personnel/actors/least-jobs", "total_jobs")]:
+        every = {(r["name"], r[key]) for r in _get(client, path, n=10000, source="sql")["data"]}
+        index = _get(client, path, n=10, source="index")["data"]
+        sql = _get(client, path, n=10, source="sql")["data"]
+        assert [r[key] for r in index] == [r[key] for r in sql], path
+        assert {(r["name"], r[key]) for r in index} <= every, path
+
+
+def test_expense_summary_index_and_sql_agree(client):
+    path = "/stats/production/expenses/summary"
+    assert _get(client, path, source="index")["data"] == _get(client, path, source="sql")["data"]
+    pages = {}
+    for source in ("index", "sql"):
+        cursor, rows = None, []
+        while True:
+            body = _get(client, path, limit=7, source=source, **({"cursor": cursor} if cursor else {}))
+            rows.extend(body["data"])
+            cursor = body.get("next_cursor")
+            if not cursor:
+                break
+        pages[source] = rows
+    assert pages["index"] == pages["sql"]
+
+
+def test_committed_writes_are_applied(client, db):
+    aggregate_store.load(db)
+    db.add(Personnel(personnel_id=990001, name="New Actor", personnel_type="Actor"))
+    db.add(PersonnelAssignment(personnel_id=990001, production_id=1, role_title="Lead"))
+    db.add(ProductionExpense(expense_id=990001, production_id=2, expense_type="Props",
+                             amount=Decimal("1234.50"), expense_date=date(2031, 1, 2)))
+    db.commit()
+    expense = db.get(ProductionExpense, 990001)
+    expense.production_id = 3
+    db.delete(db.get(PersonnelAssignment, (990001, 1)))
+    db.commit()
+    assert aggregate_store._loaded_at is not None
+    assert aggregate_store.check(db) == []
+
+
+def test_rollup_matches_sql(db):
+    rollup = ActivityRollup()
+    rollup.load(db)
+    assert rollup.check(db) == []
+
+
+def test_activity_series_index_and_sql_agree(client):
+    path = "/schedule/activity/series"
+    for start, end, bucket in [("2023-01-01", "2025-12-31", "month"), ("2024-02-10", "2024-05-03", "week"),
+                               ("2024-03-01", "2024-03-31", "day"), ("2030-01-01", "2030-12-31", "month")]:
+        answers = [
+            _get(client, path, start_date=start, end_date=end, bucket=bucket, source=source)["data"]
+            for source in ("index", "sql")
+        ]
+        assert answers[0] == answers[1], (start, end, bucket)
+
+
+def test_committed_schedule_writes_are_applied(client, db):
+    activity_rollup.load(db)
+    entries = [
+        ProductionSchedule(prod_schedule_id=990001 + i, production_id=1, personnel_id=1, taskname="Rehearsal",
+                           start_dt=datetime(2031, 1, 2 + i, 9), end_dt=datetime(2031, 1, 2 + i, 10))
+        for i in range(3)
+    ]
+    db.add_all(entries)
+    db.commit()
+    db.delete(entries[0])
+    db.commit()
+    assert activity_rollup._loaded_at is not None
+    assert activity_rollup.check(db) == []
+    data = _get(client, "/schedule/activity/series", start_date="2031-01-01", end_date="2031-01-31", bucket="month")["data"]
+    assert data == [{"bucket_start": "2031-01-01", "taskname": "Rehearsal", "activity_count": 2}]
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.async_routes import as_async_router
+from app.cache import result_cache
+from app.database import get_async_db
+from app.routers import general_stats, personnel, rental, schedule_activity
+from bench.datagen import load
+
+from .conftest import SCALE
+
+# One path per prepared statement family, with filters that pick different
+# statement shapes (Q7/Q8 search filters, expanding IN lists, cursor pages).
+PATHS = [
+    "/personnel/by-type?personnel_types=Actor&personnel_types=Director&limit=7",
+    "/personnel/available?start_dt=2024-02-10T09:00:00&end_dt=2024-02-10T12:00:00&source=sql",
+    "/personnel/actors/top-projects?n=4&source=sql",
+    "/personnel/actors/least-jobs?n=6&source=sql",
+    "/rental/available?start_dt=2024-02-10T09:00:00&end_dt=2024-02-10T12:00:00",
+    "/rental/in-use-on-date?target_date=2024-05-01&limit=4",
+    "/schedule/activity/counts?start_dt=2024-01-01T00:00:00&end_dt=2024-03-01T00:00:00",
+    "/schedule/production/music?start_date=2023-06-01",
+    "/schedule/upcoming?current_datetime=2024-06-01T00:00:00&limit=3",
+    "/stats/personnel/assignments?limit=20",
+    "/stats/personnel/assignments?name_search=an&source=sql&limit=20",
+    "/stats/personnel/assignments?title_search=the&name_search=li&limit=20",
+    "/stats/personnel/contracts?start_date=2024-01-01&end_date=2024-02-01&name_search=ar&source=sql",
+    "/stats/production/expenses/summary?source=sql&limit=5",
+]
+
+
+@pytest.fixture(scope="module")
+def async_engine(tmp_path_factory):
+    path = tmp_path_factory.mktemp("async") / "agency.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    load(sync_engine, SCALE)
+    sync_engine.dispose()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def async_client(async_engine, client):
+    """The query routers as DB_ASYNC=true mounts them, on the same dataset as `client`."""
+    app = FastAPI()
+    for router in (personnel.router, rental.router, schedule_activity.router, general_stats.router):
+        app.include_router(as_async_router(router))
+
+    async def _get_async_db():
+        async with AsyncSession(async_engine) as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = _get_async_db
+    return TestClient(app)
+
+
+def _clear_result_cache():
+    if result_cache.backend is not None:
+        result_cache.backend.clear()
+
+
+def test_async_routes_match_the_sync_ones(client, async_client):
+    expected = {}
+    for path in PATHS:
+        response = client.get(path)
+        assert response.status_code == 200, path
+        expected[path] = response.json()
+        if response.json().get("next_cursor"):
+            page = f"{path}&cursor={response.json()['next_cursor']}"
+            expected[page] = client.get(page).json()
+    _clear_result_cache()
+    for path, body in expected.items():
+        response = async_client.get(path)
+        assert response.status_code == 200, path
+        assert response.json() == body, path
+
+
+def test_async_routes_reuse_the_prepared_statements(async_engine, async_client):
+    executed = []
+
+    def _record(conn, clauseelement, multiparams, params, execution_options):
+        executed.append(clauseelement)
+
+    event.listen(async_engine.sync_engine, "before_execute", _record)
+    try:
+        for target_date in ("2024-05-01", "2024-06-10"):
+            _clear_result_cache()
+            assert async_client.get(f"/rental/in-use-on-date?target_date={target_date}&limit=4").status_code == 200
+    finally:
+        event.remove(async_engine.sync_engine, "before_execute", _record)
+    assert len(executed) == 2
+    assert executed[0] is executed[1]
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from app.availability import AvailabilityIndex
+from app.models import Personnel, ProductionSchedule
+
+
+def _touching_schedules(db):
+    """A personnel busy in [09:00, 10:00) and [10:00, 11:00): two entries that only touch."""
+    db.add(Personnel(personnel_id=990001, name="Touching", personnel_type="Actor"))
+    db.add_all([
+        ProductionSchedule(prod_schedule_id=990001, personnel_id=990001,
+                           start_dt=datetime(2031, 1, 2, 9), end_dt=datetime(2031, 1, 2, 10)),
+        ProductionSchedule(prod_schedule_id=990002, personnel_id=990001,
+                           start_dt=datetime(2031, 1, 2, 10), end_dt=datetime(2031, 1, 2, 11)),
+    ])
+    db.flush()
+
+
+def test_index_matches_sql(db):
+    _touching_schedules(db)
+    index = AvailabilityIndex()
+    index.load(db)
+    assert index.check(db) == []
+
+
+def test_index_and_sql_agree_on_touching_windows(client, db):
+    _touching_schedules(db)
+    for start, end in [("08:00", "09:00"), ("11:00", "12:00"), ("09:30", "10:30"), ("10:00", "10:01")]:
+        params = {
+            "start_dt": f"2031-01-02T{start}:00", "end_dt": f"2031-01-02T{end}:00",
+            "personnel_types": ["Actor"]
+        }
+        answers = [
+            {r["personnel_id"] for r in client.get("/personnel/available", params={**params, "source": source}).json()["data"]}
+            for source in ("index", "sql")
+        ]
+        assert answers[0] == answers[1], (start, end)
+
+
+def test_empty_window_is_rejected(client):
+    for source in ("index", "sql"):
+        response = client.get("/personnel/available", params={
+            "start_dt": "2031-01-02T10:00:00", "end_dt": "2031-01-02T10:00:00", "source": source
+        })
+        assert response.status_code == 422
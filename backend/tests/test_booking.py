@@ -0,0 +1,100 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.intervals import overlapping_pairs
+from app.models import ProductionSchedule, RentalUsage
+
+PATH = "/schedule/bookings/batch"
+
+
+def _at(day, hour):
+    return datetime(2031, 1, day, hour).isoformat()
+
+
+def _schedule(personnel_id, start, end, production_id=1):
+    return {"production_id": production_id, "personnel_id": personnel_id, "start_dt": start, "end_dt": end}
+
+
+def _rental(place_id, start, end, production_id=1):
+    return {"production_id": production_id, "place_id": place_id, "start_time": start, "end_time": end}
+
+
+def _count(db, model):
+    return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_sweep_finds_the_same_pairs_as_a_pairwise_check():
+    rng = random.Random(7)
+    base = datetime(2031, 1, 1)
+    intervals = []
+    for _ in range(300):
+        start = base + timedelta(minutes=15 * rng.randrange(200))
+        intervals.append((rng.randrange(5), start, start + timedelta(minutes=15 * rng.randrange(1, 12))))
+    expected = {
+        (i, j) for i in range(len(intervals)) for j in range(i + 1, len(intervals))
+        if intervals[i][0] == intervals[j][0]
+        and intervals[i][1] < intervals[j][2] and intervals[j][1] < intervals[i][2]
+    }
+    assert {tuple(sorted(pair)) for pair in overlapping_pairs(intervals)} == expected
+
+
+def test_conflicts_with_existing_rows_and_within_the_batch(client, db):
+    existing = db.execute(select(ProductionSchedule).order_by(ProductionSchedule.prod_schedule_id)).scalars().first()
+    usage = db.execute(select(RentalUsage).order_by(RentalUsage.usage_id)).scalars().first()
+    schedules_before, rentals_before = _count(db, ProductionSchedule), _count(db, RentalUsage)
+
+    response = client.post(PATH, json={
+        "schedules": [
+            # 0: overlaps the existing entry.
+            _schedule(existing.personnel_id, existing.start_dt.isoformat(),
+                      (existing.start_dt + timedelta(minutes=1)).isoformat()),
+            # 1 and 2: overlap each other; 3 only touches 2.
+            _schedule(1, _at(2, 9), _at(2, 11)),
+            _schedule(1, _at(2, 10), _at(2, 12)),
+            _schedule(2, _at(2, 10), _at(2, 12)),
+            _schedule(2, _at(2, 12), _at(2, 13)),
+            # 5: an unknown person.
+            _schedule(999999, _at(2, 9), _at(2, 10)),
+        ],
+        "rentals": [
+            _rental(usage.place_id, usage.start_time.isoformat(), usage.end_time.isoformat()),
+            _rental(usage.place_id, _at(3, 9), _at(3, 10)),
+        ],
+    })
+    assert response.status_code == 200
+    report = response.json()
+    statuses = [(r["kind"], r["index"], r["status"]) for r in report["results"]]
+    assert statuses == [
+        ("schedule", 0, "conflict"), ("schedule", 1, "conflict"), ("schedule", 2, "conflict"),
+        ("schedule", 3, "created"), ("schedule", 4, "created"), ("schedule", 5, "invalid"),
+        ("rental", 0, "conflict"), ("rental", 1, "created"),
+    ]
+    results = report["results"]
+    assert {"with": "existing", "kind": "schedule", "id": existing.prod_schedule_id} == {
+        k: results[0]["conflicts"][0][k] for k in ("with", "kind", "id")}
+    assert results[1]["conflicts"] == [{"with": "batch", "kind": "schedule", "index": 2}]
+    assert results[2]["conflicts"] == [{"with": "batch", "kind": "schedule", "index": 1}]
+    assert any(c.get("id") == usage.usage_id for c in results[6]["conflicts"])
+    assert (report["created"], report["rejected"]) == (3, 5)
+    assert _count(db, ProductionSchedule) == schedules_before + 2
+    assert _count(db, RentalUsage) == rentals_before + 1
+    assert db.get(ProductionSchedule, results[4]["id"]).start_dt == datetime(2031, 1, 2, 12)
+
+
+def test_all_or_nothing_commits_nothing_on_a_conflict(client, db):
+    schedules_before = _count(db, ProductionSchedule)
+    batch = {"schedules": [_schedule(1, _at(2, 9), _at(2, 11)), _schedule(1, _at(2, 10), _at(2, 12)),
+                           _schedule(2, _at(2, 9), _at(2, 10))]}
+
+    response = client.post(PATH, json={**batch, "all_or_nothing": True})
+    assert response.status_code == 409
+    report = response.json()
+    assert (report["committed"], report["created"], report["rejected"]) == (False, 0, 2)
+    assert [r["status"] for r in report["results"]] == ["conflict", "conflict", "not_committed"]
+    assert _count(db, ProductionSchedule) == schedules_before
+
+    response = client.post(PATH, json={"schedules": batch["schedules"][2:], "all_or_nothing": True})
+    assert response.status_code == 200 and response.json()["created"] == 1
+    assert _count(db, ProductionSchedule) == schedules_before + 1
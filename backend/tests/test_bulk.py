@@ -0,0 +1,56 @@
+import io
+import sqlite3
+
+import pytest
+
+from app.bulk import UnreadableFile, import_records, read_records
+from app.models import Personnel
+
+
+def test_import_uses_the_request_session(client, db):
+    body = b"personnel_id,name,personnel_type\n990001,Imported One,Actor\n990002,Imported Two,Singer\n1,Taken,Actor\n"
+    response = client.post("/bulk/personnel/import?file_format=csv", content=body)
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2
+    assert [e["row"] for e in response.json()["errors"]] == [3]
+    assert db.get(Personnel, 990002).name == "Imported Two"
+
+
+def test_non_utf8_csv_is_rejected(client):
+    body = "personnel_id,name,personnel_type\n990001,José,Actor\n".encode("latin-1")
+    response = client.post("/bulk/personnel/import?file_format=csv", content=body)
+    assert response.status_code == 400
+    assert "UTF-8" in response.json()["detail"]
+
+
+def test_broken_parquet_is_rejected(client):
+    pytest.importorskip("pyarrow")
+    response = client.post("/bulk/personnel/import?file_format=parquet", content=b"PAR1 not really parquet")
+    assert response.status_code == 400
+    assert "Parquet" in response.json()["detail"]
+
+
+def test_unreadable_file_keeps_earlier_chunks(db):
+    # Enough rows that the text is decoded in several blocks before the bad byte.
+    rows = "".join(f"{900000 + i},Name {i},Actor\n" for i in range(2000))
+    body = ("personnel_id,name,personnel_type\n" + rows).encode() + "999999,José,Actor\n".encode("latin-1")
+    records = read_records(io.BytesIO(body), "csv")
+    with pytest.raises(UnreadableFile, match=r"[1-9]\d* row\(s\) of the earlier chunks were imported"):
+        import_records(db, "personnel", records, batch_size=100)
+
+
+def test_values_the_database_rejects_are_reported_per_row(db):
+    # SQLite raises DataError ("string or blob too big") past its length limit,
+    # like MySQL's strict mode does for a value that is too long.
+    raw = db.connection().connection.driver_connection
+    previous = raw.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, 20)
+    try:
+        report = import_records(db, "personnel", [
+            {"personnel_id": 990001, "name": "Short", "personnel_type": "Actor"},
+            {"personnel_id": 990002, "name": "A name that is much too long", "personnel_type": "Actor"},
+        ])
+    finally:
+        raw.setlimit(sqlite3.SQLITE_LIMIT_LENGTH, previous)
+    assert report["inserted"] == 1
+    assert [e["row"] for e in report["errors"]] == [2]
+    assert "rejected by the database" in report["errors"][0]["errors"][0]
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import database
+
+
+class _Stop(Exception):
+    pass
+
+
+def _monitor_until_second_wait(monkeypatch, ping):
+    """Runs `monitor_database` with `ping` until it waits for the database a second time."""
+    monkeypatch.setattr(database, "LIVENESS_INTERVAL", 0.01)
+    waits = []
+
+    async def wait_for_database():
+        # The first wait is the startup one; the second follows a failed ping.
+        waits.append(1)
+        if len(waits) == 2:
+            raise _Stop
+
+    monkeypatch.setattr(database, "ping", ping)
+    monkeypatch.setattr(database, "wait_for_database", wait_for_database)
+    return database.monitor_database()
+
+
+def test_failed_ping_empties_the_primary_pools(monkeypatch, tmp_path):
+    path = tmp_path / "live.db"
+    engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=AsyncAdaptedQueuePool)
+    replica = database.Replica(1, f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setattr(database, "_async_engine", async_engine)
+    monkeypatch.setattr(database, "replicas", [replica])
+
+    def ping():
+        raise OSError("database is down")
+
+    async def scenario():
+        with engine.connect(), replica.engine().connect():
+            pass
+        async with async_engine.connect():
+            pass
+        assert engine.pool.checkedin() == 1
+        assert async_engine.sync_engine.pool.checkedin() == 1
+        with pytest.raises(_Stop):
+            await _monitor_until_second_wait(monkeypatch, ping)
+        assert engine.pool.checkedin() == 0
+        assert async_engine.sync_engine.pool.checkedin() == 0
+        # The replicas are left to their own check.
+        assert replica.engine().pool.checkedin() == 1
+
+    asyncio.run(scenario())
+
+
+def test_pool_timeout_is_not_a_failure(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'live.db'}")
+    monkeypatch.setattr(database, "_engine", engine)
+    ready_at_ping = []
+
+    def ping():
+        # Two saturated pings, then a failure that ends the monitor.
+        ready_at_ping.append((database.database_ready.is_set(), engine.pool.checkedin()))
+        if len(ready_at_ping) < 3:
+            raise PoolTimeout("QueuePool limit reached")
+        raise OSError("database is down")
+
+    async def scenario():
+        with engine.connect():
+            pass
+        database.database_ready.set()
+        with pytest.raises(_Stop):
+            await _monitor_until_second_wait(monkeypatch, ping)
+        assert ready_at_ping == [(True, 1)] * 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        database.database_ready.clear()
+
+
+def test_ping_does_not_queue_for_the_request_pool(monkeypatch, tmp_path):
+    url = f"sqlite:///{tmp_path / 'live.db'}"
+    engine = create_engine(url, poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1)
+    monkeypatch.setattr(database, "DATABASE_URL", url)
+    monkeypatch.setattr(database, "_engine", engine)
+    monkeypatch.setattr(database, "_probe_engine", None)
+
+    with engine.connect():
+        # Every pooled connection is checked out.
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+        database.ping()
@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, select
+
+from app.details import production_details
+from app.models import Production
+
+# Productions, then expenses, assignments, schedules, rental usages and their payments.
+MAX_QUERIES = 6
+
+
+@contextmanager
+def count_queries(engine):
+    counted = []
+
+    def counter(*_):
+        counted.append(1)
+
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counted
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def production_ids(db):
+    return list(db.execute(select(Production.production_id).order_by(Production.production_id)).scalars())
+
+
+@pytest.mark.parametrize("size", [1, 10, 100])
+def test_query_count_does_not_grow_with_the_batch(engine, db, production_ids, size):
+    ids = production_ids[:size]
+    assert len(ids) == size
+    db.expunge_all()
+    with count_queries(engine) as counted:
+        details = production_details(db, ids)
+    assert [d["production_id"] for d in details] == ids
+    assert len(counted) <= MAX_QUERIES
+
+
+def test_detail_has_the_whole_graph(db, production_ids):
+    (detail,) = production_details(db, production_ids[:1])
+    for key in ("partner", "general_details", "event_details", "expenses", "assignments", "schedules", "rental_usages"):
+        assert key in detail
+    for assignment in detail["assignments"]:
+        assert assignment["personnel"]["personnel_id"] == assignment["personnel_id"]
+    for usage in detail["rental_usages"]:
+        assert usage["place"]["place_id"] == usage["place_id"]
+
+
+def test_endpoints(client, engine, production_ids):
+    ids = list(reversed(production_ids[:5]))
+    with count_queries(engine) as counted:
+        response = client.get("/productions", params={"ids": ids + [99999999]})
+    assert response.status_code == 200
+    assert [d["production_id"] for d in response.json()["data"]] == ids
+    assert len(counted) <= MAX_QUERIES
+
+    assert client.get(f"/productions/{ids[0]}").json()["data"][0]["production_id"] == ids[0]
+    assert client.get("/productions/99999999").status_code == 404
+    assert client.get("/productions").status_code == 422
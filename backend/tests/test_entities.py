@@ -0,0 +1,46 @@
+ROW = {"personnel_id": 990001, "name": "New Person", "personnel_type": "Actor", "email": "new@example.com"}
+
+
+def test_create_then_get(client):
+    response = client.post("/entities/personnel", json=[ROW, {**ROW, "personnel_id": 990002}])
+    assert response.status_code == 201
+    assert response.json()["created"] == 2
+    data = client.get("/entities/personnel/990001").json()["data"]
+    assert data[0]["name"] == "New Person" and data[0]["email"] == "new@example.com"
+
+
+def test_create_rejects_invalid_and_duplicate_rows(client):
+    response = client.post("/entities/personnel", json=[ROW, {"personnel_id": 990002}])
+    assert response.status_code == 422
+    assert [e["index"] for e in response.json()["detail"]] == [1]
+    assert client.post("/entities/personnel", json=[{**ROW, "personnel_id": 1}]).status_code == 409
+    assert client.get("/entities/personnel/990001").status_code == 404
+
+
+def test_update(client):
+    client.post("/entities/personnel", json=[ROW])
+    response = client.patch("/entities/personnel/990001", json={"name": "Renamed"})
+    assert response.status_code == 200 and response.json()["updated"] == 1
+    assert client.get("/entities/personnel/990001").json()["data"][0]["name"] == "Renamed"
+    response = client.patch("/entities/personnel", json=[
+        {"personnel_id": 990001, "phone": "555"}, {"personnel_id": 990009, "phone": "1"}
+    ])
+    assert response.json() == {"entity": "personnel", "received": 2, "updated": 1}
+    # An empty change to an existing row is a no-op.
+    assert client.patch("/entities/personnel/990001", json={}).status_code == 200
+    assert client.patch("/entities/personnel/990001", json={"personnel_id": 5}).status_code == 422
+
+
+def test_delete(client):
+    client.post("/entities/rental-places", json=[{"place_id": 990001, "name": "Back Lot"}])
+    response = client.delete("/entities/rental-places/990001")
+    assert response.status_code == 200 and response.json()["deleted"] == 1
+    assert client.get("/entities/rental-places/990001").status_code == 404
+
+
+def test_missing_rows_are_404(client):
+    assert client.get("/entities/productions/990001").status_code == 404
+    assert client.patch("/entities/productions/990001", json={"title": "Nothing"}).status_code == 404
+    assert client.patch("/entities/productions/990001", json={}).status_code == 404
+    assert client.patch("/entities/productions/990001", json={"production_id": 990001}).status_code == 404
+    assert client.delete("/entities/productions/990001").status_code == 404
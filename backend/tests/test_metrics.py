@@ -0,0 +1,26 @@
+from app import metrics
+
+
+def _types(text):
+    return dict(line.split()[2:4] for line in text.splitlines() if line.startswith("# TYPE"))
+
+
+def test_cache_counters_are_counters(client):
+    client.get("/stats/personnel/assignments?limit=5")
+    client.get("/stats/personnel/assignments?limit=5")
+    types = _types(client.get("/metrics").text)
+    for name in ("agency_cache_hits", "agency_cache_misses", "agency_cache_evictions"):
+        assert types[name] == "counter", name
+    assert types["agency_cache_entries"] == "gauge"
+
+
+def test_statement_texts_are_bounded(monkeypatch):
+    monkeypatch.setattr(metrics, "MAX_STATEMENTS", 3)
+    monkeypatch.setattr(metrics, "_statements", metrics.OrderedDict())
+    first = metrics.fingerprint("SELECT 1")
+    for value in range(2, 6):
+        metrics.fingerprint(f"SELECT {value}")
+        # Seen again, so it is not the least recent one.
+        assert metrics.fingerprint("SELECT   1") == first
+    assert len(metrics._statements) == 3
+    assert list(metrics._statements.values()) == ["SELECT 4", "SELECT 5", "SELECT 1"]
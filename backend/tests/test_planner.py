@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.models import Personnel, ProductionSchedule, RentalPlace, RentalUsage
+
+REQUEST = {
+    "horizon_start": "2024-01-01T00:00:00",
+    "horizon_end": "2024-02-01T00:00:00",
+    "duration_minutes": 240,
+    "step_minutes": 60,
+    "personnel": [{"personnel_type": "Director", "count": 13}],
+    "place_type": "Studio",
+    "limit": 20,
+}
+
+
+def _free(busy, ids, start, end):
+    return [i for i in ids if not any(s < end and e > start for s, e in busy.get(i, []))]
+
+
+def test_windows_match_a_brute_force_scan(client, db):
+    directors = list(db.execute(
+        select(Personnel.personnel_id).where(Personnel.personnel_type == "Director").order_by(Personnel.personnel_id)
+    ).scalars())
+    studios = list(db.execute(
+        select(RentalPlace.place_id).where(RentalPlace.type == "Studio").order_by(RentalPlace.place_id)
+    ).scalars())
+    people_busy, places_busy = {}, {}
+    for pid, start, end in db.execute(select(ProductionSchedule.personnel_id, ProductionSchedule.start_dt, ProductionSchedule.end_dt)):
+        people_busy.setdefault(pid, []).append((start, end))
+    for place_id, start, end in db.execute(select(RentalUsage.place_id, RentalUsage.start_time, RentalUsage.end_time)):
+        places_busy.setdefault(place_id, []).append((start, end))
+
+    expected = []
+    at, duration = datetime(2024, 1, 1), timedelta(minutes=240)
+    while at + duration <= datetime(2024, 2, 1) and len(expected) < REQUEST["limit"]:
+        free_directors = _free(people_busy, directors, at, at + duration)
+        free_studios = _free(places_busy, studios, at, at + duration)
+        if len(free_directors) >= 13 and free_studios:
+            expected.append({
+                "start_dt": at.isoformat(), "end_dt": (at + duration).isoformat(),
+                "personnel": {"Director": free_directors}, "places": free_studios
+            })
+        at += timedelta(hours=1)
+
+    response = client.post("/schedule/windows/search", json=REQUEST)
+    assert response.status_code == 200
+    assert response.json()["data"] == expected
+
+
+def test_mixed_aware_and_naive_horizon(client):
+    for horizon_end, status in [("2024-02-01T00:00:00", 200), ("2026-01-01T00:00:00", 422)]:
+        response = client.post("/schedule/windows/search", json={
+            **REQUEST, "horizon_start": "2024-01-01T00:00:00+07:00", "horizon_end": horizon_end
+        })
+        assert response.status_code == status, horizon_end
@@ -0,0 +1,97 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import select
+
+from app.intervals import busy_time, merge_intervals
+from app.models import RentalPlace, RentalUsage
+
+
+def _free_ids(client, start, end):
+    data = client.get("/rental/available", params={"start_dt": start, "end_dt": end}).json()["data"]
+    return sorted(r["place_id"] for r in data)
+
+
+def test_batch_matches_single_window_query(client):
+    windows = [
+        {"start_dt": "2024-03-04T09:00:00", "end_dt": "2024-03-04T12:00:00"},
+        {"start_dt": "2024-06-10T08:00:00", "end_dt": "2024-06-12T08:00:00"},
+    ]
+    response = client.post("/rental/available/batch", json={"windows": windows})
+    assert response.status_code == 200
+    for window, result in zip(windows, response.json()["data"]):
+        assert sorted(p["place_id"] for p in result["places"]) == _free_ids(client, window["start_dt"], window["end_dt"])
+
+
+def test_aware_windows_drop_their_offset(client):
+    naive = {"start_dt": "2024-06-10T08:00:00", "end_dt": "2024-06-12T08:00:00"}
+    aware = {"start_dt": "2024-06-10T08:00:00Z", "end_dt": "2024-06-12T08:00:00+00:00"}
+    mixed = {"start_dt": "2024-06-10T08:00:00+07:00", "end_dt": "2024-06-12T08:00:00"}
+    response = client.post("/rental/available/batch", json={"windows": [naive, aware, mixed]})
+    assert response.status_code == 200
+    results = response.json()["data"]
+    assert results[0] == results[1] == results[2]
+    assert results[1]["start_dt"] == "2024-06-10T08:00:00"
+
+
+def test_aware_horizon(client):
+    response = client.post("/rental/available/batch", json={
+        "horizon_start": "2024-06-10T08:00:00Z", "horizon_end": "2024-06-10T12:00:00", "slot_minutes": 60
+    })
+    assert response.status_code == 200
+    assert response.json()["count"] == 4
+
+
+def _naive_busy(intervals, lo, hi):
+    """Busy time of possibly overlapping intervals within [lo, hi), clipping and merging them one by one."""
+    clipped = sorted((max(start, lo), min(end, hi)) for start, end in intervals if start < hi and end > lo)
+    total, reached = timedelta(0), lo
+    for start, end in clipped:
+        if end > reached:
+            total += end - max(start, reached)
+            reached = end
+    return total
+
+
+def test_busy_time_matches_a_naive_sum():
+    rng = random.Random(3)
+    base = datetime(2031, 1, 1)
+    intervals = []
+    for _ in range(200):
+        start = base + timedelta(minutes=rng.randrange(30 * 24 * 60))
+        intervals.append((start, start + timedelta(minutes=rng.randrange(1, 3 * 24 * 60))))
+    starts, ends = merge_intervals(intervals)
+    for step in (timedelta(hours=1), timedelta(hours=7), timedelta(days=1)):
+        boundaries = [base - step + i * step for i in range(int(timedelta(days=36) / step))]
+        expected = [_naive_busy(intervals, a, b) for a, b in zip(boundaries, boundaries[1:])]
+        assert busy_time(starts, ends, boundaries) == expected, step
+
+
+def test_occupancy_matches_a_naive_sum(client, db):
+    for start_date, end_date, bucket, step in [
+        (date(2024, 3, 1), date(2024, 3, 3), "hour", timedelta(hours=1)),
+        (date(2024, 1, 1), date(2024, 6, 30), "day", timedelta(days=1)),
+        (date(2024, 1, 3), date(2024, 12, 31), "week", timedelta(weeks=1)),
+    ]:
+        response = client.get("/rental/occupancy", params={
+            "start_date": start_date.isoformat(), "end_date": end_date.isoformat(), "bucket": bucket,
+            "place_type": "Studio"
+        })
+        assert response.status_code == 200
+        rows = response.json()["data"]
+        studios = db.execute(select(RentalPlace.place_id).where(RentalPlace.type == "Studio")).scalars().all()
+        usages = {
+            place_id: [(u.start_time, u.end_time) for u in db.execute(
+                select(RentalUsage).where(RentalUsage.place_id == place_id)).scalars()]
+            for place_id in studios
+        }
+        first = datetime.combine(start_date, time.min)
+        if bucket == "week":
+            first -= timedelta(days=start_date.weekday())
+        assert {r["place_id"] for r in rows} == set(studios)
+        assert sum(1 for r in rows if r["occupied_fraction"] > 0) > 0, bucket
+        for row in rows:
+            lo = datetime.fromisoformat(row["bucket_start"])
+            assert lo >= first and (lo - first) % step == timedelta(0)
+            expected = _naive_busy(usages[row["place_id"]], lo, lo + step) / step
+            assert abs(row["occupied_fraction"] - expected) < 1e-4, (row, expected)
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import create_engine, select
+
+from app import database
+from app.database import Base, Replica, RoutingSession, check_replica
+from app.models import Personnel
+
+
+@pytest.fixture
+def routed(monkeypatch, tmp_path):
+    """A primary and a replica SQLite file, told apart by the name of personnel 1."""
+    primary = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    replica = Replica(1, f"sqlite:///{tmp_path / 'replica.db'}")
+    for engine, name in ((primary, "On Primary"), (replica.engine(), "On Replica")):
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(Personnel.__table__.insert(), {"personnel_id": 1, "name": name, "personnel_type": "Actor"})
+    monkeypatch.setattr(database, "_engine", primary)
+    monkeypatch.setattr(database, "replicas", [replica])
+    monkeypatch.setattr(database, "_last_write", 0.0)
+    yield replica
+    replica.engine().dispose()
+    primary.dispose()
+
+
+def _name(db):
+    return db.execute(select(Personnel.name).where(Personnel.personnel_id == 1)).scalar()
+
+
+def test_reads_go_to_the_replica(routed):
+    with RoutingSession() as db:
+        assert _name(db) == "On Replica"
+        assert db.get(Personnel, 1).name == "On Replica"
+
+
+def test_writes_and_later_reads_go_to_the_primary(routed):
+    with RoutingSession() as db:
+        assert _name(db) == "On Replica"
+        db.add(Personnel(personnel_id=2, name="Written", personnel_type="Actor"))
+        db.flush()
+        # Read-after-write: the rest of the session stays on the primary.
+        assert _name(db) == "On Primary"
+        db.commit()
+        assert _name(db) == "On Primary"
+    with routed.engine().connect() as conn:
+        assert conn.execute(select(Personnel.personnel_id).where(Personnel.personnel_id == 2)).first() is None
+    with RoutingSession() as db:
+        assert _name(db) == "On Replica"
+
+
+def test_locking_reads_and_use_primary_go_to_the_primary(routed):
+    with RoutingSession() as db:
+        stmt = select(Personnel.name).where(Personnel.personnel_id == 1).with_for_update()
+        assert db.execute(stmt).scalar() == "On Primary"
+    with RoutingSession() as db:
+        database.use_primary(db)
+        assert _name(db) == "On Primary"
+
+
+def test_read_your_writes_window(routed, monkeypatch):
+    monkeypatch.setattr(database, "READ_YOUR_WRITES", 60.0)
+    with RoutingSession() as db:
+        db.add(Personnel(personnel_id=2, name="Written", personnel_type="Actor"))
+        db.commit()
+    with RoutingSession() as db:
+        assert _name(db) == "On Primary"
+
+
+def test_unhealthy_replica_falls_back_to_the_primary(routed):
+    check_replica(routed)
+    assert routed.healthy and routed.lag == 0.0
+    routed.mark_down()
+    with RoutingSession() as db:
+        assert _name(db) == "On Primary"
+    routed.down_until = 0.0
+    with RoutingSession() as db:
+        assert _name(db) == "On Replica"
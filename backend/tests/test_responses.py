@@ -0,0 +1,33 @@
+from app.responses import COLUMNAR_MEDIA_TYPE, to_rows
+
+# Q7 goes through run_query and the result cache; Q5 builds its rows in Python.
+PATHS = ["/stats/personnel/assignments?limit=5", "/personnel/actors/top-projects?n=5"]
+
+
+def test_rows_are_plain_json(client):
+    for path in PATHS:
+        response = client.get(path)
+        assert response.headers["content-type"] == "application/json", path
+        assert "Accept" in response.headers["vary"], path
+        assert "data" in response.json(), path
+
+
+def test_columnar_has_its_media_type(client):
+    for path in PATHS:
+        rows = client.get(path).json()
+        for response in (
+            client.get(path, headers={"Accept": COLUMNAR_MEDIA_TYPE}),
+            # The second request is a result cache hit for Q7.
+            client.get(path, headers={"Accept": COLUMNAR_MEDIA_TYPE}),
+            client.get(path + "&format=columnar"),
+        ):
+            assert response.headers["content-type"] == COLUMNAR_MEDIA_TYPE, path
+            assert "Accept" in response.headers["vary"], path
+            body = response.json()
+            assert to_rows(body["key"], body["columns"]) == rows["data"], path
+
+
+def test_vary_keeps_the_compression_value(client):
+    response = client.get("/stats/personnel/assignments", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert {v.strip() for v in response.headers["vary"].split(",")} == {"Accept", "Accept-Encoding"}
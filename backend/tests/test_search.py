@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import select
+
+from app.models import Personnel, Production
+from app.search import SearchIndex, search_index
+
+TERMS = ["a", "ki", "KIM", "alice", "ice c", "city", "echo 5", "dream stone", "zzz"]
+
+
+def _like_ids(db, field, term):
+    _, key_col, text_col, _, _ = SearchIndex.FIELDS[field]
+    return set(db.execute(select(key_col).where(text_col.like(f"%{term}%"))).scalars())
+
+
+@pytest.mark.parametrize("field", ["personnel", "production"])
+def test_index_matches_like(db, field):
+    index = SearchIndex()
+    for term in TERMS:
+        assert index.matching_ids(db, field, term) == _like_ids(db, field, term), term
+
+
+def test_q7_index_and_sql_agree(client):
+    for params in ({"name_search": "kim"}, {"title_search": "echo"}, {"name_search": "al", "title_search": "stone"}):
+        answers = [
+            client.get("/stats/personnel/assignments", params={**params, "source": source}).json()["data"]
+            for source in ("index", "sql")
+        ]
+        assert answers[0] == answers[1], params
+
+
+def test_committed_writes_are_applied(client, db):
+    search_index.matching_ids(db, "personnel", "kim")
+    db.add(Personnel(personnel_id=990001, name="Zed Kimura", personnel_type="Actor"))
+    db.get(Production, 1).title = "Kimchi Festival"
+    db.commit()
+    assert search_index._loaded_at is not None
+    for field in ("personnel", "production"):
+        assert search_index.matching_ids(db, field, "kim") == _like_ids(db, field, "kim"), field
+    texts = {r["text"] for field in ("personnel", "production") for r in search_index.search(db, field, "kim", 100)}
+    assert {"Zed Kimura", "Kimchi Festival"} <= texts
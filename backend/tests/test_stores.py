@@ -0,0 +1,66 @@
+import threading
+import time
+
+from app.events import RowChange
+from app.stores import InMemoryStore
+
+
+class _SlowStore(InMemoryStore):
+    """Counts its full loads, each taking a while, and runs `during_read` in the middle of one."""
+
+    TABLES = frozenset({"tracked"})
+
+    def __init__(self):
+        super().__init__(max_age=60)
+        self.reads = 0
+        self.during_read = lambda: None
+
+    def _read(self, db):
+        self.reads += 1
+        time.sleep(0.05)
+        self.during_read()
+        return self.reads
+
+    def _install(self, state):
+        self.state = state
+
+    def _apply_one(self, change):
+        return change.op != "bulk"
+
+
+def test_concurrent_requests_share_one_load():
+    store = _SlowStore()
+    threads = [threading.Thread(target=store._ensure_fresh, args=(None,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.reads == 1
+    assert store._is_fresh()
+
+
+def test_writes_to_other_tables_do_not_spoil_a_load():
+    store = _SlowStore()
+    store.during_read = lambda: store.apply([RowChange("other", "bulk")])
+    store._ensure_fresh(None)
+    assert store._is_fresh()
+    assert store._version == 0
+
+
+def test_writes_to_tracked_tables_during_a_load_force_a_reload():
+    store = _SlowStore()
+    store.during_read = lambda: store.apply([RowChange("tracked", "insert", {})])
+    store._ensure_fresh(None)
+    assert not store._is_fresh()
+    store.during_read = lambda: None
+    store._ensure_fresh(None)
+    assert store._is_fresh() and store.reads == 2
+
+
+def test_bulk_write_to_a_tracked_table_triggers_a_reload():
+    store = _SlowStore()
+    store._ensure_fresh(None)
+    store.apply([RowChange("other", "bulk"), RowChange("tracked", "insert", {})])
+    assert store._is_fresh()
+    store.apply([RowChange("tracked", "bulk")])
+    assert not store._is_fresh()
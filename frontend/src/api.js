@@ -1,5 +1,19 @@
 // API configuration for frontend
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+const COLUMNAR_MEDIA_TYPE = 'application/vnd.agency.columnar+json';
+
+// The backend can send results column by column ({ key, columns }) instead of
+// repeating every key in every row; rebuild the row objects the UI expects.
+const fromColumnar = (result) => {
+  if (!result || !Array.isArray(result.columns)) {
+    return result;
+  }
+  const { columns, ...rest } = result;
+  const data = Array.from({ length: result.count }, (_, i) =>
+    Object.fromEntries(result.key.map((k, j) => [k, columns[j][i]]))
+  );
+  return { ...rest, data };
+};
 
 export const apiCall = async (endpoint, options = {}) => {
   let url = `${API_BASE_URL}${endpoint}`;
@@ -17,6 +31,7 @@ export const apiCall = async (endpoint, options = {}) => {
       method: options.method || 'GET',
       headers: {
         'Content-Type': 'application/json',
+        'Accept': `${COLUMNAR_MEDIA_TYPE}, application/json`,
         ...options.headers,
       },
       ...(options.body && { body: JSON.stringify(options.body) }),
@@ -27,7 +42,7 @@ export const apiCall = async (endpoint, options = {}) => {
       throw new Error(`API Error (${response.status}): ${response.statusText} - ${errorText}`);
     }
 
-    return await response.json();
+    return fromColumnar(await response.json());
   } catch (error) {
     console.error('API call failed:', error);
     throw error;